@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Micro-benchmark: current chunker engine vs the original line-concatenating chunk_text."""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from aurora_kernel.chunker import Chunk, chunk_text
+
+def legacy_chunk_text(doc_id: str, text: str, max_chars: int = 1200) -> List[Chunk]:
+    """The pre-engine implementation, kept here only as a baseline."""
+    lines = text.splitlines()
+    chunks: List[Chunk] = []
+    current_section = ""
+    buf = ""
+    idx = 0
+
+    def flush():
+        nonlocal buf, idx
+        if buf.strip():
+            chunks.append(Chunk(chunk_id=f"{doc_id}::chunk::{idx}", text=buf.strip(), section=current_section))
+            idx += 1
+        buf = ""
+
+    for line in lines:
+        if line.startswith("# "):
+            new_section = line[2:].strip()
+            flush()
+            current_section = new_section
+        elif line.startswith("## "):
+            new_section = line[3:].strip()
+            flush()
+            current_section = new_section
+
+        if len(buf) + len(line) + 1 <= max_chars:
+            buf = (buf + "\n" + line).strip()
+        else:
+            flush()
+            buf = line
+
+    flush()
+    return chunks
+
+def make_doc(n_chars: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = ["control", "access", "policy", "retention", "audit", "evidence", "vendor", "encryption", "incident", "review"]
+    out: List[str] = ["# Synthetic Policy"]
+    size = 0
+    while size < n_chars:
+        r = rng.random()
+        if r < 0.02:
+            line = f"## Section {len(out)}"
+        elif r < 0.10:
+            line = ""
+        else:
+            line = " ".join(rng.choice(words) for _ in range(rng.randint(4, 18)))
+        out.append(line)
+        size += len(line) + 1
+    return "\n".join(out)
+
+def bench(fn: Callable[[], List[Chunk]], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="100000,1000000,5000000", help="Comma-separated document sizes in chars")
+    ap.add_argument("--max-chars", type=int, default=1200)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'doc chars':>10} {'legacy s':>10} {'engine s':>10} {'speedup':>8} {'chunks':>8}  same")
+    for n in (int(x) for x in args.sizes.split(",")):
+        text = make_doc(n)
+        legacy = legacy_chunk_text("D", text, args.max_chars)
+        engine = chunk_text("D", text, args.max_chars, overlap=0, heading_level=2)
+        same = [(c.chunk_id, c.text, c.section) for c in legacy] == [(c.chunk_id, c.text, c.section) for c in engine]
+        t_legacy = bench(lambda: legacy_chunk_text("D", text, args.max_chars), args.repeat)
+        t_engine = bench(lambda: chunk_text("D", text, args.max_chars, overlap=0, heading_level=2), args.repeat)
+        print(f"{n:>10} {t_legacy:>10.4f} {t_engine:>10.4f} {t_legacy / t_engine:>7.1f}x {len(engine):>8}  {same}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
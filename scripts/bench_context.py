@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""Agent context size and coverage: top_k full chunks vs the packed context (context_packer).
+
+By default builds a throwaway local index from --corpus and generates queries from random
+chunks (as bench_hybrid does). For each query it compares the context the agent would get
+before packing (the top_k hits, untrimmed) with the packed one built from the same
+retrieval: prompt size, whether the query's source document is still in the context, and
+how many of the baseline's cited documents the packed context keeps. With --agent (and
+Agent Builder configured) both contexts are also sent to the converse API to measure end-to-end
+latency and how many of the agent's baseline citations it still makes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+from dotenv import load_dotenv
+
+from aurora_kernel import elastic_store, local_store
+from aurora_kernel.context_packer import CONTEXT_BUDGET_TOKENS, estimate_tokens, pack_context
+from aurora_kernel.corpus_loader import load_corpus
+from aurora_kernel.packs import SOURCE_FILTER, agent_attachments, retrieval_size
+
+from bench_hybrid import make_queries
+
+def _context_chars(hits: List[Dict[str, Any]]) -> int:
+    return len(json.dumps(agent_attachments(hits), ensure_ascii=False))
+
+def _docs(hits: List[Dict[str, Any]]) -> Set[str]:
+    return {h.get("doc_id") for h in hits}
+
+def _p(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+def _row(label: str, chars: List[int], recall: List[bool], coverage: List[float], ms: List[float]) -> None:
+    tokens = [c / 4 for c in chars]
+    print(
+        f"{label:<8} chars p50={statistics.median(chars):7.0f}  est_tokens mean={statistics.mean(tokens):6.0f}  "
+        f"source_recall={sum(recall) / len(recall):.3f}  doc_coverage={statistics.mean(coverage):.3f}  "
+        f"build p50={statistics.median(ms):6.3f}ms"
+    )
+
+async def _agent_run(prompt: str, hits: List[Dict[str, Any]]) -> Tuple[float, Set[str]]:
+    from aurora_kernel.api import _call_agent_builder_converse, get_agent_builder_config
+
+    t0 = time.perf_counter()
+    result = await _call_agent_builder_converse(get_agent_builder_config(), prompt, agent_attachments(hits))
+    elapsed = time.perf_counter() - t0
+    cited = {c.get("doc_id") for c in (result.get("citations") or []) if isinstance(c, dict)}
+    return elapsed, cited
+
+async def _agent_bench(queries: List[Tuple[str, List[str]]], contexts: List[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]) -> None:
+    from aurora_kernel.kibana_http import KIBANA_HTTP
+
+    base_s: List[float] = []
+    packed_s: List[float] = []
+    kept: List[float] = []
+    prompt = (
+        "Use ONLY the provided context docs. Return a JSON object with keys: summary and "
+        "citations (array of objects with doc_id and reason).\nQUESTION: "
+    )
+    try:
+        for (q, _docs_), (baseline, packed) in zip(queries, contexts):
+            b_s, b_cited = await _agent_run(prompt + q, baseline)
+            p_s, p_cited = await _agent_run(prompt + q, packed)
+            base_s.append(b_s)
+            packed_s.append(p_s)
+            if b_cited:
+                kept.append(len(b_cited & p_cited) / len(b_cited))
+    finally:
+        await KIBANA_HTTP.aclose()
+    print(f"agent    baseline p50={statistics.median(base_s):6.2f}s p90={_p(base_s, 0.9):6.2f}s  "
+          f"packed p50={statistics.median(packed_s):6.2f}s p90={_p(packed_s, 0.9):6.2f}s")
+    if kept:
+        print(f"agent    baseline citations kept by packed context: {statistics.mean(kept):.3f}")
+
+def main() -> int:
+    load_dotenv()
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--corpus", default=os.getenv("AURORA_CORPUS_PATH"))
+    ap.add_argument("--backend", choices=["local", "elastic"], default="local")
+    ap.add_argument("--index", default=os.getenv("AURORA_INDEX", "aurora_corpus_v0"))
+    ap.add_argument("--queries", default=None, help="JSONL of {\"q\": ..., \"doc_ids\": [...]}")
+    ap.add_argument("-n", type=int, default=200, help="Generated queries")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--top-k", type=int, default=6)
+    ap.add_argument("--budget", type=int, default=CONTEXT_BUDGET_TOKENS, help="Context budget in tokens")
+    ap.add_argument("--agent", type=int, default=0, metavar="N", help="Also time N queries end to end against Agent Builder")
+    args = ap.parse_args()
+
+    if args.backend == "local":
+        if not args.corpus:
+            ap.error("--corpus (or AURORA_CORPUS_PATH) is required for the local backend")
+        store: Any = local_store.make_local_store(tempfile.mkdtemp(prefix="aurora-bench-"))
+        local_store.index_corpus(store, args.index, load_corpus(Path(args.corpus)))
+        backend: Any = local_store
+        sources = [s for s in store.open(args.index).all_sources().values() if s.get("doc_type") == "source"]
+    else:
+        store = elastic_store.make_es_client(
+            cloud_id=os.getenv("ELASTIC_CLOUD_ID"),
+            es_url=os.getenv("ES_URL"),
+            api_key=os.getenv("ES_API_KEY"),
+            username=os.getenv("ES_USERNAME"),
+            password=os.getenv("ES_PASSWORD"),
+        )
+        backend = elastic_store
+        resp = store.search(index=args.index, size=2000, source=["doc_id", "content"], query={"term": SOURCE_FILTER})
+        sources = [h["_source"] for h in resp["hits"]["hits"]]
+
+    if args.queries:
+        queries = [(r["q"], r["doc_ids"]) for r in map(json.loads, Path(args.queries).read_text().splitlines()) if r]
+    else:
+        queries = make_queries(sources, args.n, args.seed)
+    print(f"{len(queries)} queries, top_k={args.top_k}, budget={args.budget} tokens")
+
+    size = retrieval_size(args.top_k)
+    chars: Dict[str, List[int]] = {"baseline": [], "packed": []}
+    recall: Dict[str, List[bool]] = {"baseline": [], "packed": []}
+    coverage: Dict[str, List[float]] = {"baseline": [], "packed": []}
+    ms: Dict[str, List[float]] = {"baseline": [], "packed": []}
+    dropped = 0
+    contexts = []
+    for q, relevant in queries:
+        results = backend.search(store, args.index, q, filters=dict(SOURCE_FILTER), size=size)
+        t0 = time.perf_counter()
+        baseline = results["hits"][:args.top_k]
+        ms["baseline"].append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        packed, stats = pack_context(results["hits"], budget_tokens=args.budget, max_items=args.top_k)
+        ms["packed"].append((time.perf_counter() - t0) * 1000)
+        dropped += stats["duplicates"]
+        contexts.append((baseline, packed))
+        base_docs = _docs(baseline)
+        for label, hits in (("baseline", baseline), ("packed", packed)):
+            chars[label].append(_context_chars(hits))
+            recall[label].append(bool(_docs(hits) & set(relevant)))
+            coverage[label].append(len(_docs(hits) & base_docs) / len(base_docs) if base_docs else 1.0)
+
+    for label in ("baseline", "packed"):
+        _row(label, chars[label], recall[label], coverage[label], ms[label])
+    saved = 1 - sum(chars["packed"]) / max(1, sum(chars["baseline"]))
+    print(f"packed context is {saved:.1%} smaller (~{estimate_tokens('x' * (sum(chars['baseline']) - sum(chars['packed']))) // max(1, len(queries))} tokens/query); "
+          f"{dropped} near-duplicate/overlapping chunks dropped")
+
+    if args.agent:
+        asyncio.run(_agent_bench(queries[:args.agent], contexts[:args.agent]))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
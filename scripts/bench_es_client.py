@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""Per-request latency: a new Elasticsearch client per request (old api._client) vs one pooled client."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, List
+
+from dotenv import load_dotenv
+
+from aurora_kernel.elastic_store import es_client_options, make_es_client, pool_stats, search
+
+def _timed(fn: Callable[[], object], n: int) -> List[float]:
+    out: List[float] = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+def _report(label: str, ms: List[float]) -> None:
+    ms = sorted(ms)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(f"{label:<16} p50={statistics.median(ms):8.1f}ms  p95={p95:8.1f}ms  mean={statistics.mean(ms):8.1f}ms")
+
+def main() -> int:
+    load_dotenv()
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--q", default="access control policy")
+    ap.add_argument("--index", default=os.getenv("AURORA_INDEX", "aurora_corpus_v0"))
+    ap.add_argument("-n", type=int, default=50)
+    args = ap.parse_args()
+
+    creds = dict(
+        cloud_id=os.getenv("ELASTIC_CLOUD_ID"),
+        es_url=os.getenv("ES_URL"),
+        api_key=os.getenv("ES_API_KEY"),
+        username=os.getenv("ES_USERNAME"),
+        password=os.getenv("ES_PASSWORD"),
+    )
+
+    def per_request() -> None:
+        client = make_es_client(**creds)
+        search(client, index=args.index, q=args.q, size=5)
+        client.close()
+
+    shared = make_es_client(**creds, **es_client_options(cloud=bool(creds["cloud_id"])))
+    search(shared, index=args.index, q=args.q, size=5)  # open the first connection
+
+    _report("client/request", _timed(per_request, args.n))
+    _report("pooled client", _timed(lambda: search(shared, index=args.index, q=args.q, size=5), args.n))
+    print(pool_stats(shared))
+    shared.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""Recall@k and latency: current BM25 query vs hybrid BM25 + kNN (RRF).
+
+By default builds a throwaway local index (with embeddings) from --corpus and generates
+noisy queries from random chunks: a word window with some words dropped and others
+truncated, the way users paraphrase or misspell. A query counts as recalled at k if a
+chunk of its source document is in the top k. Pass --queries (JSONL of
+{"q": ..., "doc_ids": [...]}) to use a labelled set, and --backend elastic to measure a
+live index that was ingested with AURORA_EMBEDDINGS=true.
+"""
+
+from __future__ import annotations
+
+import os
+
+# Embed chunks when building the local benchmark index
+os.environ.setdefault("AURORA_EMBEDDINGS", "true")
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+from aurora_kernel import elastic_store, local_store
+from aurora_kernel.corpus_loader import load_corpus
+
+KS = (1, 3, 5, 8, 10)
+
+def make_queries(sources: List[Dict[str, Any]], n: int, seed: int) -> List[Tuple[str, List[str]]]:
+    rng = random.Random(seed)
+    out: List[Tuple[str, List[str]]] = []
+    pool = [s for s in sources if len((s.get("content") or "").split()) >= 12]
+    for src in rng.sample(pool, min(n, len(pool))):
+        words = src["content"].split()
+        start = rng.randrange(0, len(words) - 10)
+        window = words[start:start + rng.randint(6, 10)]
+        noisy = []
+        for w in window:
+            r = rng.random()
+            if r < 0.3:
+                continue  # dropped
+            if r < 0.5 and len(w) > 5:
+                w = w[:-2]  # truncated / inflected
+            noisy.append(w)
+        if noisy:
+            out.append((" ".join(noisy), [src["doc_id"]]))
+    return out
+
+def evaluate(label: str, fn: Callable[[str, int], Dict[str, Any]], queries: List[Tuple[str, List[str]]], size: int) -> None:
+    hits_at = {k: 0 for k in KS}
+    ms: List[float] = []
+    for q, relevant in queries:
+        t0 = time.perf_counter()
+        res = fn(q, size)
+        ms.append((time.perf_counter() - t0) * 1000)
+        ranked = [h.get("doc_id") for h in res["hits"]]
+        for k in KS:
+            if any(d in relevant for d in ranked[:k]):
+                hits_at[k] += 1
+    recall = "  ".join(f"R@{k}={hits_at[k] / len(queries):.3f}" for k in KS)
+    print(f"{label:<8} {recall}  p50={statistics.median(ms):7.2f}ms  mean={statistics.mean(ms):7.2f}ms")
+
+def main() -> int:
+    load_dotenv()
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--corpus", default=os.getenv("AURORA_CORPUS_PATH"))
+    ap.add_argument("--backend", choices=["local", "elastic"], default="local")
+    ap.add_argument("--index", default=os.getenv("AURORA_INDEX", "aurora_corpus_v0"))
+    ap.add_argument("--queries", default=None, help="JSONL of {\"q\": ..., \"doc_ids\": [...]}")
+    ap.add_argument("-n", type=int, default=200, help="Generated queries")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    size = max(KS)
+    if args.backend == "local":
+        if not args.corpus:
+            ap.error("--corpus (or AURORA_CORPUS_PATH) is required for the local backend")
+        store: Any = local_store.make_local_store(tempfile.mkdtemp(prefix="aurora-bench-"))
+        t0 = time.perf_counter()
+        local_store.index_corpus(store, args.index, load_corpus(Path(args.corpus)))
+        print(f"built local index in {time.perf_counter() - t0:.2f}s")
+        backend: Any = local_store
+        sources = list(store.open(args.index).all_sources().values())
+    else:
+        store = elastic_store.make_es_client(
+            cloud_id=os.getenv("ELASTIC_CLOUD_ID"),
+            es_url=os.getenv("ES_URL"),
+            api_key=os.getenv("ES_API_KEY"),
+            username=os.getenv("ES_USERNAME"),
+            password=os.getenv("ES_PASSWORD"),
+        )
+        backend = elastic_store
+        resp = store.search(index=args.index, size=2000, source=["doc_id", "content"], query={"match_all": {}})
+        sources = [h["_source"] for h in resp["hits"]["hits"]]
+
+    if args.queries:
+        queries = [(r["q"], r["doc_ids"]) for r in map(json.loads, Path(args.queries).read_text().splitlines()) if r]
+    else:
+        queries = make_queries(sources, args.n, args.seed)
+    print(f"{len(queries)} queries, {len(sources)} chunks")
+
+    evaluate("bm25", lambda q, k: backend.search(store, args.index, q, size=k), queries, size)
+    evaluate("hybrid", lambda q, k: backend.hybrid_search(store, args.index, q, size=k), queries, size)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
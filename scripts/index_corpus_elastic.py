@@ -6,16 +6,29 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
-from aurora_kernel.corpus_loader import load_corpus
-from aurora_kernel.elastic_store import make_es_client, index_corpus
+from aurora_kernel.corpus_loader import iter_corpus
+from aurora_kernel import elastic_store, local_store
+from aurora_kernel.elastic_store import make_es_client
+from aurora_kernel.manifest import CorpusManifest, manifest_path_for
+from aurora_kernel.search_cache import SEARCH_CACHE  # noqa: F401 - invalidates the shared API cache on writes
+from aurora_kernel.watch import watch_corpus
 
 def main() -> int:
     load_dotenv()
 
     ap = argparse.ArgumentParser()
-    ap.add_argument("--corpus", required=True, help="Path to corpus repo root")
+    ap.add_argument("--corpus", default=os.getenv("AURORA_CORPUS_PATH"), help="Path to corpus repo root")
     ap.add_argument("--index", default=os.getenv("AURORA_INDEX", "aurora_corpus_v0"))
+    ap.add_argument("--incremental", action="store_true", help="Skip unchanged files using a local manifest")
+    ap.add_argument("--manifest", default=None, help="Manifest path (default: .aurora/manifest-<index>.json)")
+    ap.add_argument("--watch", action="store_true", help="Keep running and push corpus edits to the index (implies --incremental)")
+    ap.add_argument("--rebuild", action="store_true", help="Load a new versioned index and swap the --index alias to it")
+    ap.add_argument("--rollback", action="store_true", help="Point the --index alias back at the previous versioned index")
+    ap.add_argument("--backend", choices=["elastic", "local"], default=os.getenv("AURORA_SEARCH_BACKEND", "elastic"),
+                    help="'local' writes the embedded index in AURORA_LOCAL_INDEX_DIR instead of Elasticsearch")
     args = ap.parse_args()
+    if not args.corpus and not args.rollback:
+        ap.error("--corpus (or AURORA_CORPUS_PATH) is required")
 
     cloud_id = os.getenv("ELASTIC_CLOUD_ID")
     es_url = os.getenv("ES_URL")
@@ -23,12 +36,31 @@ def main() -> int:
     username = os.getenv("ES_USERNAME")
     password = os.getenv("ES_PASSWORD")
 
-    client = make_es_client(cloud_id=cloud_id, es_url=es_url, api_key=api_key, username=username, password=password)
+    if args.backend == "local":
+        backend = local_store
+        client = local_store.make_local_store(os.getenv("AURORA_LOCAL_INDEX_DIR"))
+    else:
+        backend = elastic_store
+        client = make_es_client(cloud_id=cloud_id, es_url=es_url, api_key=api_key, username=username, password=password)
 
-    corpus = Path(args.corpus).resolve()
-    docs = load_corpus(corpus)
+    corpus = Path(args.corpus or ".").resolve()
+    manifest_path = Path(args.manifest) if args.manifest else manifest_path_for(args.index)
+    if args.rollback:
+        print(backend.rollback_alias(client, args.index))
+        return 0
+    if args.rebuild:
+        manifest = CorpusManifest(manifest_path)
+        print(backend.rebuild_index(client, args.index, iter_corpus(corpus, manifest=manifest), manifest=manifest))
+        return 0
+    if args.watch:
+        print(f"Watching {corpus} -> {args.index} (Ctrl+C to stop)")
+        watch_corpus(client, index=args.index, corpus_root=corpus, manifest_path=manifest_path, index_fn=backend.index_corpus)
+        return 0
 
-    resp = index_corpus(client, index=args.index, docs=docs)
+    manifest = None
+    if args.incremental:
+        manifest = CorpusManifest.load(manifest_path)
+    resp = backend.index_corpus(client, index=args.index, docs=iter_corpus(corpus, manifest=manifest), manifest=manifest)
     print(resp)
     return 0
 
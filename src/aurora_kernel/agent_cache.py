@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aurora_kernel.elastic_store import on_index_write
+
+logger = logging.getLogger("aurora_kernel")
+
+AGENT_CACHE_SIZE = int(os.getenv("AURORA_AGENT_CACHE_SIZE", "128"))
+AGENT_CACHE_TTL_S = float(os.getenv("AURORA_AGENT_CACHE_TTL_S", "900"))
+
+def agent_cache_key(agent_id: str, query: str, role: str, chunk_ids: List[str]) -> str:
+    """Same agent, query, role and context chunks (in order) = same answer. Chunk content is
+    left out: a re-ingest that changes it invalidates the index's entries anyway.
+    """
+    raw = json.dumps([agent_id, query, role, chunk_ids], ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class AgentCache:
+    """TTL + LRU cache of Agent Builder results with in-flight coalescing.
+
+    Identical concurrent requests share one upstream call: the first caller starts it as a
+    task, later ones await that task. Entries for an index are dropped whenever it is written (see
+    elastic_store.on_index_write), since a re-ingest can change what the agent would cite.
+    Results are stored as JSON so every caller gets a private copy.
+    """
+
+    def __init__(self, max_entries: int = AGENT_CACHE_SIZE, ttl_s: float = AGENT_CACHE_TTL_S):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        # key -> (index, expires, upstream seconds, json)
+        self._entries: "OrderedDict[str, Tuple[str, float, float, str]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        # key -> upstream call (a get_or_call task, or a begin_upstream future); only
+        # touched from the event loop
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Invalidation arrives from ingest threads
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.errors = 0
+        self.invalidations = 0
+        self.upstream_s = 0.0
+        self.saved_s = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_s > 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_s += entry[2]
+            return json.loads(entry[3])
+
+    def put(self, key: str, index: str, result: Dict[str, Any], upstream_s: float, generation: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        data = json.dumps(result, default=str)
+        with self._lock:
+            if generation is not None and generation != self._generations.get(index, 0):
+                return  # index re-ingested while the agent ran
+            self._entries[key] = (index, time.time() + self.ttl_s, upstream_s, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, index: str) -> int:
+        with self._lock:
+            return self._generations.get(index, 0)
+
+    def inflight(self, key: str) -> Optional[asyncio.Future]:
+        return self._inflight.get(key)
+
+    def begin_upstream(self, key: str) -> None:
+        """Register an upstream call the caller makes itself (the streaming endpoint), so
+        identical requests join it as they would a get_or_call() task. End it with
+        record_upstream() or abort_upstream().
+        """
+        fut = asyncio.get_running_loop().create_future()
+        fut.add_done_callback(_retrieve_exception)
+        self._inflight[key] = fut
+
+    def _pop_registered(self, key: str) -> Optional[asyncio.Future]:
+        fut = self._inflight.get(key)
+        if fut is None or isinstance(fut, asyncio.Task) or fut.done():
+            return None
+        return self._inflight.pop(key)
+
+    def record_upstream(self, key: str, index: str, result: Dict[str, Any], upstream_s: float, generation: Optional[int] = None) -> None:
+        """Count a completed upstream call and cache its result (only if the agent answered).
+        Requests waiting on a begin_upstream() registration get the result too.
+        """
+        with self._lock:
+            self.misses += 1
+            self.upstream_s += upstream_s
+        if result.get("text"):
+            self.put(key, index, result, upstream_s, generation=generation)
+        fut = self._pop_registered(key)
+        if fut is not None:
+            fut.set_result((json.dumps(result, default=str), upstream_s))
+
+    def abort_upstream(self, key: str, error: BaseException) -> None:
+        """A begin_upstream() call failed or was abandoned; its waiters get error."""
+        with self._lock:
+            self.errors += 1
+        fut = self._pop_registered(key)
+        if fut is not None:
+            fut.set_exception(error)
+
+    async def get_or_call(self, key: str, index: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], str]:
+        """(result, "hit" | "coalesced" | "miss"). Upstream errors propagate to every waiter
+        and are not cached.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached, "hit"
+        waiting = self._inflight.get(key)
+        if waiting is not None:
+            return await self.join(waiting), "coalesced"
+
+        # Its own task, so a first caller that disconnects does not cancel it for the others
+        task = asyncio.ensure_future(self._run(key, index, call, self.generation(index)))
+        task.add_done_callback(_retrieve_exception)
+        self._inflight[key] = task
+        data, _elapsed = await asyncio.shield(task)
+        return json.loads(data), "miss"
+
+    async def _run(self, key: str, index: str, call: Callable[[], Awaitable[Dict[str, Any]]], generation: int) -> Tuple[str, float]:
+        started = time.perf_counter()
+        try:
+            result = await call()
+        except BaseException:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        elapsed = time.perf_counter() - started
+        self.record_upstream(key, index, result, elapsed, generation=generation)
+        return json.dumps(result, default=str), elapsed
+
+    async def join(self, task: asyncio.Future) -> Dict[str, Any]:
+        """Wait for an in-flight upstream call (see inflight()) and return its result."""
+        joined = time.perf_counter()
+        data, elapsed = await asyncio.shield(task)
+        with self._lock:
+            self.coalesced += 1
+            # What this caller would have spent on its own call beyond the time it waited
+            self.saved_s += max(0.0, elapsed - (time.perf_counter() - joined))
+        return json.loads(data)
+
+    def invalidate(self, index: str) -> None:
+        with self._lock:
+            self._generations[index] = self._generations.get(index, 0) + 1
+            for key in [k for k, e in self._entries.items() if e[0] == index]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.hits + self.coalesced + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "errors": self.errors,
+                # Requests answered without their own upstream call
+                "hit_rate": round((self.hits + self.coalesced) / requests, 4) if requests else 0.0,
+                "upstream_s": round(self.upstream_s, 3),
+                "saved_s": round(self.saved_s, 3),
+                "invalidations": self.invalidations,
+            }
+
+def _retrieve_exception(task: asyncio.Future) -> None:
+    # Mark a failed upstream call as seen even if every waiter went away
+    if not task.cancelled():
+        task.exception()
+
+# Process-wide cache; importing this module subscribes it to index writes
+AGENT_CACHE = AgentCache()
+on_index_write(AGENT_CACHE.invalidate)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("aurora_kernel")
+
+# Incremental decoding of the Agent Builder converse stream. Each SSE event is parsed once
+# and routed by its event type to a fixed payload path; the agent text is kept as a list of
+# chunks; and the LLM's JSON answer is scanned as it streams, so each top-level field
+# (summary, claims, ...) is available the moment its value closes. Total work is linear in
+# the response size.
+
+# Events that carry no answer text (the agent's reasoning and tool traffic)
+_IGNORED_EVENTS = {"reasoning", "tool_call", "tool_result", "tool_progress", "thinking_complete"}
+
+def _find_key_recursive(obj: Any, key_names: List[str]) -> Any:
+    """Search recursively for a key in a nested dict/list structure."""
+    if isinstance(obj, dict):
+        for k in key_names:
+            if k in obj: return obj[k]
+        for v in obj.values():
+            res = _find_key_recursive(v, key_names)
+            if res: return res
+    elif isinstance(obj, list):
+        for v in obj:
+            res = _find_key_recursive(v, key_names)
+            if res: return res
+    return None
+
+def _payload(event: Any) -> Dict[str, Any]:
+    # Kibana wraps event payloads in {"data": {...}}
+    if isinstance(event, dict):
+        data = event.get("data")
+        return data if isinstance(data, dict) else event
+    return {}
+
+class JSONFieldScanner:
+    """Streaming scanner for the first top-level JSON object in text fed chunk by chunk
+    (text before it, e.g. a ```json fence, is skipped). Each top-level field is decoded
+    as soon as its value is complete; fields holds everything decoded so far.
+    """
+
+    def __init__(self) -> None:
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self.failed = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # At depth 1: "key" (expecting a key), "colon", "value"
+        self._state = "key"
+        self._key_parts: List[str] = []
+        self._value_parts: List[str] = []
+        self._key: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[str]:
+        """Scan chunk; return the names of fields completed by it."""
+        if self.complete or self.failed:
+            return []
+        done: List[str] = []
+        # Start of the key/value text not yet copied into _key_parts/_value_parts
+        mark = 0
+        for i, ch in enumerate(chunk):
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._state = "key"
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._state == "key":
+                        self._key_parts.append(chunk[mark:i])
+                        self._key = json.loads('"' + "".join(self._key_parts) + '"')
+                        self._key_parts = []
+                        self._state = "colon"
+                continue
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._state == "key":
+                    mark = i + 1
+            elif self._depth == 1 and self._state == "colon":
+                if ch == ":":
+                    self._state = "value"
+                    mark = i + 1
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "]}" and self._depth > 1:
+                self._depth -= 1
+            elif self._depth == 1 and ch in ",}":
+                if self._state == "value":
+                    self._value_parts.append(chunk[mark:i])
+                    if not self._finish_value():
+                        return done
+                    done.append(self._key)
+                self._state = "key"
+                if ch == "}":
+                    self._depth = 0
+                    self.complete = True
+                    return done
+        # Carry the unfinished key/value over to the next chunk
+        if self._depth >= 1:
+            if self._state == "value":
+                self._value_parts.append(chunk[mark:])
+            elif self._state == "key" and self._in_string and self._depth == 1:
+                self._key_parts.append(chunk[mark:])
+        return done
+
+    def _finish_value(self) -> bool:
+        raw = "".join(self._value_parts).strip()
+        self._value_parts = []
+        try:
+            self.fields[self._key] = json.loads(raw)
+        except ValueError:
+            # Not strict JSON (e.g. a trailing comma); leave it to the full-text fallback parse
+            self.failed = True
+            return False
+        return True
+
+class ConverseStreamDecoder:
+    """Decodes Agent Builder converse output, SSE or a buffered JSON body.
+
+    feed_line() takes raw SSE lines and returns the events they complete:
+    {"type": "conversation", "conversation_id"}, {"type": "delta", "text"} and
+    {"type": "field", "name", "value"} for each finished top-level field of the answer.
+    """
+
+    def __init__(self, conversation_id: Optional[str] = None) -> None:
+        self.conversation_id = conversation_id
+        self._parts: List[str] = []
+        self._text: Optional[str] = ""
+        self._event: Optional[str] = None
+        self._data: List[str] = []
+        self.json = JSONFieldScanner()
+        self.events = 0
+        # message_complete repeats the full text; only used when no chunks were streamed
+        self._streamed = False
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self._parts)
+        return self._text
+
+    @property
+    def fields(self) -> Dict[str, Any]:
+        return self.json.fields
+
+    def feed_line(self, line: str) -> List[Dict[str, Any]]:
+        if not line:
+            # Blank line ends an event
+            return self._flush()
+        if line.startswith(":") or line.startswith("id:") or line.startswith("retry:"):
+            return []
+        if line.startswith("event:"):
+            out = self._flush() if self._data else []
+            self._event = line[6:].strip()
+            return out
+        if line.startswith("data:"):
+            self._data.append(line[5:].lstrip())
+            return []
+        # Some proxies strip the SSE framing and send bare JSON lines
+        self._data.append(line)
+        return self._flush()
+
+    def finish(self) -> List[Dict[str, Any]]:
+        return self._flush()
+
+    def feed_json(self, body: Any) -> List[Dict[str, Any]]:
+        """A non-streaming converse response: {"conversation_id", "response": {"message"}}."""
+        out: List[Dict[str, Any]] = []
+        if not isinstance(body, dict):
+            return self._generic(body)
+        conv = body.get("conversation_id")
+        response = body.get("response")
+        message = response.get("message") if isinstance(response, dict) else None
+        if conv is None and message is None:
+            return self._generic(body)
+        if conv:
+            out.extend(self._conversation(conv))
+        if isinstance(message, str):
+            out.extend(self._delta(message))
+        return out
+
+    def _flush(self) -> List[Dict[str, Any]]:
+        event, raw = self._event, "\n".join(self._data)
+        self._event, self._data = None, []
+        if not raw:
+            return []
+        self.events += 1
+        try:
+            payload = json.loads(raw)
+        except ValueError as e:
+            logger.debug(f"Failed to parse stream event as JSON: {e}")
+            return []
+        return self._dispatch(event, payload)
+
+    def _dispatch(self, event: Optional[str], payload: Any) -> List[Dict[str, Any]]:
+        data = _payload(payload)
+        if event == "message_chunk":
+            return self._delta(data.get("text_chunk"))
+        if event in ("conversation_id_set", "conversation_created", "conversation_updated"):
+            return self._conversation(data.get("conversation_id"))
+        if event == "message_complete":
+            return [] if self._streamed else self._delta(data.get("message_content"))
+        if event == "round_complete":
+            if self._streamed:
+                return []
+            return self._delta(((data.get("round") or {}).get("response") or {}).get("message"))
+        if event in _IGNORED_EVENTS:
+            return []
+        return self._generic(payload)
+
+    def _generic(self, payload: Any) -> List[Dict[str, Any]]:
+        # Unknown event shape: search it (the original, format-agnostic behaviour)
+        out: List[Dict[str, Any]] = []
+        new_conv_id = _find_key_recursive(payload, ["conversation_id", "conversationId"])
+        if new_conv_id:
+            out.extend(self._conversation(new_conv_id))
+        out.extend(self._delta(_find_key_recursive(payload, ["text_chunk", "text", "content", "message"])))
+        return out
+
+    def _conversation(self, conversation_id: Any) -> List[Dict[str, Any]]:
+        if not conversation_id or not isinstance(conversation_id, str):
+            return []
+        self.conversation_id = conversation_id
+        return [{"type": "conversation", "conversation_id": conversation_id}]
+
+    def _delta(self, chunk: Any) -> List[Dict[str, Any]]:
+        if not chunk or not isinstance(chunk, str):
+            return []
+        self._streamed = True
+        self._parts.append(chunk)
+        self._text = None
+        out: List[Dict[str, Any]] = [{"type": "delta", "text": chunk}]
+        for name in self.json.feed(chunk):
+            out.append({"type": "field", "name": name, "value": self.json.fields[name]})
+        return out
@@ -1,20 +1,58 @@
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager
+import json
 import os
 import requests
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional, List
-import httpx
+from typing import Any, AsyncIterator, Dict, Literal, Optional, List, Tuple
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 import fastapi
 import uuid
 
-from aurora_kernel.corpus_loader import load_corpus
-from aurora_kernel.elastic_store import make_es_client, index_corpus, search as es_search
+from aurora_kernel.elastic_store import (
+    async_client_available,
+    async_hybrid_search,
+    async_msearch,
+    async_search,
+    es_client_options,
+    hybrid_search,
+    make_async_es_client,
+    make_es_client,
+    msearch,
+    pool_stats,
+    search as es_search,
+)
+from aurora_kernel import elastic_store, local_store
+from aurora_kernel.agent_cache import AGENT_CACHE, agent_cache_key
+from aurora_kernel.agent_stream import ConverseStreamDecoder
+from aurora_kernel.context_packer import CONTEXT_BUDGET_TOKENS, pack_context
+from aurora_kernel.controls_index import CONTROLS_INDEX
+from aurora_kernel.embeddings import HYBRID_DEFAULT
+from aurora_kernel.jobs import JOBS_DIR, IngestJobManager
+from aurora_kernel.keepwarm import KEEPWARM, KEEPWARM_ENABLED, KEEPWARM_PROMPT
+from aurora_kernel.kibana_http import KIBANA_HTTP
+from aurora_kernel.packs import (
+    DETERMINISTIC_PACK_SIZE,
+    SOURCE_FILTER,
+    agent_attachments,
+    assemble_deterministic_pack,
+    merge_agent_result,
+    pack_view,
+    retrieval_size,
+    take_hits,
+)
+from aurora_kernel.pack_upgrades import AGENT_DEADLINE_MS, PACK_UPGRADES
+from aurora_kernel.resilience import AGENT_GUARD
+from aurora_kernel.search_cache import SEARCH_CACHE
+from aurora_kernel.watch import awatch_corpus
 # from fastapi import HTTPException  <-- removed redundant line
 
 import time
@@ -26,7 +64,51 @@ logger = logging.getLogger("aurora_kernel")
 
 load_dotenv()
 
-app = FastAPI(title="Aurora Kernel Hackathon API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if _use_local():
+        app.state.store = _local_store()
+    else:
+        # One pooled Elasticsearch client for the whole process (sync for threads, async for handlers)
+        app.state.es = _client()
+        app.state.es_async = _async_client()
+    # Kibana (Agent Builder) keep-alive pool, shared by all agent calls
+    agent_configured = get_agent_builder_config() is not None
+    if agent_configured:
+        app.state.kibana = KIBANA_HTTP.client()
+    # Optional: ping Agent Builder while idle so the first request after a quiet spell is not cold
+    keepwarm_task = None
+    keepwarm_stop = asyncio.Event()
+    if KEEPWARM_ENABLED and agent_configured:
+        KEEPWARM.ping = _keepwarm_ping
+        keepwarm_task = asyncio.create_task(KEEPWARM.run(keepwarm_stop))
+    # control_id -> chunks/docs, scanned once here and then kept current by ingests
+    CONTROLS_INDEX.loader = _load_controls
+    if CONTROLS_PRELOAD:
+        CONTROLS_INDEX.load_in_background(_index_name())
+    # Optional: push corpus edits into the index as they happen
+    watch_task = None
+    watch_stop = asyncio.Event()
+    if os.getenv("AURORA_WATCH_CORPUS", "false").lower() == "true":
+        logger.info(f"Watching corpus {_corpus_path()} -> {_index_name()}")
+        watch_task = asyncio.create_task(
+            awatch_corpus(_store(), _index_name(), _corpus_path(), stop_event=watch_stop, index_fn=_store_backend().index_corpus)
+        )
+    yield
+    if keepwarm_task:
+        keepwarm_stop.set()
+        await asyncio.gather(keepwarm_task, return_exceptions=True)
+    if watch_task:
+        watch_stop.set()
+        await asyncio.gather(watch_task, return_exceptions=True)
+    # Waits for the running job to stop; off the event loop
+    await asyncio.to_thread(INGEST_JOBS.shutdown)
+    await PACK_UPGRADES.aclose()
+    await KIBANA_HTTP.aclose()
+    await _aclose_client()
+    _close_client()
+
+app = FastAPI(title="Aurora Kernel Hackathon API", version="0.1.0", lifespan=lifespan)
 
 # Configure CORS to allow Aurora Studio frontend
 app.add_middleware(
@@ -52,13 +134,160 @@ async def add_process_time_header(request: fastapi.Request, call_next):
     return response
 
 # --- Config ---
-def _client():
+_ES_CLIENT = None
+_ES_CLIENT_LOCK = threading.Lock()
+
+_ES_ASYNC_CLIENT = None
+_ES_ASYNC_DISABLED = False
+
+# "elastic" (default) or "local": the embedded index in AURORA_LOCAL_INDEX_DIR, no cluster needed
+SEARCH_BACKEND = os.getenv("AURORA_SEARCH_BACKEND", "elastic").lower()
+_LOCAL_STORE = None
+
+def _es_config() -> Dict[str, Any]:
     cloud_id = os.getenv("ELASTIC_CLOUD_ID")
-    es_url = os.getenv("ES_URL", "http://localhost:9200")
-    api_key = os.getenv("ES_API_KEY")
-    username = os.getenv("ES_USERNAME")
-    password = os.getenv("ES_PASSWORD")
-    return make_es_client(cloud_id=cloud_id, es_url=es_url, api_key=api_key, username=username, password=password)
+    return dict(
+        cloud_id=cloud_id,
+        es_url=os.getenv("ES_URL", "http://localhost:9200"),
+        api_key=os.getenv("ES_API_KEY"),
+        username=os.getenv("ES_USERNAME"),
+        password=os.getenv("ES_PASSWORD"),
+        **es_client_options(cloud=bool(cloud_id)),
+    )
+
+def _client():
+    """Process-wide Elasticsearch client; created once (normally in lifespan) and reused."""
+    global _ES_CLIENT
+    if _ES_CLIENT is None:
+        with _ES_CLIENT_LOCK:
+            if _ES_CLIENT is None:
+                _ES_CLIENT = make_es_client(**_es_config())
+    return _ES_CLIENT
+
+def _async_client():
+    """Process-wide AsyncElasticsearch client for async handlers, or None if unavailable
+    (e.g. aiohttp not installed); callers then fall back to the sync client in a thread.
+    """
+    global _ES_ASYNC_CLIENT, _ES_ASYNC_DISABLED
+    if _ES_ASYNC_CLIENT is None and not _ES_ASYNC_DISABLED:
+        try:
+            _ES_ASYNC_CLIENT = make_async_es_client(**_es_config())
+        except Exception as e:
+            logger.warning(f"Async Elasticsearch client unavailable, using sync client in threads: {e}")
+            _ES_ASYNC_DISABLED = True
+    return _ES_ASYNC_CLIENT
+
+def _new_async_client():
+    """A fresh AsyncElasticsearch client for an ingest job's own event loop, or None (no
+    aiohttp; the job then uses the sync client)."""
+    if not async_client_available():
+        return None
+    return make_async_es_client(**_es_config())
+
+async def _aclose_client() -> None:
+    global _ES_ASYNC_CLIENT
+    if _ES_ASYNC_CLIENT is not None:
+        await _ES_ASYNC_CLIENT.close()
+        _ES_ASYNC_CLIENT = None
+
+def _use_local() -> bool:
+    return SEARCH_BACKEND == "local"
+
+def _local_store():
+    global _LOCAL_STORE
+    if _LOCAL_STORE is None:
+        with _ES_CLIENT_LOCK:
+            if _LOCAL_STORE is None:
+                _LOCAL_STORE = local_store.make_local_store(os.getenv("AURORA_LOCAL_INDEX_DIR"))
+    return _LOCAL_STORE
+
+def _store():
+    """Client for the configured backend (an Elasticsearch client or a LocalStore)."""
+    return _local_store() if _use_local() else _client()
+
+def _store_backend():
+    """Module implementing ensure_index/index_corpus/search/... for _store()."""
+    return local_store if _use_local() else elastic_store
+
+# Response view for search hits and packs: full (default, Studio format), compact, ids
+View = Literal["full", "compact", "ids"]
+
+async def _search(index: str, q: str, filters: Optional[Dict[str, Any]] = None, size: int = 5, view: str = "full", hybrid: bool = False) -> Dict[str, Any]:
+    """Non-blocking, cached retrieval for async endpoints. hybrid fuses BM25 with kNN."""
+    cached = SEARCH_CACHE.get(index, q, filters, size, view, hybrid)
+    if cached is not None:
+        return cached
+    gen = SEARCH_CACHE.generation(index)
+    if _use_local():
+        fn = local_store.async_hybrid_search if hybrid else local_store.async_search
+        results = await fn(_local_store(), index=index, q=q, filters=filters, size=size, view=view)
+    else:
+        ac = _async_client()
+        if ac is not None:
+            fn = async_hybrid_search if hybrid else async_search
+            results = await fn(ac, index=index, q=q, filters=filters, size=size, view=view)
+        else:
+            fn = hybrid_search if hybrid else es_search
+            results = await asyncio.to_thread(fn, _client(), index=index, q=q, filters=filters, size=size, view=view)
+    SEARCH_CACHE.put(index, q, filters, size, results, generation=gen, view=view, hybrid=hybrid)
+    return results
+
+def _search_sync(index: str, q: str, filters: Optional[Dict[str, Any]] = None, size: int = 5) -> Dict[str, Any]:
+    """Cached retrieval for sync endpoints (run by FastAPI in its threadpool)."""
+    cached = SEARCH_CACHE.get(index, q, filters, size)
+    if cached is not None:
+        return cached
+    gen = SEARCH_CACHE.generation(index)
+    results = _store_backend().search(_store(), index=index, q=q, filters=filters, size=size)
+    SEARCH_CACHE.put(index, q, filters, size, results, generation=gen)
+    return results
+
+async def _search_many(index: str, specs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Cached batch retrieval: every cache miss goes out in a single _msearch."""
+    out: List[Optional[Dict[str, Any]]] = []
+    misses: List[int] = []
+    for i, spec in enumerate(specs):
+        cached = SEARCH_CACHE.get(spec.get("index") or index, spec["q"], spec.get("filters"), spec["size"], spec.get("view", "full"))
+        out.append(cached)
+        if cached is None:
+            misses.append(i)
+    if misses:
+        todo = [specs[i] for i in misses]
+        gens = [SEARCH_CACHE.generation(s.get("index") or index) for s in todo]
+        if _use_local():
+            fetched = await local_store.async_msearch(_local_store(), index, todo)
+        else:
+            ac = _async_client()
+            if ac is not None:
+                fetched = await async_msearch(ac, index, todo)
+            else:
+                fetched = await asyncio.to_thread(msearch, _client(), index, todo)
+        for i, spec, gen, res in zip(misses, todo, gens, fetched):
+            out[i] = res
+            if "error" not in res:
+                SEARCH_CACHE.put(spec.get("index") or index, spec["q"], spec.get("filters"), spec["size"], res, generation=gen, view=spec.get("view", "full"))
+    return out
+
+# Scan the default index into CONTROLS_INDEX at startup (otherwise on first use)
+CONTROLS_PRELOAD = os.getenv("AURORA_CONTROLS_PRELOAD", "true").lower() == "true"
+
+def _load_controls(index: str):
+    # P1: only sources back a control; compact view has every field the index needs
+    return _store_backend().iter_search(_store(), index, None, dict(SOURCE_FILTER), "compact")
+
+def _close_client() -> None:
+    global _ES_CLIENT
+    if _ES_CLIENT is not None:
+        _ES_CLIENT.close()
+        _ES_CLIENT = None
+
+# Background ingest jobs (see POST /ingest)
+INGEST_JOBS = IngestJobManager(
+    lambda: _store(),
+    backend=_store_backend(),
+    async_client_factory=None if _use_local() else lambda: _new_async_client(),
+    state_dir=Path(JOBS_DIR) if JOBS_DIR else None,
+)
 
 def _index_name() -> str:
     return os.getenv("AURORA_INDEX", "aurora_kb_v1")
@@ -101,28 +330,16 @@ def kibana_api_base(cfg: AgentBuilderConfig) -> str:
         return f"{cfg.kibana_url}/s/{cfg.space_id}"
     return cfg.kibana_url
 
-def _find_key_recursive(obj: Any, key_names: List[str]) -> Any:
-    """Search recursively for a key in a nested dict/list structure."""
-    if isinstance(obj, dict):
-        for k in key_names:
-            if k in obj: return obj[k]
-        for v in obj.values():
-            res = _find_key_recursive(v, key_names)
-            if res: return res
-    elif isinstance(obj, list):
-        for v in obj:
-            res = _find_key_recursive(v, key_names)
-            if res: return res
-    return None
-
-
-async def _call_agent_builder_converse(
+async def _converse_stream(
     cfg: AgentBuilderConfig,
     user_input: str,
     attachments: List[Dict],
-    conversation_id: Optional[str] = None,
-) -> Dict:
-    """Send a request to the Elastic Agent Builder and return structured output."""
+    decoder: ConverseStreamDecoder,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Call Agent Builder converse and yield decoder events as they arrive ("delta",
+    "conversation", "field"; see agent_stream). decoder keeps the accumulated answer.
+    """
+    conversation_id = decoder.conversation_id
     
     # Build context string from attachments
     context_sections = []
@@ -168,14 +385,14 @@ async def _call_agent_builder_converse(
 
     print(f"DEBUG: Sending to Agent Builder: {payload.keys()}")
 
-    full_response_text = ""
-    last_conversation_id = conversation_id
-
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        request_kwargs = {"headers": headers, "json": payload}
-        if auth:
-            request_kwargs["auth"] = auth
+    # Shared pooled client (see kibana_http): connections stay open between agent calls
+    client = KIBANA_HTTP.client()
+    request_kwargs = {"headers": headers, "json": payload}
+    if auth:
+        request_kwargs["auth"] = auth
 
+    # Breaker + concurrency limit: refuses at once (CircuitOpen / AgentOverloaded) when Kibana is failing or saturated
+    async with AGENT_GUARD.call() as call:
         async with client.stream("POST", url, **request_kwargs) as response:
             if response.status_code != 200:
                 body = await response.aread()
@@ -184,64 +401,38 @@ async def _call_agent_builder_converse(
 
             content_type = response.headers.get("content-type", "")
             is_sse = "text/event-stream" in content_type
-            
+        
             if not is_sse and "application/json" in content_type:
                 # JSON Mode (non-streaming or buffered by proxy)
+                call.buffered()
                 body_bytes = await response.aread()
                 try:
-                    import json
                     event = json.loads(body_bytes)
-                    
-                    chunk = _find_key_recursive(event, ["text_chunk", "text", "content", "message"])
-                    new_conv_id = _find_key_recursive(event, ["conversation_id", "conversationId"])
-
-                    if chunk and isinstance(chunk, str):
-                        full_response_text += chunk
-                    if new_conv_id:
-                        last_conversation_id = new_conv_id
                 except Exception as e:
                     logger.error(f"Failed to parse JSON response body: {e}")
+                else:
+                    for ev in decoder.feed_json(event):
+                        yield ev
             else:
                 # SSE Mode (streaming)
                 async for line in response.aiter_lines():
-                    if not line or line.startswith(":"):
-                        continue
-                    
-                    if line.startswith("event:"):
-                        continue
-
-                    # SSE lines start with "data: "
-                    clean_line = line
-                    if line.startswith("data:"):
-                        clean_line = line[5:].strip()
-                    
-                    if not clean_line:
-                        continue
-
-                    try:
-                        import json
-                        event = json.loads(clean_line)
-                        
-                        chunk = _find_key_recursive(event, ["text_chunk", "text", "content", "message"])
-                        new_conv_id = _find_key_recursive(event, ["conversation_id", "conversationId"])
-
-                        if chunk and isinstance(chunk, str):
-                            full_response_text += chunk
-                        
-                        if new_conv_id:
-                            last_conversation_id = new_conv_id
-
-                    except Exception as e:
-                        logger.debug(f"Failed to parse stream line as JSON: {e}")
-    logger.info(f"Stream complete. Full text length: {len(full_response_text)}")
-    
-    # Parse the LLM JSON output
-    ai_output = _parse_llm_json(full_response_text)
+                    if line:
+                        # The first event, not the headers, shows the agent is answering
+                        call.first_byte()
+                    for ev in decoder.feed_line(line):
+                        yield ev
+                for ev in decoder.finish():
+                    yield ev
+
+def _agent_result(decoder: ConverseStreamDecoder) -> Dict[str, Any]:
+    full_response_text = decoder.text
+    # The LLM JSON output: fields decoded while streaming, else a fallback parse of the text
+    ai_output = decoder.fields if decoder.json.complete and not decoder.json.failed and decoder.fields else _parse_llm_json(full_response_text)
     
     # Return structured dict compatible with our evidence pack
     return {
         "text": full_response_text,
-        "conversationId": last_conversation_id,
+        "conversationId": decoder.conversation_id,
         "summary": ai_output.get("summary", ""),
         "findings": ai_output.get("claims", []) or ai_output.get("findings", []),
         "recommendations": ai_output.get("recommendations", []),
@@ -250,6 +441,19 @@ async def _call_agent_builder_converse(
         **ai_output
     }
 
+async def _call_agent_builder_converse(
+    cfg: AgentBuilderConfig,
+    user_input: str,
+    attachments: List[Dict],
+    conversation_id: Optional[str] = None,
+) -> Dict:
+    """Send a request to the Elastic Agent Builder and return structured output."""
+    decoder = ConverseStreamDecoder(conversation_id)
+    async for _ev in _converse_stream(cfg, user_input, attachments, decoder):
+        pass
+    logger.info(f"Stream complete. Full text length: {len(decoder.text)}")
+    return _agent_result(decoder)
+
 # --- Storage for downloads ---
 PACK_STORAGE = {}
 
@@ -283,44 +487,221 @@ def download_md(pack_id: str):
          
     return fastapi.responses.PlainTextResponse(md)
 
+async def _keepwarm_ping() -> None:
+    await _call_agent_builder_converse(
+        cfg=_require_agent_config(),
+        user_input=KEEPWARM_PROMPT,
+        attachments=[],
+        conversation_id=None,
+    )
+
 @app.get("/agent/status")
 def agent_status():
     cfg = get_agent_builder_config()
-    return {"configured": bool(cfg)}
+    return {"configured": bool(cfg), "http": KIBANA_HTTP.stats(), "cache": AGENT_CACHE.stats(), **AGENT_GUARD.stats(), "upgrades": PACK_UPGRADES.stats(), "keepwarm": KEEPWARM.stats()}
 
 @app.get("/health")
 def health() -> Dict[str, Any]:
-    return {"status": "ok", "version": "v1.3-debug", "index": _index_name(), "corpus_path": str(_corpus_path())}
+    out = {"status": "ok", "version": "v1.3-debug", "index": _index_name(), "corpus_path": str(_corpus_path()), "backend": SEARCH_BACKEND}
+    if _ES_CLIENT is not None:
+        out["es_pool"] = pool_stats(_ES_CLIENT)
+    out["search_cache"] = SEARCH_CACHE.stats()
+    out["controls_index"] = CONTROLS_INDEX.stats()
+    return out
 
 
 class IngestRequest(BaseModel):
     corpus_path: Optional[str] = None
     index: Optional[str] = None
+    # Only re-index files whose content changed since the last incremental ingest
+    incremental: bool = False
+    # Build a new versioned index and atomically move the `index` alias to it
+    rebuild: bool = False
 
-@app.post("/ingest")
+@app.post("/ingest", status_code=202)
 def ingest(req: IngestRequest) -> Dict[str, Any]:
+    """Queue a corpus ingest and return its job id; poll GET /ingest/{job_id} for progress."""
     corpus = Path(req.corpus_path).resolve() if req.corpus_path else _corpus_path()
     index = req.index or _index_name()
 
-    docs = load_corpus(corpus)
-    c = _client()
-    resp = index_corpus(c, index=index, docs=docs)
-    return {"corpus": str(corpus), "index": index, **resp}
+    job = INGEST_JOBS.submit(corpus, index, incremental=req.incremental, rebuild=req.rebuild)
+    return job.snapshot()
+
+@app.get("/ingest")
+def ingest_jobs() -> Dict[str, Any]:
+    return {"jobs": [j.snapshot() for j in INGEST_JOBS.list_jobs()]}
+
+@app.get("/ingest/{job_id}")
+def ingest_status(job_id: str) -> Dict[str, Any]:
+    job = INGEST_JOBS.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job.snapshot()
+
+@app.delete("/ingest/{job_id}")
+def ingest_cancel(job_id: str) -> Dict[str, Any]:
+    job = INGEST_JOBS.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job.snapshot()
+
+@app.post("/index/rollback")
+def index_rollback(index: Optional[str] = Query(None, description="Alias to roll back")) -> Dict[str, Any]:
+    """Point the alias back at the previous versioned index after a bad rebuild."""
+    try:
+        return _store_backend().rollback_alias(_store(), index or _index_name())
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 @app.get("/search")
-def search(
+async def search(
     q: str = Query(..., description="Search query"),
     index: Optional[str] = Query(None, description="Override index name"),
     doc_type: Optional[str] = None,
     stakeholder: Optional[str] = None,
     jurisdiction: Optional[str] = None,
     size: int = 5,
+    view: View = Query("full", description="full | compact (no chunk text) | ids"),
+    hybrid: Optional[bool] = Query(None, description="Fuse BM25 with kNN over embeddings (default: AURORA_HYBRID)"),
 ) -> Dict[str, Any]:
     idx = index or _index_name()
     # P1: Filter implicitly for actual sources to prevent citing expected outputs
     filters = {"doc_type": doc_type or "source", "stakeholder": stakeholder, "jurisdiction": jurisdiction}
-    c = _client()
-    return es_search(c, index=idx, q=q, filters=filters, size=size)
+    return await _search(idx, q, filters, size, view, HYBRID_DEFAULT if hybrid is None else hybrid)
+
+async def _export_hits(index: str, q: Optional[str], filters: Dict[str, Any], view: str) -> AsyncIterator[Dict[str, Any]]:
+    if _use_local():
+        # Scoring and reading sources is CPU work; pull hits in a thread like the sync ES path
+        hits = local_store.iter_search(_local_store(), index, q, filters, view)
+    else:
+        ac = _async_client()
+        if ac is not None:
+            pages = elastic_store.aiter_search(ac, index, q, filters, view)
+            try:
+                async for hit in pages:
+                    yield hit
+            finally:
+                # Closes the point-in-time now, also when the client went away mid-export
+                await pages.aclose()
+            return
+        hits = elastic_store.iter_search(_client(), index, q, filters, view)
+    fetch: Optional[asyncio.Future] = None
+    try:
+        while True:
+            # Shielded: a cancel must not leave the generator running in its thread unseen
+            fetch = asyncio.ensure_future(asyncio.to_thread(next, hits, None))
+            hit = await asyncio.shield(fetch)
+            if hit is None:
+                break
+            yield hit
+    finally:
+        if fetch is not None and not fetch.done():
+            await asyncio.wait([fetch])
+        # close_point_in_time is a blocking round trip; keep it off the event loop
+        await asyncio.to_thread(hits.close)
+
+@app.get("/search/export")
+async def search_export(
+    q: Optional[str] = Query(None, description="Search query; omit to export every chunk matching the filters"),
+    index: Optional[str] = Query(None, description="Override index name"),
+    doc_type: Optional[str] = None,
+    stakeholder: Optional[str] = None,
+    jurisdiction: Optional[str] = None,
+    control_id: Optional[List[str]] = Query(None, description="Only chunks citing any of these controls"),
+    view: View = Query("full", description="full | compact (no chunk text) | ids"),
+) -> StreamingResponse:
+    """All matching hits as NDJSON (one /search hit per line, no highlights), streamed page
+    by page from a point-in-time so memory stays flat however many hits match. Not cached.
+    """
+    idx = index or _index_name()
+    # P1: same implicit source filter as /search
+    filters = {"doc_type": doc_type or "source", "stakeholder": stakeholder, "jurisdiction": jurisdiction, "control_ids": control_id or None}
+
+    async def lines() -> AsyncIterator[str]:
+        n = 0
+        hits = _export_hits(idx, q, filters, view)
+        try:
+            async for hit in hits:
+                n += 1
+                yield json.dumps(hit, default=str) + "\n"
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated stream
+            logger.error(f"Export from {idx} failed after {n} hits: {e}")
+            raise
+        finally:
+            # Not left to garbage collection when the client disconnects
+            await hits.aclose()
+        logger.info(f"Exported {n} hits from {idx}")
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def _controls_lookup(fn, *args):
+    try:
+        return fn(*args)
+    except Exception as e:
+        logger.warning(f"Controls index unavailable: {e}")
+        raise HTTPException(status_code=503, detail=f"Controls index unavailable: {e}")
+
+@app.get("/controls")
+async def controls(
+    ids: Optional[List[str]] = Query(None, description="Control ids (repeat or comma-separate); omit to list every control"),
+    index: Optional[str] = Query(None, description="Override index name"),
+) -> Dict[str, Any]:
+    """Chunks and documents backing each control, served from memory.
+    Without ids: every known control with its chunk/doc counts.
+    """
+    idx = index or _index_name()
+    wanted = [c.strip() for raw in ids or [] for c in raw.split(",") if c.strip()]
+    if not wanted:
+        return {"index": idx, "controls": await asyncio.to_thread(_controls_lookup, CONTROLS_INDEX.summary, idx)}
+    return {"index": idx, "controls": await asyncio.to_thread(_controls_lookup, CONTROLS_INDEX.lookup, idx, wanted)}
+
+@app.get("/controls/{control_id}")
+async def control(control_id: str, index: Optional[str] = Query(None, description="Override index name")) -> Dict[str, Any]:
+    idx = index or _index_name()
+    cov = (await asyncio.to_thread(_controls_lookup, CONTROLS_INDEX.lookup, idx, [control_id]))[control_id]
+    if not cov["chunks"]:
+        raise HTTPException(status_code=404, detail=f"No source chunks cite control '{control_id}'")
+    return {"index": idx, "control_id": control_id, **cov}
+
+# Upper bound on queries per batch request
+BATCH_MAX_QUERIES = int(os.getenv("AURORA_BATCH_MAX_QUERIES", "100"))
+
+class SearchQuery(BaseModel):
+    q: str
+    index: Optional[str] = None
+    doc_type: Optional[str] = None
+    stakeholder: Optional[str] = None
+    jurisdiction: Optional[str] = None
+    size: int = 5
+    view: View = "full"
+
+class SearchBatchRequest(BaseModel):
+    queries: List[SearchQuery]
+    index: Optional[str] = None
+
+def _check_batch(n: int) -> None:
+    if n > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=422, detail=f"Too many queries: {n} > {BATCH_MAX_QUERIES}")
+
+@app.post("/search/batch")
+async def search_batch(body: SearchBatchRequest) -> Dict[str, Any]:
+    """Many /search queries in one Elasticsearch round trip; results keep request order.
+    A failing query gets an "error" object instead of hits and does not fail the batch.
+    """
+    _check_batch(len(body.queries))
+    specs = [
+        {
+            "q": sq.q,
+            "index": sq.index,
+            # P1: same implicit source filter as /search
+            "filters": {"doc_type": sq.doc_type or "source", "stakeholder": sq.stakeholder, "jurisdiction": sq.jurisdiction},
+            "size": sq.size,
+            "view": sq.view,
+        }
+        for sq in body.queries
+    ]
+    return {"results": await _search_many(body.index or _index_name(), specs)}
 
 class EvidencePackRequest(BaseModel):
     question: str
@@ -329,41 +710,21 @@ class EvidencePackRequest(BaseModel):
     index: Optional[str] = None
 
 
-def _build_deterministic_pack(question: str, scenario_id: Optional[str], preset_id: Optional[str], index: str = None) -> Dict[str, Any]:
-    idx = index or _index_name()
-    c = _client()
-    idx = index or _index_name()
-    c = _client()
-    # P1: Enforce doc_type='source'
-    results = es_search(c, index=idx, q=question, filters={"doc_type": "source"}, size=8)
-
-    controls = set()
-    citations = []
-    for h in results["hits"]:
-        for cid in (h.get("control_ids") or []):
-            controls.add(cid)
-        citations.append({
-            "doc_id": h.get("doc_id"),
-            "doc_type": h.get("doc_type"),
-            "source_path": h.get("source_path"),
-            "chunk": h.get("content") or h.get("chunk_id"),
-            "content": h.get("content"),
-            "score": h.get("score")
-        })
+def _build_deterministic_pack(question: str, scenario_id: Optional[str], preset_id: Optional[str], index: str = None, results: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Deterministic pack; searches only when no prefetched results are passed."""
+    index = index or _index_name()
+    if results is None:
+        results = _search_sync(index, question, dict(SOURCE_FILTER), DETERMINISTIC_PACK_SIZE)
+    return assemble_deterministic_pack(question, scenario_id, preset_id, results, coverage=_control_coverage(index))
 
-    return {
-        "schema_version": "0.1.0",
-        "scenario_id": scenario_id,
-        "preset_id": preset_id,
-        "summary": "This is a deterministic placeholder summary. Use Agent Mode for AI summary.",
-        "findings": ["Finding 1: Evidence found.", "Finding 2: Review controls."],
-        "claim": question,
-        "controls_mapped": sorted(list(controls)),
-        "evidence": citations,
-        "gaps": ["No Agent Analysis performed."],
-        "fix_plan": ["Enable Agent Mode to generate fix plan."],
-        "raw_search": results,
-    }
+def _control_coverage(index: str):
+    """Pack hook: every chunk/doc backing the mapped controls, from the in-memory controls index."""
+    return lambda control_ids: CONTROLS_INDEX.coverage(index, control_ids)
+
+async def _retrieve_pack_hits(query_text: str, top_k: Optional[int], index: Optional[str] = None, hybrid: Optional[bool] = None) -> Dict[str, Any]:
+    """The single retrieval behind an agent pack: enough hits for the agent context and the deterministic pack."""
+    hybrid = HYBRID_DEFAULT if hybrid is None else hybrid
+    return await _search(index or _index_name(), query_text, dict(SOURCE_FILTER), retrieval_size(top_k), hybrid=hybrid)
 
 @app.get("/evidence_pack")
 def evidence_pack_get(
@@ -371,8 +732,9 @@ def evidence_pack_get(
     preset_id: Optional[str] = Query(None),
     scenario_id: Optional[str] = Query(None),
     index: Optional[str] = Query(None),
+    view: View = Query("full", description="full | compact (chunks listed once) | ids"),
 ):
-    return _build_deterministic_pack(question, scenario_id, preset_id, index)
+    return pack_view(_build_deterministic_pack(question, scenario_id, preset_id, index), view)
 
 class EvidencePackCompat(BaseModel):
     # preferred (query-style)
@@ -384,20 +746,55 @@ class EvidencePackCompat(BaseModel):
     role: str | None = None
     scenario: str | None = None
     extra: str | None = None
+    view: View = "full"
+
+def _compat_params(body: EvidencePackCompat) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    return body.question or body.extra, body.preset_id or body.role, body.scenario_id or body.scenario
+
+_COMPAT_PARAMS_ERROR = "Missing params. Provide (question,preset_id,scenario_id) or legacy (role,scenario,extra)."
 
 @app.post("/evidence_pack")
 def evidence_pack_post(body: EvidencePackCompat):
-    q = body.question or body.extra
-    preset = body.preset_id or body.role
-    scenario = body.scenario_id or body.scenario
+    q, preset, scenario = _compat_params(body)
     idx = body.index
     
     if not (q and preset and scenario):
         raise HTTPException(
             status_code=422,
-            detail="Missing params. Provide (question,preset_id,scenario_id) or legacy (role,scenario,extra).",
+            detail=_COMPAT_PARAMS_ERROR,
         )
-    return _build_deterministic_pack(q, scenario, preset, idx)
+    return pack_view(_build_deterministic_pack(q, scenario, preset, idx), body.view)
+
+class EvidencePackBatchRequest(BaseModel):
+    packs: List[EvidencePackCompat]
+    index: Optional[str] = None
+
+@app.post("/evidence_pack/batch")
+async def evidence_pack_batch(body: EvidencePackBatchRequest) -> Dict[str, Any]:
+    """Deterministic packs for many questions, retrieved with a single _msearch.
+    Invalid or failed items get {"error": ...} in their slot; the rest of the batch still succeeds.
+    """
+    _check_batch(len(body.packs))
+    out: List[Dict[str, Any]] = [{} for _ in body.packs]
+    valid: List[int] = []
+    specs: List[Dict[str, Any]] = []
+    for i, item in enumerate(body.packs):
+        q, preset, scenario = _compat_params(item)
+        if not (q and preset and scenario):
+            out[i] = {"error": {"status": 422, "reason": _COMPAT_PARAMS_ERROR}}
+            continue
+        valid.append(i)
+        specs.append({"q": q, "index": item.index, "filters": dict(SOURCE_FILTER), "size": DETERMINISTIC_PACK_SIZE})
+
+    results = await _search_many(body.index or _index_name(), specs)
+    for i, spec, res in zip(valid, specs, results):
+        if "error" in res:
+            out[i] = {"error": res["error"]}
+            continue
+        _q, preset, scenario = _compat_params(body.packs[i])
+        pack = assemble_deterministic_pack(spec["q"], scenario, preset, res, coverage=_control_coverage(spec.get("index") or body.index or _index_name()))
+        out[i] = pack_view(pack, body.packs[i].view)
+    return {"packs": out}
 
 class AgentEvidencePackRequest(BaseModel):
     role: str
@@ -405,6 +802,13 @@ class AgentEvidencePackRequest(BaseModel):
     extra: str | None = None
     conversation_id: str | None = None
     top_k: int | None = 6
+    view: View = "full"
+    # Hybrid BM25 + kNN retrieval (default: AURORA_HYBRID); usually allows a smaller top_k
+    hybrid: bool | None = None
+    # Agent context budget (default: AURORA_CONTEXT_BUDGET_TOKENS); 0 sends the top_k hits untrimmed
+    context_budget_tokens: int | None = None
+    # Return the deterministic pack if the agent takes longer (default: AURORA_AGENT_DEADLINE_MS; 0 = wait)
+    deadline_ms: int | None = Field(None, ge=0)
 
 def _parse_llm_json(text: str) -> Dict[str, Any]:
     """Extract JSON from LLM output, handling Markdown fences."""
@@ -431,21 +835,26 @@ def _parse_llm_json(text: str) -> Dict[str, Any]:
     except Exception:
         return {}
 
+def _agent_response(view: str, head: Dict[str, Any], final_pack: Dict[str, Any], deterministic: Dict[str, Any], query_text: str, hits: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """full: the Studio format (pack spread into the top level, plus nested deterministic
+    pack and retrieval hits). compact/ids: one normalized pack, no duplicated chunk text.
+    """
+    if view == "full":
+        return {**head, "deterministic": deterministic, "retrieval": {"query": query_text, "hits": hits}, **final_pack}
+    return {**head, **pack_view(final_pack, view, context_hits=hits)}
+
 @app.post("/agent/evidence_pack")
 async def agent_evidence_pack(req: AgentEvidencePackRequest):
     """Generate an Evidence Pack using Elastic Agent Builder."""
-    cfg = get_agent_builder_config()
-    if not cfg:
-        raise HTTPException(
-            detail="Agent Builder not configured. Set KIBANA_URL, KIBANA_API_KEY, AGENT_BUILDER_CONNECTOR_ID, AGENT_BUILDER_AGENT_ID.",
-        )
+    cfg = _require_agent_config()
+    query_text = _agent_query_text(req)
+    KEEPWARM.note_traffic()
 
     # --- DEMO MODE CHECK ---
     if os.getenv("DEMO_MODE", "false").lower() == "true":
         logger.info(f"🎭 DEMO MODE ACTIVE: Returning pre-recorded response for {req.role}")
         
         # Simulate network delay for realism
-        import asyncio
         await asyncio.sleep(2.5)
         
         pack_id = str(uuid.uuid4())
@@ -476,7 +885,8 @@ async def agent_evidence_pack(req: AgentEvidencePackRequest):
         }
         
         # Build the full pack structure
-        deterministic = _build_deterministic_pack(query_text, req.scenario, req.role)
+        results = await _retrieve_pack_hits(query_text, req.top_k, hybrid=req.hybrid)
+        deterministic = _build_deterministic_pack(query_text, req.scenario, req.role, results=results)
         final_pack = deterministic.copy()
         final_pack["mode"] = "agent_builder_demo"
         final_pack["schema_version"] = "0.1.0"
@@ -484,123 +894,245 @@ async def agent_evidence_pack(req: AgentEvidencePackRequest):
         
         PACK_STORAGE[pack_id] = final_pack
         
-        return {
+        head = {
             "ok": True,
             "mode": "agent_builder_demo",
             "pack_id": pack_id,
             "conversationId": conv_id,
             "agent": ai_output,
-            "deterministic": deterministic,
-            "retrieval": {"query": query_text, "hits": []},
-            **final_pack
         }
+        return _agent_response(req.view, head, final_pack, deterministic, query_text, [])
     # -----------------------
-    query_text = f"{req.role}: {req.scenario}\n{req.extra or ''}".strip()
-    
-    # Reuse es_search logic
-    c = _client()
-    idx = _index_name()
-    # P1: Filter doc_type='source'
-    results = es_search(c, index=idx, q=query_text, filters={"doc_type": "source"}, size=req.top_k or 6)
-    hits = results.get("hits", [])
-
-    # Convert into Agent Builder context blocks
-    context_items = []
-    for h in hits:
-        # es_search implementation:
-        # returns {"hits": [ { ...src fields..., "score": ... } ]}
-        
-        # We need to format it nicely
-        title = h.get("title", "Untitled")
-        content = h.get("content", "")
-        doc_id = h.get("doc_id", "unknown")
-        
-        context_items.append(
-            {
-                "type": "text",
-                "text": f"DOC {doc_id} | score={h.get('score')}\nTitle: {title}\nContent: {content}",
-            }
-        )
+    # 1) One retrieval; the agent context and the deterministic pack share these hits
+    results = await _retrieve_pack_hits(query_text, req.top_k, hybrid=req.hybrid)
+    hits, attachments, _context = _agent_context(req, results)
+    deterministic = _build_deterministic_pack(query_text, req.scenario, req.role, results=results)
 
-    # 2) Agent Builder prompt
-    agent_prompt = (
-        "You are Aurora, an AI compliance assistant.\n"
-        "Use ONLY the provided context docs to support claims.\n"
-        "Return a JSON object with keys: summary, claims (array of strings), recommendations (array of strings), citations (array of objects with doc_id and reason).\n"
-        "Each item in citations must reference the DOC ids used in the context.\n\n"
-        f"ROLE: {req.role}\nSCENARIO: {req.scenario}\nEXTRA: {req.extra or ''}\n"
-    )
+    # 2) Agent Builder prompt + packed context items as attachments
+    prompt = _agent_prompt(req)
 
-    try:
-        # Prepare context items as attachments dict for the new helper
-        attachments = []
-        for h in hits:
-            attachments.append({
-                "title": h.get("title", "Untitled"),
-                "doc_id": h.get("doc_id", "unknown"),
-                "content": h.get("content", "") or h.get("chunk_id", ""),
-                "score": h.get("score")
-            })
-
-        agent_result = await _call_agent_builder_converse(
+    async def converse() -> Dict[str, Any]:
+        return await _call_agent_builder_converse(
             cfg=cfg,
-            user_input=agent_prompt,
+            user_input=prompt,
             attachments=attachments,
             conversation_id=req.conversation_id,
         )
-        
+
+    async def run_agent() -> Tuple[Dict[str, Any], Optional[str]]:
+        # Same prompt + same context: reuse a cached or in-flight answer
+        key = _agent_cache_key(cfg, req, hits)
+        if key is None:
+            agent_result, cache_status = await converse(), None
+        else:
+            agent_result, cache_status = await AGENT_CACHE.get_or_call(key, _index_name(), converse)
+
         # Determine if we got a valid fallback or success
         if agent_result.get("mode") == "fallback":
              raise Exception(agent_result.get("error"))
+        return agent_result, cache_status
+
+    deadline_ms = req.deadline_ms if req.deadline_ms is not None else AGENT_DEADLINE_MS
+    try:
+        if not deadline_ms:
+            agent_result, cache_status = await run_agent()
+        else:
+            run = asyncio.ensure_future(run_agent())
+            try:
+                agent_result, cache_status = await asyncio.wait_for(asyncio.shield(run), deadline_ms / 1000)
+            except asyncio.TimeoutError:
+                # Answer now with the deterministic pack; the agent run upgrades it later
+                return _pending_response(req, deterministic, query_text, hits, run, deadline_ms)
+            except asyncio.CancelledError:
+                run.cancel()
+                raise
 
     except Exception as e:
          # Fallback on error (P0 requirement)
          print(f"ERROR: Agent Builder failed: {e}")
-         deterministic = _build_deterministic_pack(query_text, req.scenario, req.role)
-         pack_id = str(uuid.uuid4())
-         PACK_STORAGE[pack_id] = deterministic
-         return {
-             "ok": True,
-             "mode": "fallback",
-             "pack_id": pack_id,
-             "note": f"Agent unavailable: {str(e)}",
-             "agent": None,
-             "deterministic": deterministic,
-             "retrieval": {"query": query_text, "hits": hits},
-             # Spread deterministic content so it looks like a valid pack
-             **deterministic
-         }
+         return _fallback_response(req, deterministic, query_text, hits, e)
 
     # 3) Merge Agent Results
-    deterministic = _build_deterministic_pack(query_text, req.scenario, req.role)
-    
-    final_pack = deterministic.copy()
-    final_pack["mode"] = "agent_builder"
-    final_pack["agent_raw"] = agent_result
-    final_pack["schema_version"] = "0.1.0"
-    
-    # Update fields from agent result
-    if agent_result.get("summary"):
-        final_pack["summary"] = agent_result["summary"]
-    if agent_result.get("findings"):
-        final_pack["findings"] = agent_result["findings"]
-    if agent_result.get("citations"):
-        # Map citations to evidence format if possible, or append
-        final_pack["citations_ai"] = agent_result["citations"]
-        
+    return _agent_pack_response(req, deterministic, query_text, hits, agent_result, cache_status)
+
+def _require_agent_config() -> AgentBuilderConfig:
+    cfg = get_agent_builder_config()
+    if not cfg:
+        raise HTTPException(
+            status_code=503,
+            detail="Agent Builder not configured. Set KIBANA_URL, KIBANA_API_KEY, AGENT_BUILDER_CONNECTOR_ID, AGENT_BUILDER_AGENT_ID.",
+        )
+    return cfg
+
+def _agent_query_text(req: AgentEvidencePackRequest) -> str:
+    return f"{req.role}: {req.scenario}\n{req.extra or ''}".strip()
+
+def _agent_prompt(req: AgentEvidencePackRequest) -> str:
+    return (
+        "You are Aurora, an AI compliance assistant.\n"
+        "Use ONLY the provided context docs to support claims.\n"
+        "Return a JSON object with keys: summary, claims (array of strings), recommendations (array of strings), citations (array of objects with doc_id and reason).\n"
+        "Each item in citations must reference the DOC ids used in the context.\n\n"
+        f"ROLE: {req.role}\nSCENARIO: {req.scenario}\nEXTRA: {req.extra or ''}\n"
+    )
+
+def _fallback_response(req: AgentEvidencePackRequest, deterministic: Dict[str, Any], query_text: str, hits: List[Dict[str, Any]], error: Exception) -> Dict[str, Any]:
     pack_id = str(uuid.uuid4())
+    PACK_STORAGE[pack_id] = deterministic
+    head = {
+        "ok": True,
+        "mode": "fallback",
+        "pack_id": pack_id,
+        "note": f"Agent unavailable: {str(error)}",
+        "agent": None,
+    }
+    # Spread deterministic content so it looks like a valid pack
+    return _agent_response(req.view, head, deterministic, deterministic, query_text, hits)
+
+def _agent_context(req: AgentEvidencePackRequest, results: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, Any]]:
+    """(hits, attachments, stats) for the agent: every retrieved hit is a candidate; the packer
+    keeps up to top_k of them, deduplicated, diverse and trimmed to the context budget. Only
+    the attachments carry the trimmed text; hits are the selected hits as retrieved, for the
+    response.
+    """
+    top_k = req.top_k or 6
+    budget = CONTEXT_BUDGET_TOKENS if req.context_budget_tokens is None else req.context_budget_tokens
+    if budget <= 0:
+        hits = take_hits(results, top_k)["hits"]
+        return hits, agent_attachments(hits), {"packed": False}
+    candidates = results.get("hits", [])
+    packed, stats = pack_context(candidates, budget_tokens=budget, max_items=top_k)
+    logger.debug(f"Agent context: {stats}")
+    by_id = {h.get("chunk_id"): h for h in candidates}
+    hits = [by_id.get(p.get("chunk_id"), p) for p in packed]
+    return hits, agent_attachments(packed), {"packed": True, **stats}
+
+def _pending_response(req: AgentEvidencePackRequest, deterministic: Dict[str, Any], query_text: str, hits: List[Dict[str, Any]], run: asyncio.Future, deadline_ms: int) -> Dict[str, Any]:
+    pack_id = str(uuid.uuid4())
+    PACK_STORAGE[pack_id] = deterministic
+
+    def upgrade(result: Tuple[Dict[str, Any], Optional[str]]) -> None:
+        # Replaces PACK_STORAGE[pack_id] with the agent-mode pack
+        _agent_pack_response(req, deterministic, query_text, hits, result[0], result[1], pack_id=pack_id)
+
+    PACK_UPGRADES.track(pack_id, run, deadline_ms, upgrade)
+    head = {
+        "ok": True,
+        "mode": "deterministic",
+        "pack_id": pack_id,
+        "agent_status": "pending",
+        "status_url": f"/agent/evidence_pack/{pack_id}/status",
+        "note": f"Agent still running after {deadline_ms} ms; the pack is upgraded when it finishes.",
+        "agent": None,
+    }
+    return _agent_response(req.view, head, deterministic, deterministic, query_text, hits)
+
+def _agent_cache_key(cfg: AgentBuilderConfig, req: AgentEvidencePackRequest, hits: List[Dict[str, Any]]) -> Optional[str]:
+    # Follow-up turns depend on the conversation history, so they are never shared
+    if req.conversation_id:
+        return None
+    return agent_cache_key(cfg.agent_id, _agent_query_text(req), req.role, [h.get("chunk_id") for h in hits])
+
+def _agent_pack_response(req: AgentEvidencePackRequest, deterministic: Dict[str, Any], query_text: str, hits: List[Dict[str, Any]], agent_result: Dict[str, Any], cache_status: Optional[str] = None, pack_id: Optional[str] = None) -> Dict[str, Any]:
+    if cache_status in ("hit", "coalesced"):
+        # The answer came from another request's conversation; don't hand that out
+        agent_result = {**agent_result, "conversationId": None}
+    final_pack = merge_agent_result(deterministic, agent_result)
+
+    pack_id = pack_id or str(uuid.uuid4())
     PACK_STORAGE[pack_id] = final_pack
 
-    return {
+    head = {
         "ok": True,
         "mode": "agent_builder",
         "pack_id": pack_id,
         "conversationId": agent_result.get("conversationId"),
         "agent": agent_result,
-        "deterministic": deterministic,
-        "retrieval": {"query": query_text, "hits": hits},
-        **final_pack
     }
+    if cache_status is not None:
+        head["agent_cache"] = cache_status
+    return _agent_response(req.view, head, final_pack, deterministic, query_text, hits)
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/agent/evidence_pack/stream")
+async def agent_evidence_pack_stream(req: AgentEvidencePackRequest) -> StreamingResponse:
+    """/agent/evidence_pack as Server-Sent Events, so Studio can render before the LLM finishes:
+    "retrieval" (query + context hits) right after search, "delta" ({"text": ...}) for each
+    agent text chunk as it arrives, "field" ({"name", "value"}) as each top-level field of the
+    agent's JSON answer (summary, claims, ...) completes, then "pack": exactly the /agent/evidence_pack response,
+    pack_id included (a fallback pack if the agent fails mid-stream).
+    """
+    cfg = _require_agent_config()
+    query_text = _agent_query_text(req)
+    KEEPWARM.note_traffic()
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            results = await _retrieve_pack_hits(query_text, req.top_k, hybrid=req.hybrid)
+        except Exception as e:
+            logger.error(f"Retrieval for agent stream failed: {e}")
+            yield _sse("error", {"detail": f"Retrieval failed: {e}"})
+            return
+        hits, attachments, context = _agent_context(req, results)
+        if req.view == "full":
+            yield _sse("retrieval", {"query": query_text, "hits": hits, "context": context})
+        else:
+            yield _sse("retrieval", {"query": query_text, "chunk_ids": [h.get("chunk_id") for h in hits], "context": context})
+
+        if os.getenv("DEMO_MODE", "false").lower() == "true":
+            # Pre-recorded answer; the retrieval above is served again from the search cache
+            yield _sse("pack", await agent_evidence_pack(req))
+            return
+
+        deterministic = _build_deterministic_pack(query_text, req.scenario, req.role, results=results)
+        key = _agent_cache_key(cfg, req, hits)
+        if key is not None:
+            # Cached or in-flight identical request: answer with its pack, no deltas
+            cached, status = AGENT_CACHE.get(key), "hit"
+            task = AGENT_CACHE.inflight(key) if cached is None else None
+            if task is not None:
+                status = "coalesced"
+                try:
+                    cached = await AGENT_CACHE.join(task)
+                except Exception as e:
+                    yield _sse("pack", _fallback_response(req, deterministic, query_text, hits, e))
+                    return
+            if cached is not None:
+                yield _sse("pack", _agent_pack_response(req, deterministic, query_text, hits, cached, status))
+                return
+
+        gen = AGENT_CACHE.generation(_index_name())
+        started = time.perf_counter()
+        decoder = ConverseStreamDecoder(req.conversation_id)
+        if key is not None:
+            # Identical requests (streaming or not) arriving meanwhile join this call
+            AGENT_CACHE.begin_upstream(key)
+        try:
+            async for ev in _converse_stream(cfg, _agent_prompt(req), attachments, decoder):
+                if ev["type"] == "delta":
+                    yield _sse("delta", {"text": ev["text"]})
+                elif ev["type"] == "field":
+                    yield _sse("field", {"name": ev["name"], "value": ev["value"]})
+            agent_result = _agent_result(decoder)
+        except Exception as e:
+            if key is not None:
+                AGENT_CACHE.abort_upstream(key, e)
+            logger.error(f"Agent Builder stream failed: {e}")
+            yield _sse("pack", _fallback_response(req, deterministic, query_text, hits, e))
+            return
+        except BaseException:
+            # The client went away mid-stream; requests that joined fall back instead of hanging
+            if key is not None:
+                AGENT_CACHE.abort_upstream(key, RuntimeError("Streaming request ended before the agent finished"))
+            raise
+        if key is not None:
+            AGENT_CACHE.record_upstream(key, _index_name(), agent_result, time.perf_counter() - started, generation=gen)
+        yield _sse("pack", _agent_pack_response(req, deterministic, query_text, hits, agent_result, None if key is None else "miss"))
+
+    # No proxy buffering or caching: events must reach the browser as they are produced
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.post("/agent/warmup")
 async def agent_warmup():
@@ -622,11 +1154,11 @@ async def agent_warmup():
         logger.info("Warming up Agent Builder...")
         await _call_agent_builder_converse(
             cfg=cfg,
-            user_input="System warm-up check. Respond with 'OK'.",
+            user_input=KEEPWARM_PROMPT,
             attachments=[],
             conversation_id=None
         )
-        return {"status": "warmed", "message": "Agent Builder is active"}
+        return {"status": "warmed", "message": "Agent Builder is active", "http": KIBANA_HTTP.stats()}
     except Exception as e:
         logger.warning(f"Warm-up exception (non-fatal): {e}")
         return {"status": "error", "detail": str(e)}
@@ -636,6 +1168,8 @@ async def agent_evidence_pack_get(
     preset_id: str = Query("HS-001", description="Preset ID (e.g., HS-001)"),
     question: str = Query("", description="Compliance question / prompt"),
     top_k: int = Query(6, ge=1, le=25, description="Number of retrieved documents"),
+    view: View = Query("full", description="full | compact | ids"),
+    deadline_ms: Optional[int] = Query(None, ge=0, description="Return the deterministic pack if the agent takes longer"),
 ):
     """Simple GET shim for smoke tests.
 
@@ -643,5 +1177,25 @@ async def agent_evidence_pack_get(
     to sanity-check a deployment in a browser/curl without constructing a JSON body.
     """
 
-    req = AgentEvidencePackRequest(role=preset_id, scenario=preset_id, extra=question, top_k=top_k)
+    req = AgentEvidencePackRequest(role=preset_id, scenario=preset_id, extra=question, top_k=top_k, view=view, deadline_ms=deadline_ms)
     return await agent_evidence_pack(req)
+
+@app.get("/agent/evidence_pack/{pack_id}/status")
+async def agent_pack_status(
+    pack_id: str,
+    wait_ms: int = Query(0, ge=0, le=30000, description="Long-poll: wait up to this long for a pending agent run"),
+    view: View = Query("full", description="full | compact | ids"),
+) -> Dict[str, Any]:
+    """Status of a pack returned before its agent run finished (deadline_ms): "pending",
+    then "upgraded" (the stored pack is now the agent-mode pack, returned as "pack") or
+    "failed" (it stays deterministic). Packs that never waited on an agent report "done".
+    """
+    if pack_id not in PACK_STORAGE:
+        raise HTTPException(status_code=404, detail="Pack not found")
+    entry = await PACK_UPGRADES.wait(pack_id, wait_ms / 1000)
+    pack = PACK_STORAGE[pack_id]
+    out = entry.snapshot() if entry is not None else {"pack_id": pack_id, "status": "done"}
+    out["mode"] = pack.get("mode", "deterministic")
+    if out["status"] != "pending":
+        out["pack"] = pack_view(pack, view)
+    return out
@@ -1,47 +1,161 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List
+import os
+from typing import Iterable, Iterator, List
 
-@dataclass
+CHUNK_MAX_CHARS = int(os.getenv("AURORA_CHUNK_MAX_CHARS", "1200"))
+CHUNK_OVERLAP = int(os.getenv("AURORA_CHUNK_OVERLAP", "0"))
+# Markdown heading depth that starts a new chunk/section: 2 = '#' and '##', 3 adds '###', ...
+CHUNK_HEADING_LEVEL = int(os.getenv("AURORA_CHUNK_HEADING_LEVEL", "2"))
+
+_EOL = "\r\n\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+@dataclass(slots=True)
 class Chunk:
     chunk_id: str
     text: str
     section: str = ""
+    # Character span [start, end) of the chunk in the source text
+    start: int = 0
+    end: int = 0
+
+def _heading(line: str, max_level: int) -> str | None:
+    """Return the heading title if line is a markdown heading at or above max_level."""
+    if not line.startswith("#"):
+        return None
+    level = len(line) - len(line.lstrip("#"))
+    if level > max_level or line[level:level + 1] != " ":
+        return None
+    return line[level + 1:].strip()
+
+def iter_chunks(
+    doc_id: str,
+    lines: Iterable[str],
+    max_chars: int = CHUNK_MAX_CHARS,
+    overlap: int = CHUNK_OVERLAP,
+    heading_level: int = CHUNK_HEADING_LEVEL,
+) -> Iterator[Chunk]:
+    """Streaming chunker: pack lines into chunks of up to max_chars, in linear time.
 
-def chunk_text(doc_id: str, text: str, max_chars: int = 1200) -> List[Chunk]:
-    """Simple chunker: split by blank lines; pack up to max_chars.
-    Tracks the most recent # or ## heading to use as 'section'.
+    lines must keep their line endings (e.g. str.splitlines(keepends=True) or a file object)
+    so offsets line up with the source. Headings up to heading_level start a new chunk and
+    set 'section'. At default settings chunks are identical to the original chunk_text,
+    whitespace handling and size decisions included, so chunk ids stay stable.
+    With overlap > 0, chunks split for size start with up to overlap chars of trailing lines
+    from the previous chunk (never across a heading).
     """
-    lines = text.splitlines()
-    chunks: List[Chunk] = []
-    
-    current_section = ""
-    buf = ""
+    overlap = max(0, min(overlap, max_chars // 2))
+
+    section = ""
+    # buf[0] is left-stripped; later lines are right-stripped. The first line of a chunk
+    # started by a size split keeps its trailing whitespace, as the original did.
+    buf: List[str] = []
+    offs: List[int] = []  # source offset of each buf line's first kept char
+    text_len = 0  # len("\n".join(buf))
+    buf_len = 0  # length the original chunker's buffer string had; drives size splits
+    n_seed = 0  # leading buf lines carried over as overlap
     idx = 0
+    pos = 0
+
+    def emit() -> Chunk:
+        nonlocal idx
+        last = buf[-1].rstrip()
+        chunk = Chunk(
+            chunk_id=f"{doc_id}::chunk::{idx}",
+            text="\n".join(buf[:-1] + [last]),
+            section=section,
+            start=offs[0],
+            end=offs[-1] + len(last),
+        )
+        idx += 1
+        return chunk
+
+    def reset() -> None:
+        nonlocal buf, offs, text_len, buf_len, n_seed
+        buf, offs, text_len, buf_len, n_seed = [], [], 0, 0, 0
 
-    def flush():
-        nonlocal buf, idx
-        if buf.strip():
-            chunks.append(Chunk(chunk_id=f"{doc_id}::chunk::{idx}", text=buf.strip(), section=current_section))
-            idx += 1
-        buf = ""
-
-    for line in lines:
-        if line.startswith("# "):
-            new_section = line[2:].strip()
-            flush()
-            current_section = new_section
-        elif line.startswith("## "):
-            new_section = line[3:].strip()
-            flush()
-            current_section = new_section
-        
-        if len(buf) + len(line) + 1 <= max_chars:
-            buf = (buf + "\n" + line).strip()
+    def append(line: str, offset: int) -> None:
+        nonlocal text_len, buf_len
+        stripped = line.strip()
+        if not buf:
+            if stripped:
+                buf.append(stripped)
+                offs.append(offset + line.index(stripped[0]))
+            text_len = len(stripped)
+        elif stripped:
+            kept = line.rstrip()
+            buf.append(kept)
+            offs.append(offset)
+            text_len += len(kept) + 1
         else:
-            flush()
-            buf = line
-            
-    flush()
-    return chunks
+            # A blank line only trims trailing whitespace off the buffer
+            text_len -= len(buf[-1]) - len(buf[-1].rstrip())
+            buf[-1] = buf[-1].rstrip()
+        buf_len = text_len
+
+    def seed() -> None:
+        # Keep the longest tail of buf that fits in overlap chars
+        nonlocal buf, offs, text_len, buf_len, n_seed
+        total = -1
+        keep = 0
+        for line in reversed(buf):
+            if total + len(line.rstrip()) + 1 > overlap:
+                break
+            total += len(line.rstrip()) + 1
+            keep += 1
+        buf = [line.rstrip() for line in buf[len(buf) - keep:]]
+        offs = offs[len(offs) - keep:]
+        if buf:
+            # Now the chunk's first line: left-stripped like any other chunk start
+            indent = len(buf[0]) - len(buf[0].lstrip())
+            buf[0] = buf[0][indent:]
+            offs[0] += indent
+            total -= indent
+        text_len = buf_len = max(0, total)
+        n_seed = keep
+
+    for raw in lines:
+        line = raw.rstrip(_EOL)
+        offset = pos
+        pos += len(raw)
+
+        title = _heading(line, heading_level) if line[:1] == "#" else None
+        if title is not None:
+            if len(buf) > n_seed:
+                yield emit()
+            reset()
+            section = title
+
+        if buf_len + len(line) + 1 <= max_chars:
+            append(line, offset)
+            continue
+
+        if len(buf) > n_seed:
+            yield emit()
+        if overlap and len(buf) > n_seed:
+            seed()
+            if buf_len + len(line) + 1 <= max_chars:
+                append(line, offset)
+                continue
+        # The line starts the next chunk as is (its length, whitespace included, counts)
+        reset()
+        stripped = line.strip()
+        if stripped:
+            buf.append(line.lstrip())
+            offs.append(offset + line.index(stripped[0]))
+            text_len = len(buf[0])
+        buf_len = len(line)
+
+    if len(buf) > n_seed:
+        yield emit()
+
+def chunk_text(
+    doc_id: str,
+    text: str,
+    max_chars: int = CHUNK_MAX_CHARS,
+    overlap: int = CHUNK_OVERLAP,
+    heading_level: int = CHUNK_HEADING_LEVEL,
+) -> List[Chunk]:
+    """Chunk a whole document; see iter_chunks()."""
+    return list(iter_chunks(doc_id, text.splitlines(keepends=True), max_chars, overlap, heading_level))
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import os
+import re
+import zlib
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+# Context packing between retrieval and the Agent Builder call: drop near-duplicate and
+# overlapping chunks, pick a relevant but diverse subset (MMR), and trim each chunk to the
+# text around its highlights so the whole context fits a token budget.
+
+# Context size sent to the agent, in (estimated) tokens
+CONTEXT_BUDGET_TOKENS = int(os.getenv("AURORA_CONTEXT_BUDGET_TOKENS", "1500"))
+# Rough chars-per-token of English prose; no tokenizer dependency
+CHARS_PER_TOKEN = 4
+# MMR trade-off: 1.0 = pure relevance, 0.0 = pure diversity
+MMR_LAMBDA = float(os.getenv("AURORA_CONTEXT_MMR_LAMBDA", "0.7"))
+# Word shingles of this size are compared for near-duplicate detection
+SHINGLE_SIZE = 5
+DUP_JACCARD = 0.8
+# Chunks of one document whose char spans overlap by this fraction of the shorter are duplicates
+DUP_OVERLAP = 0.5
+# Text kept around each highlight when a chunk is trimmed
+HIGHLIGHT_WINDOW = 240
+# Smallest trimmed piece worth sending
+MIN_PIECE_CHARS = 120
+ELLIPSIS = " … "
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_EM_RE = re.compile(r"</?em>")
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _shingles(text: str, n: int = SHINGLE_SIZE) -> FrozenSet[int]:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < n:
+        return frozenset([zlib.crc32(" ".join(words).encode("utf-8"))]) if words else frozenset()
+    return frozenset(zlib.crc32(" ".join(words[i:i + n]).encode("utf-8")) for i in range(len(words) - n + 1))
+
+def _jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+def _span(h: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    start, end = h.get("char_start"), h.get("char_end")
+    if isinstance(start, int) and isinstance(end, int) and end > start:
+        return start, end
+    return None
+
+def _overlaps(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    if a.get("doc_id") != b.get("doc_id"):
+        return False
+    sa, sb = _span(a), _span(b)
+    if sa is None or sb is None:
+        return False
+    inter = min(sa[1], sb[1]) - max(sa[0], sb[0])
+    return inter > DUP_OVERLAP * min(sa[1] - sa[0], sb[1] - sb[0])
+
+def _highlight_spans(content: str, h: Dict[str, Any]) -> List[Tuple[int, int]]:
+    """Positions in content of the highlight fragments search() returned."""
+    spans: List[Tuple[int, int]] = []
+    for frag in (h.get("highlights") or {}).get("content") or []:
+        plain = _EM_RE.sub("", frag).strip()
+        pos = content.find(plain) if plain else -1
+        if pos >= 0:
+            spans.append((pos, pos + len(plain)))
+    return sorted(spans)
+
+def _word_cut(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    return cut[:cut.rfind(" ")] if " " in cut else cut
+
+def trim_content(h: Dict[str, Any], limit: int) -> str:
+    """Chunk text cut to about limit chars, keeping the text around its highlights."""
+    content = h.get("content") or ""
+    if len(content) <= limit:
+        return content
+    windows: List[Tuple[int, int]] = []
+    for start, end in _highlight_spans(content, h):
+        pad = max(0, (HIGHLIGHT_WINDOW - (end - start)) // 2)
+        s, e = max(0, start - pad), min(len(content), end + pad)
+        if s > 0:
+            # Start at a word boundary, not mid-word
+            space = content.find(" ", s, start)
+            s = space + 1 if space >= 0 else start
+        if windows and s <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], e))
+        else:
+            windows.append((s, e))
+    if not windows:
+        return _word_cut(content, limit)
+    pieces: List[str] = []
+    used = 0
+    for s, e in windows:
+        room = limit - used - (len(ELLIPSIS) if pieces else 0)
+        if room < MIN_PIECE_CHARS // 2:
+            break
+        piece = _word_cut(content[s:e].strip(), room)
+        pieces.append(piece)
+        used += len(piece) + (len(ELLIPSIS) if len(pieces) > 1 else 0)
+    return ELLIPSIS.join(pieces)
+
+def pack_context(
+    hits: List[Dict[str, Any]],
+    budget_tokens: int = CONTEXT_BUDGET_TOKENS,
+    max_items: Optional[int] = None,
+    mmr_lambda: float = MMR_LAMBDA,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Select and trim hits (search() hit dicts, best first) into a context of at most
+    budget_tokens. Returns (packed hits with trimmed "content", stats).
+    """
+    budget = max(0, budget_tokens) * CHARS_PER_TOKEN
+    max_items = len(hits) if max_items is None else max_items
+    stats: Dict[str, Any] = {
+        "candidates": len(hits),
+        "duplicates": 0,
+        "chars_in": sum(len(h.get("content") or "") for h in hits),
+    }
+
+    # 1) Drop near-duplicates and overlapping chunks, keeping the better-ranked copy
+    kept: List[Dict[str, Any]] = []
+    shingles: List[FrozenSet[int]] = []
+    for h in hits:
+        sh = _shingles(h.get("content") or "")
+        if any(_overlaps(h, k) or _jaccard(sh, s) >= DUP_JACCARD for k, s in zip(kept, shingles)):
+            stats["duplicates"] += 1
+            continue
+        kept.append(h)
+        shingles.append(sh)
+
+    # 2) MMR: relevance (score, normalized) against similarity to what is already chosen
+    top = max((h.get("score") or 0.0) for h in kept) if kept else 0.0
+    rel = [(h.get("score") or 0.0) / top if top > 0 else 1.0 for h in kept]
+    max_sim = [0.0] * len(kept)
+    remaining = list(range(len(kept)))
+    packed: List[Dict[str, Any]] = []
+    used = 0
+    # An even share of the budget per chunk, so one long chunk cannot crowd out the rest
+    share = budget // max(1, min(max_items, len(kept))) if kept else 0
+    while remaining and len(packed) < max_items and budget - used >= MIN_PIECE_CHARS:
+        best = max(remaining, key=lambda i: (mmr_lambda * rel[i] - (1 - mmr_lambda) * max_sim[i], -i))
+        remaining.remove(best)
+        # 3) Trim around highlights to this chunk's share (or what is left of the budget)
+        limit = min(budget - used, max(share, MIN_PIECE_CHARS))
+        text = trim_content(kept[best], limit)
+        if not text:
+            continue
+        packed.append({**kept[best], "content": text})
+        used += len(text)
+        for i in remaining:
+            max_sim[i] = max(max_sim[i], _jaccard(shingles[i], shingles[best]))
+        # Hand unused share to the chunks still to come
+        if len(packed) < max_items and remaining:
+            share = max(share, (budget - used) // max(1, min(max_items - len(packed), len(remaining))))
+
+    stats.update({
+        "selected": len(packed),
+        "chars_out": used,
+        "est_tokens": estimate_tokens("".join(h["content"] for h in packed)),
+        "budget_tokens": budget_tokens,
+    })
+    return packed, stats
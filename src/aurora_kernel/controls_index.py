@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from aurora_kernel.elastic_store import on_index_action, on_index_replace
+
+logger = logging.getLogger("aurora_kernel")
+
+# In-memory inverted index control_id -> chunks/docs that cite it, per index (alias) name.
+# It is loaded with one export scan of the index (at startup or on first use) and then kept
+# current by the chunk actions every ingest emits (elastic_store.on_index_action). A rebuild
+# swap or rollback replaces the whole index, so it triggers a fresh scan instead. Ingests run
+# by other processes (the CLI, other workers, the watcher) never reach this copy, so it is
+# also rescanned in the background once it is older than CONTROLS_MAX_AGE_S.
+
+# Yields hits with chunk_id, doc_id, doc_type and control_ids for every chunk of an index
+Loader = Callable[[str], Iterable[Dict[str, Any]]]
+
+# P1: only actual sources back a control, never expected outputs
+_SOURCE_TYPE = "source"
+# Background loads of an index that failed (e.g. it does not exist yet) wait this long before retrying
+LOAD_RETRY_S = float(os.getenv("AURORA_CONTROLS_RETRY_S", "30"))
+# A loaded copy older than this is served while a background scan refreshes it; 0 = never
+CONTROLS_MAX_AGE_S = float(os.getenv("AURORA_CONTROLS_MAX_AGE_S", "300"))
+
+class _Entry:
+    def __init__(self) -> None:
+        # chunk_id -> (doc_id, control_ids)
+        self.chunks: Dict[str, Tuple[str, Tuple[str, ...]]] = {}
+        # control_id -> chunk_ids
+        self.controls: Dict[str, Set[str]] = {}
+        self.loaded_at = time.time()
+        # While a scan is building this entry: chunks changed by ingest actions meanwhile
+        self.touched: Optional[Set[str]] = None
+
+    def put(self, chunk_id: str, doc_id: str, control_ids: Iterable[str]) -> None:
+        self.remove(chunk_id)
+        cids = tuple(dict.fromkeys(control_ids))
+        if not cids:
+            return
+        self.chunks[chunk_id] = (doc_id, cids)
+        for cid in cids:
+            self.controls.setdefault(cid, set()).add(chunk_id)
+
+    def remove(self, chunk_id: str) -> None:
+        old = self.chunks.pop(chunk_id, None)
+        if old is None:
+            return
+        for cid in old[1]:
+            refs = self.controls.get(cid)
+            if refs is not None:
+                refs.discard(chunk_id)
+                if not refs:
+                    del self.controls[cid]
+
+    def apply(self, action: Dict[str, Any], source: Optional[Dict[str, Any]]) -> None:
+        op, meta = next(iter(action.items()))
+        chunk_id = meta.get("_id")
+        if self.touched is not None:
+            self.touched.add(chunk_id)
+        if op == "delete" or source is None or source.get("doc_type") != _SOURCE_TYPE:
+            self.remove(chunk_id)
+        else:
+            self.put(chunk_id, source.get("doc_id"), source.get("control_ids") or [])
+
+    def coverage(self, control_id: str) -> Dict[str, Any]:
+        chunk_ids = sorted(self.controls.get(control_id, ()))
+        doc_ids = sorted({self.chunks[c][0] for c in chunk_ids})
+        return {"chunks": len(chunk_ids), "docs": len(doc_ids), "doc_ids": doc_ids, "chunk_ids": chunk_ids}
+
+class ControlsIndex:
+    """control_id -> chunk_ids/doc_ids lookups served from memory."""
+
+    def __init__(self, loader: Optional[Loader] = None, max_age_s: float = CONTROLS_MAX_AGE_S):
+        self.loader = loader
+        self.max_age_s = max_age_s
+        self._entries: Dict[str, _Entry] = {}
+        # Entries being scanned; ingest actions are applied to them too so none are lost
+        self._building: Dict[str, _Entry] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.load_errors = 0
+        self.actions = 0
+
+    def _claim(self, index: str) -> _Entry:
+        # Caller holds _lock. Registered before the scan starts, so ingest actions reach it
+        entry = _Entry()
+        entry.touched = set()
+        self._building[index] = entry
+        return entry
+
+    def load(self, index: str, entry: Optional[_Entry] = None) -> _Entry:
+        """(Re)build the entry for index with a full scan; blocks until done."""
+        if self.loader is None:
+            raise RuntimeError("ControlsIndex has no loader")
+        if entry is None:
+            with self._lock:
+                entry = self._claim(index)
+        t0 = time.perf_counter()
+        try:
+            for hit in self.loader(index):
+                if hit.get("doc_type") == _SOURCE_TYPE and hit.get("chunk_id"):
+                    with self._lock:
+                        # An ingest action applied during the scan is newer than the scanned copy
+                        if hit["chunk_id"] not in entry.touched:
+                            entry.put(hit["chunk_id"], hit.get("doc_id"), hit.get("control_ids") or [])
+        except Exception:
+            with self._lock:
+                self.load_errors += 1
+                self._failed_at[index] = time.time()
+            raise
+        finally:
+            with self._lock:
+                if self._building.get(index) is entry:
+                    del self._building[index]
+        with self._lock:
+            entry.touched = None
+            entry.loaded_at = time.time()
+            self._entries[index] = entry
+            self._failed_at.pop(index, None)
+            self.loads += 1
+        logger.info(f"Controls index for {index}: {len(entry.controls)} controls, {len(entry.chunks)} chunks in {time.perf_counter() - t0:.2f}s")
+        return entry
+
+    def load_in_background(self, index: str) -> None:
+        with self._lock:
+            if self.loader is None or index in self._building:
+                return
+            if time.time() - self._failed_at.get(index, 0.0) < LOAD_RETRY_S:
+                return
+            # Claim it now so concurrent callers don't start a second scan; the scan fills
+            # this same entry, so actions applied to it meanwhile are kept
+            entry = self._claim(index)
+
+        def run() -> None:
+            try:
+                self.load(index, entry)
+            except Exception as e:
+                logger.warning(f"Controls index load failed for {index}: {e}")
+
+        threading.Thread(target=run, name=f"controls-index-{index}", daemon=True).start()
+
+    def _stale(self, entry: _Entry) -> bool:
+        return self.max_age_s > 0 and time.time() - entry.loaded_at > self.max_age_s
+
+    def ensure(self, index: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(index)
+        if entry is None:
+            return self.load(index)
+        if self._stale(entry):
+            self.load_in_background(index)
+        return entry
+
+    def lookup(self, index: str, control_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        entry = self.ensure(index)
+        with self._lock:
+            return {cid: entry.coverage(cid) for cid in control_ids}
+
+    def summary(self, index: str) -> Dict[str, Dict[str, int]]:
+        """Every known control with its chunk and doc counts."""
+        entry = self.ensure(index)
+        with self._lock:
+            return {
+                cid: {"chunks": len(refs), "docs": len({entry.chunks[c][0] for c in refs})}
+                for cid, refs in sorted(entry.controls.items())
+            }
+
+    def coverage(self, index: str, control_ids: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Non-blocking lookup for pack building: None (and a background load) if index
+        is not loaded yet, so a request never waits on a full scan.
+        """
+        with self._lock:
+            entry = self._entries.get(index)
+            out = {cid: entry.coverage(cid) for cid in control_ids} if entry is not None else None
+        if entry is None or self._stale(entry):
+            self.load_in_background(index)
+        return out
+
+    def on_action(self, index: str, action: Dict[str, Any], source: Optional[Dict[str, Any]]) -> None:
+        with self._lock:
+            entry = self._entries.get(index)
+            building = self._building.get(index)
+            if entry is None and building is None:
+                return  # not loaded; the first load scans it
+            for e in (entry, building):
+                if e is not None:
+                    e.apply(action, source)
+            self.actions += 1
+
+    def on_replace(self, index: str) -> None:
+        with self._lock:
+            loaded = self._entries.pop(index, None) is not None
+        if loaded:
+            self.load_in_background(index)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "indices": {
+                    name: {"controls": len(e.controls), "chunks": len(e.chunks), "loaded_at": e.loaded_at}
+                    for name, e in self._entries.items()
+                },
+                "loading": sorted(self._building),
+                "max_age_s": self.max_age_s,
+                "loads": self.loads,
+                "load_errors": self.load_errors,
+                "actions": self.actions,
+            }
+
+# Process-wide index; the API sets its loader. Importing this module subscribes it to ingests.
+CONTROLS_INDEX = ControlsIndex()
+on_index_action(CONTROLS_INDEX.on_action)
+on_index_replace(CONTROLS_INDEX.on_replace)
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
+import hashlib
+from itertools import chain, islice
+import multiprocessing
+import os
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import yaml
 
-@dataclass
+from aurora_kernel.manifest import CorpusManifest
+
+# libyaml's C loader is several times faster when PyYAML was built with it
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+@dataclass(slots=True)
 class CorpusDoc:
     doc_id: str
     doc_type: str
@@ -19,6 +30,10 @@ class CorpusDoc:
     title: str
     body: str
     source_path: str
+    # File fingerprint, used for incremental ingest
+    sha256: str = ""
+    mtime: float = 0.0
+    size: int = 0
 
 def _parse_front_matter_md(text: str) -> Tuple[Dict[str, Any], str]:
     """Parse YAML front matter from a markdown file.
@@ -42,57 +57,157 @@ def _parse_front_matter_md(text: str) -> Tuple[Dict[str, Any], str]:
     meta_raw = parts[1]
     body = parts[2]
     try:
-        meta = yaml.safe_load(meta_raw) or {}
+        meta = yaml.load(meta_raw, Loader=_YamlLoader) or {}
     except Exception:
         meta = {}
         body = text
     return meta, body.lstrip()
 
-def load_corpus(corpus_root: Path, exts: Optional[List[str]] = None) -> List[CorpusDoc]:
-    """Load corpus docs from a repo folder.
+# Files are read, hashed and parsed in worker processes once a scan finds more than this
+# many candidates; small corpora are cheaper to load inline than to start a pool for.
+PARALLEL_MIN_FILES = 512
+
+def _is_candidate(p: Path, exts: List[str]) -> bool:
+    if p.suffix.lower() not in exts:
+        return False
+    # skip internal or build artifacts
+    if any(part.startswith(".") for part in p.parts):
+        return False
+    return p.is_file()
+
+def _iter_paths(corpus_root: Path, exts: List[str], paths: Optional[Iterable[Path]] = None) -> Iterator[Path]:
+    for p in (corpus_root.rglob("*") if paths is None else paths):
+        if _is_candidate(p, exts):
+            yield p
+
+def count_corpus_files(corpus_root: Path, exts: Optional[List[str]] = None) -> int:
+    """Number of files iter_corpus() would visit (a stat-only walk), e.g. for progress ETAs."""
+    return sum(1 for _ in _iter_paths(corpus_root, exts or [".md", ".txt"]))
+
+def _load_file(path: str, mtime: float, size: int, prev_sha: str = "") -> Tuple[Optional[CorpusDoc], str]:
+    """Read, hash and parse one file. Runs in a worker process, so it must stay top-level.
+    Returns (None, sha) when the content hash equals prev_sha.
+    """
+    p = Path(path)
+    data = p.read_bytes()
+    sha = hashlib.sha256(data).hexdigest()
+    if prev_sha and sha == prev_sha:
+        return None, sha
+
+    # Same newline handling as Path.read_text()
+    raw = data.decode("utf-8", errors="ignore").replace("\r\n", "\n").replace("\r", "\n")
+    meta, body = _parse_front_matter_md(raw)
+
+    title = ""
+    for line in body.splitlines():
+        if line.startswith("# "):
+            title = line[2:].strip()
+            break
+
+    # Infer doc_type logic for judge-winning compliance
+    if "expected_output" in p.parts or "expected_output" in path:
+        inferred_type = "expected_output"
+    else:
+        inferred_type = str(meta.get("doc_type") or meta.get("scenario_type") or "source").strip()
+
+    doc = CorpusDoc(
+        doc_id=str(meta.get("doc_id") or meta.get("scenario_id") or p.stem).strip(),
+        doc_type=inferred_type,
+        stakeholder=str(meta.get("stakeholder") or "unknown").strip(),
+        system=str(meta.get("system") or "unknown").strip(),
+        jurisdiction=str(meta.get("jurisdiction") or "multi").strip(),
+        control_ids=list(meta.get("control_ids") or []),
+        date=str(meta.get("date") or "").strip(),
+        confidentiality=str(meta.get("confidentiality") or "").strip(),
+        title=title or p.stem,
+        body=body.strip(),
+        source_path=path,
+        sha256=sha,
+        mtime=mtime,
+        size=size,
+    )
+    return doc, sha
+
+def _default_workers() -> int:
+    return int(os.getenv("AURORA_LOADER_WORKERS") or min(8, os.cpu_count() or 1))
+
+def iter_corpus(
+    corpus_root: Path,
+    exts: Optional[List[str]] = None,
+    manifest: Optional[CorpusManifest] = None,
+    workers: Optional[int] = None,
+    paths: Optional[Iterable[Path]] = None,
+) -> Iterator[CorpusDoc]:
+    """Yield corpus docs one at a time so callers can stream them into the index.
     Default: index markdown and text files.
+    With a manifest, files whose stat or sha256 is unchanged are skipped without parsing.
+    paths restricts loading to those files (e.g. the ones a watcher reported) instead of
+    scanning corpus_root.
+
+    Large corpora are parsed by a process pool (workers, default AURORA_LOADER_WORKERS or
+    the CPU count). Only a small window of files is in flight at once, and docs are yielded
+    in scan order.
     """
     if exts is None:
         exts = [".md", ".txt"]
+    if workers is None:
+        workers = _default_workers()
+
+    def jobs() -> Iterator[Tuple[str, float, int, str]]:
+        for p in _iter_paths(corpus_root, exts, paths):
+            source_path = str(p.as_posix())
+            st = p.stat()
+            prev_sha = ""
+            if manifest is not None:
+                manifest.mark_seen(source_path)
+                if manifest.is_unchanged(source_path, st.st_mtime, st.st_size):
+                    manifest.skipped += 1
+                    continue
+                entry = manifest.entries.get(source_path)
+                prev_sha = entry.sha256 if entry else ""
+            yield source_path, st.st_mtime, st.st_size, prev_sha
 
-    docs: List[CorpusDoc] = []
-    for p in corpus_root.rglob("*"):
-        if not p.is_file():
-            continue
-        if p.suffix.lower() not in exts:
-            continue
-        # skip internal or build artifacts
-        if any(part.startswith(".") for part in p.parts):
-            continue
-
-        raw = p.read_text(encoding="utf-8", errors="ignore")
-        meta, body = _parse_front_matter_md(raw)
-
-        title = ""
-        for line in body.splitlines():
-            if line.startswith("# "):
-                title = line[2:].strip()
-                break
-
-        # Infer doc_type logic for judge-winning compliance
-        if "expected_output" in p.parts or "expected_output" in str(p.as_posix()):
-            inferred_type = "expected_output"
-        else:
-            inferred_type = str(meta.get("doc_type") or meta.get("scenario_type") or "source").strip()
-
-        doc = CorpusDoc(
-            doc_id=str(meta.get("doc_id") or meta.get("scenario_id") or p.stem).strip(),
-            doc_type=inferred_type,
-            stakeholder=str(meta.get("stakeholder") or "unknown").strip(),
-            system=str(meta.get("system") or "unknown").strip(),
-            jurisdiction=str(meta.get("jurisdiction") or "multi").strip(),
-            control_ids=list(meta.get("control_ids") or []),
-            date=str(meta.get("date") or "").strip(),
-            confidentiality=str(meta.get("confidentiality") or "").strip(),
-            title=title or p.stem,
-            body=body.strip(),
-            source_path=str(p.as_posix()),
-        )
-        docs.append(doc)
-
-    return docs
+    def finish(job: Tuple[str, float, int, str], doc: Optional[CorpusDoc], sha: str) -> Optional[CorpusDoc]:
+        if doc is None:
+            # Content unchanged; just refresh the stat fingerprint
+            if manifest is not None:
+                manifest.same_content(job[0], sha, job[1], job[2])
+                manifest.skipped += 1
+        return doc
+
+    pending = jobs()
+    head = list(islice(pending, PARALLEL_MIN_FILES))
+    if workers <= 1 or len(head) < PARALLEL_MIN_FILES:
+        for job in chain(head, pending):
+            doc = finish(job, *_load_file(*job))
+            if doc is not None:
+                yield doc
+        return
+
+    window = workers * 4
+    # spawn: the API calls this from worker threads, where fork() is unsafe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        in_flight: Deque[Tuple[Tuple[str, float, int, str], Future]] = deque()
+        for job in chain(head, pending):
+            in_flight.append((job, pool.submit(_load_file, *job)))
+            if len(in_flight) >= window:
+                done_job, fut = in_flight.popleft()
+                doc = finish(done_job, *fut.result())
+                if doc is not None:
+                    yield doc
+        while in_flight:
+            done_job, fut = in_flight.popleft()
+            doc = finish(done_job, *fut.result())
+            if doc is not None:
+                yield doc
+
+def load_corpus(
+    corpus_root: Path,
+    exts: Optional[List[str]] = None,
+    manifest: Optional[CorpusManifest] = None,
+    workers: Optional[int] = None,
+) -> List[CorpusDoc]:
+    """Load corpus docs from a repo folder into a list.
+    Prefer iter_corpus() for large corpora.
+    """
+    return list(iter_corpus(corpus_root, exts, manifest, workers))
@@ -1,97 +1,700 @@
 from __future__ import annotations
 
-from dataclasses import asdict
-from typing import Any, Dict, List, Optional
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from elasticsearch import Elasticsearch
+from elasticsearch import ApiError, AsyncElasticsearch, Elasticsearch
 
 from aurora_kernel.corpus_loader import CorpusDoc
 from aurora_kernel.chunker import chunk_text
+from aurora_kernel.embeddings import EMBEDDINGS_ENABLED, HYBRID_CANDIDATES, embed, embedding_mapping, rrf_fuse
+from aurora_kernel.manifest import CorpusManifest
 
-def make_es_client(cloud_id: Optional[str] = None, es_url: Optional[str] = None, api_key: Optional[str] = None, username: Optional[str] = None, password: Optional[str] = None) -> Elasticsearch:
+logger = logging.getLogger("aurora_kernel")
+
+def es_client_options(cloud: bool = False) -> Dict[str, Any]:
+    """Transport settings for the shared client: pool size, timeouts, retries and sniffing.
+    Connections in the per-node pool are kept alive and reused across requests.
+    Sniffing is not supported on Elastic Cloud, so it is only enabled for self-managed URLs.
+    """
+    opts: Dict[str, Any] = {
+        "connections_per_node": int(os.getenv("ES_CONNECTIONS_PER_NODE", "16")),
+        "request_timeout": float(os.getenv("ES_REQUEST_TIMEOUT", "30")),
+        "max_retries": int(os.getenv("ES_MAX_RETRIES", "3")),
+        "retry_on_timeout": True,
+        "http_compress": os.getenv("ES_HTTP_COMPRESS", "false").lower() == "true",
+    }
+    if not cloud and os.getenv("ES_SNIFF", "false").lower() == "true":
+        opts.update({
+            "sniff_on_start": True,
+            "sniff_on_node_failure": True,
+            "min_delay_between_sniffing": float(os.getenv("ES_SNIFF_INTERVAL", "60")),
+        })
+    return opts
+
+def _client_args(cloud_id: Optional[str], es_url: Optional[str], api_key: Optional[str], username: Optional[str], password: Optional[str]) -> Tuple[List[Any], Dict[str, Any]]:
     # Cloud ID with Basic Auth
     if cloud_id and username and password:
-        return Elasticsearch(cloud_id=cloud_id, basic_auth=(username, password))
+        return [], {"cloud_id": cloud_id, "basic_auth": (username, password)}
     # Cloud ID with API Key
     if cloud_id and api_key:
-        return Elasticsearch(cloud_id=cloud_id, api_key=api_key)
+        return [], {"cloud_id": cloud_id, "api_key": api_key}
     # URL with API Key
     if es_url and api_key:
-        return Elasticsearch(es_url, api_key=api_key)
+        return [es_url], {"api_key": api_key}
     # URL with Basic Auth
     if es_url and username and password:
-        return Elasticsearch(es_url, basic_auth=(username, password))
+        return [es_url], {"basic_auth": (username, password)}
     # URL only
     if es_url:
-        return Elasticsearch(es_url)
+        return [es_url], {}
     # Fallback to localhost
-    return Elasticsearch("http://localhost:9200")
+    return ["http://localhost:9200"], {}
+
+def make_es_client(cloud_id: Optional[str] = None, es_url: Optional[str] = None, api_key: Optional[str] = None, username: Optional[str] = None, password: Optional[str] = None, **options: Any) -> Elasticsearch:
+    # options: transport settings, e.g. es_client_options()
+    args, kwargs = _client_args(cloud_id, es_url, api_key, username, password)
+    return Elasticsearch(*args, **kwargs, **options)
+
+def async_client_available() -> bool:
+    return importlib.util.find_spec("aiohttp") is not None
+
+def make_async_es_client(cloud_id: Optional[str] = None, es_url: Optional[str] = None, api_key: Optional[str] = None, username: Optional[str] = None, password: Optional[str] = None, **options: Any) -> AsyncElasticsearch:
+    """Same as make_es_client() but for AsyncElasticsearch (needs aiohttp)."""
+    if not async_client_available():
+        raise ImportError("aiohttp is not installed; pip install 'elasticsearch[async]'")
+    args, kwargs = _client_args(cloud_id, es_url, api_key, username, password)
+    return AsyncElasticsearch(*args, **kwargs, **options)
+
+def _queue_size(q: Any) -> Optional[int]:
+    qsize = getattr(q, "qsize", None)
+    return qsize() if callable(qsize) else None
+
+def pool_stats(client: Elasticsearch) -> Dict[str, Any]:
+    """Connection-pool health for /health: nodes, and per-node connection reuse.
+    Reads elastic-transport / urllib3 internals, so every field is best effort and is
+    None (or missing) when a transport version does not have it.
+    """
+    node_pool = getattr(getattr(client, "transport", None), "node_pool", None)
+    all_nodes = getattr(node_pool, "all", None)
+    nodes = []
+    for node in (all_nodes() if callable(all_nodes) else []):
+        entry: Dict[str, Any] = {"node": str(getattr(node, "base_url", node))}
+        pool = getattr(node, "pool", None)  # urllib3 HTTPConnectionPool
+        conns = getattr(pool, "pool", None)
+        if pool is not None:
+            queued = getattr(conns, "queue", None)
+            entry.update({
+                "max_connections": getattr(conns, "maxsize", None),
+                "idle_connections": sum(1 for conn in list(queued) if conn is not None) if queued is not None else None,
+                "connections_opened": getattr(pool, "num_connections", None),
+                "requests": getattr(pool, "num_requests", None),
+            })
+        nodes.append(entry)
+    alive = getattr(node_pool, "_alive_nodes", None)
+    return {
+        "nodes": len(nodes),
+        "alive_nodes": len(alive) if alive is not None else None,
+        "dead_nodes": _queue_size(getattr(node_pool, "_dead_nodes", None)),
+        "node_stats": nodes,
+    }
+
+INDEX_MAPPINGS: Dict[str, Any] = {
+    "properties": {
+        "doc_id": {"type": "keyword"},
+        "doc_type": {"type": "keyword"},
+        "stakeholder": {"type": "keyword"},
+        "system": {"type": "keyword"},
+        "jurisdiction": {"type": "keyword"},
+        "control_ids": {"type": "keyword"},
+        "date": {"type": "keyword"},
+        "title": {"type": "text"},
+        "content": {"type": "text"},
+        "source_path": {"type": "keyword"},
+        "chunk_id": {"type": "keyword"},
+        "section": {"type": "keyword"},
+        "char_start": {"type": "integer"},
+        "char_end": {"type": "integer"},
+    }
+}
+if EMBEDDINGS_ENABLED:
+    INDEX_MAPPINGS["properties"]["embedding"] = embedding_mapping()
+
+# Callbacks run with an index/alias name after documents in it were written or the alias
+# moved (e.g. search_cache invalidation). Listener errors are logged, never raised.
+_WRITE_LISTENERS: List[Callable[[str], None]] = []
+
+def on_index_write(fn: Callable[[str], None]) -> Callable[[str], None]:
+    if fn not in _WRITE_LISTENERS:
+        _WRITE_LISTENERS.append(fn)
+    return fn
+
+def _notify_write(*indices: str) -> None:
+    for index in indices:
+        for fn in list(_WRITE_LISTENERS):
+            try:
+                fn(index)
+            except Exception as e:
+                logger.warning(f"Index write listener failed for {index}: {e}")
+
+# Callbacks run with (index, action, source) for every chunk index/delete an ingest applied,
+# and with an alias name when a rebuild or rollback replaced its whole contents; they let
+# derived in-memory state (e.g. controls_index) follow ingests incrementally.
+_ACTION_LISTENERS: List[Callable[[str, Dict[str, Any], Optional[Dict[str, Any]]], None]] = []
+_REPLACE_LISTENERS: List[Callable[[str], None]] = []
+
+def on_index_action(fn: Callable[[str, Dict[str, Any], Optional[Dict[str, Any]]], None]) -> Callable[[str, Dict[str, Any], Optional[Dict[str, Any]]], None]:
+    if fn not in _ACTION_LISTENERS:
+        _ACTION_LISTENERS.append(fn)
+    return fn
+
+def on_index_replace(fn: Callable[[str], None]) -> Callable[[str], None]:
+    if fn not in _REPLACE_LISTENERS:
+        _REPLACE_LISTENERS.append(fn)
+    return fn
+
+def _notify_action(index: str, action: Dict[str, Any], source: Optional[Dict[str, Any]]) -> None:
+    for fn in _ACTION_LISTENERS:
+        try:
+            fn(index, action, source)
+        except Exception as e:
+            logger.warning(f"Index action listener failed for {index}: {e}")
+
+def _notify_replace(alias: str) -> None:
+    for fn in list(_REPLACE_LISTENERS):
+        try:
+            fn(alias)
+        except Exception as e:
+            logger.warning(f"Index replace listener failed for {alias}: {e}")
+
+def _mapping_update() -> Optional[Dict[str, Any]]:
+    # Fields an index created before they existed still needs; adding a field to an
+    # existing mapping is allowed and idempotent
+    return {"embedding": embedding_mapping()} if EMBEDDINGS_ENABLED else None
 
 def ensure_index(client: Elasticsearch, index: str) -> None:
+    # Also true when index is an alias (see rebuild_index)
     if client.indices.exists(index=index):
+        if (properties := _mapping_update()) is not None:
+            client.indices.put_mapping(index=index, properties=properties)
         return
 
-    mapping = {
-        "mappings": {
-            "properties": {
-                "doc_id": {"type": "keyword"},
-                "doc_type": {"type": "keyword"},
-                "stakeholder": {"type": "keyword"},
-                "system": {"type": "keyword"},
-                "jurisdiction": {"type": "keyword"},
-                "control_ids": {"type": "keyword"},
-                "date": {"type": "keyword"},
-                "title": {"type": "text"},
-                "content": {"type": "text"},
-                "source_path": {"type": "keyword"},
-                "chunk_id": {"type": "keyword"},
-                "section": {"type": "keyword"},
-            }
-        }
+    client.indices.create(index=index, mappings=INDEX_MAPPINGS)
+
+async def async_ensure_index(client: AsyncElasticsearch, index: str) -> None:
+    if await client.indices.exists(index=index):
+        if (properties := _mapping_update()) is not None:
+            await client.indices.put_mapping(index=index, properties=properties)
+        return
+
+    await client.indices.create(index=index, mappings=INDEX_MAPPINGS)
+
+# Bulk ingest tuning. Batches are capped by action count *and* serialized size so a
+# single request never exceeds the cluster's http.max_content_length.
+BULK_CHUNK_SIZE = int(os.getenv("AURORA_BULK_CHUNK_SIZE", "500"))
+BULK_MAX_BYTES = int(os.getenv("AURORA_BULK_MAX_BYTES", str(10 * 1024 * 1024)))
+BULK_THREADS = int(os.getenv("AURORA_BULK_THREADS", "4"))
+BULK_MAX_RETRIES = int(os.getenv("AURORA_BULK_MAX_RETRIES", "5"))
+BULK_INITIAL_BACKOFF = float(os.getenv("AURORA_BULK_INITIAL_BACKOFF", "1.0"))
+BULK_MAX_BACKOFF = 30.0
+MAX_ERROR_SAMPLES = 20
+
+Action = Tuple[Dict[str, Any], Optional[Dict[str, Any]]]
+
+class IngestCancelled(Exception):
+    """Raised out of index_corpus() when its cancel event is set. The manifest is not saved."""
+
+def _chunk_body(d: CorpusDoc, c: Any) -> Dict[str, Any]:
+    body = {
+        "doc_id": d.doc_id,
+        "doc_type": d.doc_type,
+        "stakeholder": d.stakeholder,
+        "system": d.system,
+        "jurisdiction": d.jurisdiction,
+        "control_ids": d.control_ids,
+        "date": d.date,
+        "title": d.title,
+        "content": c.text,
+        "source_path": d.source_path,
+        "chunk_id": c.chunk_id,
+        "section": c.section,
+        "char_start": c.start,
+        "char_end": c.end,
     }
-    client.indices.create(index=index, **mapping)
+    if EMBEDDINGS_ENABLED:
+        vec = embed(c.text)
+        # Text without word features (e.g. only table rules) embeds to all zeros, which a
+        # cosine dense_vector rejects; such a chunk is left to BM25
+        if any(vec):
+            body["embedding"] = vec
+    return body
 
-def index_corpus(client: Elasticsearch, index: str, docs: List[CorpusDoc]) -> Dict[str, Any]:
-    ensure_index(client, index)
+def _iter_actions(
+    index: str,
+    docs: Iterable[CorpusDoc],
+    stats: Dict[str, int],
+    manifest: Optional[CorpusManifest] = None,
+    removed: Optional[Iterable[str]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Iterator[Action]:
+    """Lazily turn docs into (action, source) pairs, counting as we go.
+    With a manifest, also emit deletes for chunks a changed file no longer produces and,
+    once docs is exhausted, for every chunk of a removed file.
+    """
+    for d in docs:
+        if cancel is not None and cancel.is_set():
+            raise IngestCancelled()
+        stats["docs"] += 1
+        chunk_ids: List[str] = []
+        for c in chunk_text(d.doc_id, d.body):
+            stats["chunks"] += 1
+            chunk_ids.append(c.chunk_id)
+            yield {"index": {"_index": index, "_id": c.chunk_id}}, _chunk_body(d, c)
+        if manifest is not None:
+            for cid in manifest.record(d.source_path, d.mtime, d.size, d.sha256, chunk_ids):
+                stats["deleted_chunks"] += 1
+                yield _delete_action(index, cid)
+
+    if manifest is None:
+        return
+    # Only valid after docs is exhausted: the scan has now marked every file it saw
+    for path in (manifest.unseen() if removed is None else list(removed)):
+        stats["removed_docs"] += 1
+        for cid in manifest.forget(path):
+            stats["deleted_chunks"] += 1
+            yield _delete_action(index, cid)
 
+def _delete_action(index: str, chunk_id: str) -> Action:
+    return {"delete": {"_index": index, "_id": chunk_id}}, None
+
+def _iter_batches(actions: Iterable[Action], max_count: int, max_bytes: int) -> Iterator[List[Action]]:
+    batch: List[Action] = []
+    size = 0
+    for action, source in actions:
+        # +1 per line for the NDJSON newline
+        item_bytes = len(json.dumps(action)) + 1
+        if source is not None:
+            item_bytes += len(json.dumps(source, ensure_ascii=False).encode("utf-8")) + 1
+        if batch and (len(batch) >= max_count or size + item_bytes > max_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append((action, source))
+        size += item_bytes
+    if batch:
+        yield batch
+
+def _response_body(resp: Any) -> Dict[str, Any]:
+    return resp.body if hasattr(resp, "body") else resp
+
+def _bulk_ops(pending: List[Action]) -> List[Dict[str, Any]]:
     ops: List[Dict[str, Any]] = []
-    total_chunks = 0
+    for action, source in pending:
+        ops.append(action)
+        if source is not None:
+            ops.append(source)
+    return ops
 
-    for d in docs:
-        chunks = chunk_text(d.doc_id, d.body)
-        for c in chunks:
-            total_chunks += 1
-            doc_body = {
-                "doc_id": d.doc_id,
-                "doc_type": d.doc_type,
-                "stakeholder": d.stakeholder,
-                "system": d.system,
-                "jurisdiction": d.jurisdiction,
-                "control_ids": d.control_ids,
-                "date": d.date,
-                "title": d.title,
-                "content": c.text,
-                "source_path": d.source_path,
-                "chunk_id": c.chunk_id,
-                "section": c.section,
-            }
-            ops.append({"index": {"_index": index, "_id": c.chunk_id}})
-            ops.append(doc_body)
-
-    if ops:
-        resp = client.bulk(operations=ops, refresh=True)
-        if hasattr(resp, "body"):
-            resp = resp.body
-        elif hasattr(resp, "meta"):
-            # Some client versions
-            resp = resp.body
-    else:
-        resp = {"items": []}
-
-    return {"indexed_docs": len(docs), "indexed_chunks": total_chunks, "bulk": resp}
-
-def search(client: Elasticsearch, index: str, q: str, filters: Optional[Dict[str, Any]] = None, size: int = 5) -> Dict[str, Any]:
-    filters = filters or {}
+def _backoff(attempt: int, initial_backoff: float) -> float:
+    return min(BULK_MAX_BACKOFF, initial_backoff * 2 ** attempt)
+
+def _check_items(pending: List[Action], resp: Dict[str, Any], result: Dict[str, Any], can_retry: bool) -> List[Action]:
+    """Tally one bulk response into result and pass the items the cluster applied on to the
+    action listeners; return the actions to retry (429s).
+    """
+    retry: List[Action] = []
+    for (action, source), item in zip(pending, resp.get("items", [])):
+        op_type, info = next(iter(item.items()))
+        status = info.get("status", 500)
+        if status < 300 or (op_type == "delete" and status == 404):
+            result["ok"] += 1
+            if _ACTION_LISTENERS:
+                _notify_action(action[op_type]["_index"], action, source)
+        elif status == 429 and can_retry:
+            retry.append((action, source))
+        else:
+            err = info.get("error") or {}
+            result["failed"].append({
+                "_id": info.get("_id"),
+                "op": op_type,
+                "status": status,
+                "type": err.get("type") if isinstance(err, dict) else None,
+                "reason": err.get("reason") if isinstance(err, dict) else str(err),
+            })
+    result["retries"] += len(retry)
+    return retry
+
+def _send_batch(client: Elasticsearch, batch: List[Action], max_retries: int, initial_backoff: float) -> Dict[str, Any]:
+    """Send one bulk request, retrying 429s (whole request or per item) with exponential backoff.
+    Returns counts plus the failed items; never the raw bulk response.
+    """
+    result: Dict[str, Any] = {"ok": 0, "retries": 0, "failed": []}
+    pending = batch
+    for attempt in range(max_retries + 1):
+        try:
+            resp = _response_body(client.bulk(operations=_bulk_ops(pending)))
+        except ApiError as e:
+            if e.meta.status != 429 or attempt == max_retries:
+                raise
+            result["retries"] += 1
+            time.sleep(_backoff(attempt, initial_backoff))
+            continue
+
+        pending = _check_items(pending, resp, result, attempt < max_retries)
+        if not pending:
+            break
+        time.sleep(_backoff(attempt, initial_backoff))
+    return result
+
+async def _async_send_batch(client: AsyncElasticsearch, batch: List[Action], max_retries: int, initial_backoff: float) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"ok": 0, "retries": 0, "failed": []}
+    pending = batch
+    for attempt in range(max_retries + 1):
+        try:
+            resp = _response_body(await client.bulk(operations=_bulk_ops(pending)))
+        except ApiError as e:
+            if e.meta.status != 429 or attempt == max_retries:
+                raise
+            result["retries"] += 1
+            await asyncio.sleep(_backoff(attempt, initial_backoff))
+            continue
+
+        pending = _check_items(pending, resp, result, attempt < max_retries)
+        if not pending:
+            break
+        await asyncio.sleep(_backoff(attempt, initial_backoff))
+    return result
+
+def _new_summary() -> Dict[str, Any]:
+    return {"ok": 0, "errors": 0, "retries": 0, "batches": 0, "error_types": {}, "error_samples": []}
+
+def _merge_batch(summary: Dict[str, Any], r: Dict[str, Any]) -> None:
+    summary["ok"] += r["ok"]
+    summary["retries"] += r["retries"]
+    summary["errors"] += len(r["failed"])
+    for f in r["failed"]:
+        key = f.get("type") or str(f.get("status"))
+        summary["error_types"][key] = summary["error_types"].get(key, 0) + 1
+        if len(summary["error_samples"]) < MAX_ERROR_SAMPLES:
+            summary["error_samples"].append(f)
+
+def bulk_stream(
+    client: Elasticsearch,
+    actions: Iterable[Action],
+    chunk_size: int = BULK_CHUNK_SIZE,
+    max_chunk_bytes: int = BULK_MAX_BYTES,
+    thread_count: int = BULK_THREADS,
+    max_retries: int = BULK_MAX_RETRIES,
+    initial_backoff: float = BULK_INITIAL_BACKOFF,
+    on_batch: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Stream actions to _bulk in capped batches with up to thread_count requests in flight.
+    Memory use is bounded by thread_count batches regardless of corpus size.
+    on_batch(summary) is called after each batch completes.
+    """
+    summary = _new_summary()
+
+    def collect(fut: Future) -> None:
+        _merge_batch(summary, fut.result())
+        if on_batch:
+            on_batch(summary)
+
+    with ThreadPoolExecutor(max_workers=max(1, thread_count)) as pool:
+        in_flight: set = set()
+        for batch in _iter_batches(actions, chunk_size, max_chunk_bytes):
+            if len(in_flight) >= max(1, thread_count):
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    collect(fut)
+            in_flight.add(pool.submit(_send_batch, client, batch, max_retries, initial_backoff))
+            summary["batches"] += 1
+        for fut in in_flight:
+            collect(fut)
+    return summary
+
+async def async_bulk_stream(
+    client: AsyncElasticsearch,
+    actions: Iterable[Action],
+    chunk_size: int = BULK_CHUNK_SIZE,
+    max_chunk_bytes: int = BULK_MAX_BYTES,
+    thread_count: int = BULK_THREADS,
+    max_retries: int = BULK_MAX_RETRIES,
+    initial_backoff: float = BULK_INITIAL_BACKOFF,
+    on_batch: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """bulk_stream() on the event loop: up to thread_count bulk requests in flight as tasks.
+    Batches are built in a worker thread, since pulling actions reads and chunks files.
+    """
+    summary = _new_summary()
+    batches = _iter_batches(actions, chunk_size, max_chunk_bytes)
+    slots = asyncio.Semaphore(max(1, thread_count))
+    tasks: List[asyncio.Task] = []
+
+    async def send(batch: List[Action]) -> None:
+        try:
+            _merge_batch(summary, await _async_send_batch(client, batch, max_retries, initial_backoff))
+        finally:
+            slots.release()
+        if on_batch:
+            on_batch(summary)
+
+    try:
+        while True:
+            await slots.acquire()
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            tasks.append(asyncio.create_task(send(batch)))
+            summary["batches"] += 1
+    finally:
+        await asyncio.gather(*tasks)
+    return summary
+
+def _index_stats() -> Dict[str, int]:
+    return {"docs": 0, "chunks": 0, "deleted_chunks": 0, "removed_docs": 0}
+
+def _progress_hook(stats: Dict[str, int], manifest: Optional[CorpusManifest], progress: Optional[Callable[[Dict[str, Any]], None]]) -> Callable[[Dict[str, Any]], None]:
+    def on_batch(summary: Dict[str, Any]) -> None:
+        if progress:
+            progress({
+                "docs": stats["docs"],
+                "chunks": stats["chunks"],
+                "skipped_docs": manifest.skipped if manifest is not None else 0,
+                "deleted_chunks": stats["deleted_chunks"],
+                "errors": summary["errors"],
+            })
+    return on_batch
+
+def _index_result(stats: Dict[str, int], summary: Dict[str, Any], manifest: Optional[CorpusManifest], saved: bool) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"indexed_docs": stats["docs"], "indexed_chunks": stats["chunks"], "bulk": summary}
+    if manifest is not None:
+        out.update({
+            "skipped_docs": manifest.skipped,
+            "removed_docs": stats["removed_docs"],
+            "deleted_chunks": stats["deleted_chunks"],
+            "manifest": str(manifest.path),
+            "manifest_saved": saved,
+        })
+    return out
+
+def index_corpus(
+    client: Elasticsearch,
+    index: str,
+    docs: Iterable[CorpusDoc],
+    refresh: bool = True,
+    manifest: Optional[CorpusManifest] = None,
+    removed: Optional[Iterable[str]] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    save_manifest: bool = True,
+    **bulk_opts: Any,
+) -> Dict[str, Any]:
+    """Chunk and index docs as a stream. docs may be any iterable (e.g. iter_corpus()).
+    Refresh happens once at the end instead of on every bulk request.
+
+    Incremental mode: pass the same manifest given to iter_corpus(). Stale chunks of changed
+    files and all chunks of removed files (manifest.unseen(), or the explicit removed paths)
+    are deleted. The manifest is saved only if every bulk item succeeded, so a failed run is
+    simply retried in full next time.
+
+    progress(counts) is called after every bulk batch; setting cancel stops the run with
+    IngestCancelled once in-flight batches finish.
+    """
+    ensure_index(client, index)
+
+    stats = _index_stats()
+    actions = _iter_actions(index, docs, stats, manifest, removed, cancel)
+    summary = bulk_stream(client, actions, on_batch=_progress_hook(stats, manifest, progress), **bulk_opts)
+
+    if stats["chunks"] or stats["deleted_chunks"]:
+        if refresh:
+            client.indices.refresh(index=index)
+        _notify_write(index)
+
+    saved = manifest is not None and save_manifest and summary["errors"] == 0
+    if saved:
+        manifest.save()
+    return _index_result(stats, summary, manifest, saved)
+
+async def async_index_corpus(
+    client: AsyncElasticsearch,
+    index: str,
+    docs: Iterable[CorpusDoc],
+    refresh: bool = True,
+    manifest: Optional[CorpusManifest] = None,
+    removed: Optional[Iterable[str]] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    save_manifest: bool = True,
+    **bulk_opts: Any,
+) -> Dict[str, Any]:
+    """Async index_corpus() for AsyncElasticsearch; same arguments and result."""
+    await async_ensure_index(client, index)
+
+    stats = _index_stats()
+    actions = _iter_actions(index, docs, stats, manifest, removed, cancel)
+    summary = await async_bulk_stream(client, actions, on_batch=_progress_hook(stats, manifest, progress), **bulk_opts)
+
+    if stats["chunks"] or stats["deleted_chunks"]:
+        if refresh:
+            await client.indices.refresh(index=index)
+        _notify_write(index)
+
+    saved = manifest is not None and save_manifest and summary["errors"] == 0
+    if saved:
+        await asyncio.to_thread(manifest.save)
+    return _index_result(stats, summary, manifest, saved)
+
+# --- Zero-downtime rebuilds ---
+# Readers use an alias (AURORA_INDEX); a rebuild loads a fresh "<alias>-<timestamp>" index with
+# refresh and replicas off, then atomically repoints the alias. Older versions are kept for rollback.
+REBUILD_KEEP_VERSIONS = int(os.getenv("AURORA_REBUILD_KEEP_VERSIONS", "2"))
+
+def _version_name(alias: str, t: float) -> str:
+    """<alias>-<UTC time to the millisecond>-<random>: names sort by age and two rebuilds
+    started in the same millisecond still differ.
+    """
+    return f"{alias}-{time.strftime('%Y%m%d%H%M%S', time.gmtime(t))}{int(t * 1000) % 1000:03d}-{secrets.token_hex(2)}"
+
+def versioned_indices(client: Elasticsearch, alias: str) -> List[str]:
+    """Versioned indices for alias, oldest first."""
+    resp = _response_body(client.indices.get(index=f"{alias}-*", allow_no_indices=True, expand_wildcards="open"))
+    return sorted(resp.keys())
+
+def alias_targets(client: Elasticsearch, alias: str) -> List[str]:
+    if not client.indices.exists_alias(name=alias):
+        return []
+    return sorted(_response_body(client.indices.get_alias(name=alias)).keys())
+
+def _keep_concrete_index(client: Elasticsearch, alias: str) -> str:
+    """Clone the concrete index named alias to the oldest version name, so it stays
+    available to rollback_alias() once the alias takes its name.
+    """
+    copy = _version_name(alias, 0)
+    # Clone needs a write-blocked source; the original is dropped in the swap anyway
+    client.indices.put_settings(index=alias, settings={"index.blocks.write": True})
+    try:
+        client.indices.clone(index=alias, target=copy, settings={"index.blocks.write": None}, wait_for_active_shards="1")
+    except BaseException:
+        client.indices.put_settings(index=alias, settings={"index.blocks.write": None})
+        raise
+    return copy
+
+def _swap_alias(client: Elasticsearch, alias: str, new_index: str) -> Dict[str, Any]:
+    actions: List[Dict[str, Any]] = []
+    previous = alias_targets(client, alias)
+    kept = None
+    if not previous and client.indices.exists(index=alias):
+        # First rebuild of a legacy concrete index: keep a versioned copy, then drop it
+        # in the same atomic call that creates the alias
+        kept = _keep_concrete_index(client, alias)
+        actions.append({"remove_index": {"index": alias}})
+    for old in previous:
+        actions.append({"remove": {"index": old, "alias": alias}})
+    actions.append({"add": {"index": new_index, "alias": alias}})
+    try:
+        client.indices.update_aliases(actions=actions)
+    except BaseException:
+        if kept is not None:
+            client.indices.delete(index=kept, ignore_unavailable=True)
+            client.indices.put_settings(index=alias, settings={"index.blocks.write": None})
+        raise
+    return {"previous": previous, "replaced_concrete_index": kept is not None, "kept_concrete_index_as": kept}
+
+def rebuild_index(
+    client: Elasticsearch,
+    alias: str,
+    docs: Iterable[CorpusDoc],
+    manifest: Optional[CorpusManifest] = None,
+    replicas: Optional[int] = None,
+    warm_queries: Optional[List[str]] = None,
+    keep_versions: int = REBUILD_KEEP_VERSIONS,
+    allow_errors: bool = False,
+    **index_opts: Any,
+) -> Dict[str, Any]:
+    """Build a new versioned index for alias and atomically switch readers to it.
+
+    The live index is untouched until the swap, so searches never see half-built results.
+    If the load fails (or has bulk errors and allow_errors is False) the new index is
+    deleted and the alias stays where it was.
+    """
+    previous = alias_targets(client, alias)
+    if replicas is None:
+        replicas = int(os.getenv("AURORA_INDEX_REPLICAS", "1"))
+        if previous:
+            settings = _response_body(client.indices.get_settings(index=previous[-1], name="index.number_of_replicas"))
+            replicas = int(settings[previous[-1]]["settings"]["index"]["number_of_replicas"])
+
+    new_index = _version_name(alias, time.time())
+    client.indices.create(
+        index=new_index,
+        mappings=INDEX_MAPPINGS,
+        settings={"refresh_interval": "-1", "number_of_replicas": 0},
+    )
+    try:
+        resp = index_corpus(client, new_index, docs, refresh=False, manifest=manifest, save_manifest=False, **index_opts)
+        if resp["bulk"]["errors"] and not allow_errors:
+            raise RuntimeError(f"Rebuild aborted: {resp['bulk']['errors']} bulk errors (see error_samples)")
+    except BaseException:
+        client.indices.delete(index=new_index, ignore_unavailable=True)
+        raise
+
+    client.indices.put_settings(index=new_index, settings={"refresh_interval": None, "number_of_replicas": replicas})
+    client.indices.refresh(index=new_index)
+    try:
+        client.cluster.health(index=new_index, wait_for_status="green" if replicas else "yellow", timeout="60s")
+    except ApiError as e:
+        # Replicas still allocating; primaries already serve reads
+        resp["health_warning"] = str(e)
+    # Load segments and caches before the first real query hits the new index
+    client.search(index=new_index, query={"match_all": {}}, size=1)
+    for q in warm_queries or []:
+        search(client, new_index, q, size=5)
+
+    swap = _swap_alias(client, alias, new_index)
+    _notify_write(alias)
+    _notify_replace(alias)
+    if manifest is not None:
+        manifest.save()
+        resp["manifest_saved"] = True
+
+    deleted: List[str] = []
+    older = [i for i in versioned_indices(client, alias) if i != new_index]
+    for old in older[:max(0, len(older) - keep_versions)]:
+        client.indices.delete(index=old, ignore_unavailable=True)
+        deleted.append(old)
+
+    return {"alias": alias, "index": new_index, "deleted_indices": deleted, **swap, **resp}
+
+def rollback_alias(client: Elasticsearch, alias: str) -> Dict[str, Any]:
+    """Point alias back at the newest versioned index older than the current one."""
+    current = alias_targets(client, alias)
+    candidates = [i for i in versioned_indices(client, alias) if not current or i < min(current)]
+    if not candidates:
+        raise ValueError(f"No previous index to roll back to for alias '{alias}'")
+    target = candidates[-1]
+    _swap_alias(client, alias, target)
+    _notify_write(alias)
+    _notify_replace(alias)
+    return {"alias": alias, "index": target, "previous": current}
+
+# Result views: which _source fields a search fetches and returns. "full" is the
+# original hit shape; "compact" leaves chunk text out (highlights remain); "ids" is for
+# callers that only need references.
+SEARCH_VIEWS: Dict[str, List[str]] = {
+    "full": ["doc_id", "doc_type", "stakeholder", "jurisdiction", "control_ids", "title", "content", "source_path", "chunk_id", "section", "char_start", "char_end"],
+    "compact": ["doc_id", "doc_type", "title", "source_path", "chunk_id", "section", "control_ids"],
+    "ids": ["chunk_id", "doc_id"],
+}
+
+def _filter_clauses(filters: Dict[str, Any]) -> List[Dict[str, Any]]:
     must_filters = []
     for key, value in filters.items():
         if value is None:
@@ -100,33 +703,217 @@ def search(client: Elasticsearch, index: str, q: str, filters: Optional[Dict[str
             must_filters.append({"terms": {key: value}})
         else:
             must_filters.append({"term": {key: value}})
+    return must_filters
+
+def _text_query(q: str) -> Dict[str, Any]:
+    return {"multi_match": {"query": q, "fields": ["content", "title", "doc_id", "doc_type"]}}
 
+def _search_body(q: str, filters: Dict[str, Any], size: int, view: str = "full") -> Dict[str, Any]:
     query = {
         "bool": {
-            "must": [
-                {"multi_match": {"query": q, "fields": ["content", "title", "doc_id", "doc_type"]}}
-            ],
-            "filter": must_filters
+            "must": [_text_query(q)],
+            "filter": _filter_clauses(filters)
         }
     }
+    body: Dict[str, Any] = {"query": query, "size": size, "_source": SEARCH_VIEWS[view]}
+    if view != "ids":
+        body["highlight"] = {"fields": {"content": {}}}
+    return body
 
-    resp = client.search(index=index, query=query, size=size, highlight={"fields": {"content": {}}})
-    hits_out = []
-    for h in resp.get("hits", {}).get("hits", []):
-        src = h.get("_source", {})
-        hits_out.append({
-            "score": h.get("_score"),
-            "doc_id": src.get("doc_id"),
-            "doc_type": src.get("doc_type"),
-            "stakeholder": src.get("stakeholder"),
-            "jurisdiction": src.get("jurisdiction"),
-            "control_ids": src.get("control_ids"),
-            "title": src.get("title"),
-            "content": src.get("content"),
-            "source_path": src.get("source_path"),
-            "chunk_id": src.get("chunk_id"),
-            "section": src.get("section"),
-            "highlights": h.get("highlight", {}),
-        })
+def _search_kwargs(body: Dict[str, Any]) -> Dict[str, Any]:
+    # The client takes _source as the `source` keyword
+    out = dict(body)
+    out["source"] = out.pop("_source")
+    return out
 
+def _hit(h: Dict[str, Any], fields: List[str], view: str) -> Dict[str, Any]:
+    src = h.get("_source", {})
+    hit = {"score": h.get("_score")}
+    for f in fields:
+        hit[f] = src.get(f)
+    if view != "ids":
+        hit["highlights"] = h.get("highlight", {})
+    return hit
+
+def _search_result(q: str, filters: Dict[str, Any], resp: Any, view: str = "full") -> Dict[str, Any]:
+    fields = SEARCH_VIEWS[view]
+    hits_out = [_hit(h, fields, view) for h in resp.get("hits", {}).get("hits", [])]
     return {"query": q, "filters": filters, "hits": hits_out}
+
+def search(client: Elasticsearch, index: str, q: str, filters: Optional[Dict[str, Any]] = None, size: int = 5, view: str = "full") -> Dict[str, Any]:
+    filters = filters or {}
+    resp = client.search(index=index, **_search_kwargs(_search_body(q, filters, size, view)))
+    return _search_result(q, filters, resp, view)
+
+async def async_search(client: AsyncElasticsearch, index: str, q: str, filters: Optional[Dict[str, Any]] = None, size: int = 5, view: str = "full") -> Dict[str, Any]:
+    """search() over AsyncElasticsearch, so async endpoints don't block the event loop."""
+    filters = filters or {}
+    resp = await client.search(index=index, **_search_kwargs(_search_body(q, filters, size, view)))
+    return _search_result(q, filters, resp, view)
+
+# A batch query: {"q": str, "filters": dict, "size": int, "index": optional override, "view": optional}
+SearchSpec = Dict[str, Any]
+
+def _msearch_body(index: str, queries: List[SearchSpec]) -> List[Dict[str, Any]]:
+    searches: List[Dict[str, Any]] = []
+    for spec in queries:
+        searches.append({"index": spec.get("index") or index})
+        searches.append(_search_body(spec["q"], spec.get("filters") or {}, spec.get("size", 5), spec.get("view", "full")))
+    return searches
+
+def _msearch_results(queries: List[SearchSpec], resp: Any) -> List[Dict[str, Any]]:
+    """One search() result per query, in order; failed queries get an "error" entry instead of hits."""
+    out: List[Dict[str, Any]] = []
+    for spec, r in zip(queries, _response_body(resp).get("responses", [])):
+        filters = spec.get("filters") or {}
+        if "error" in r:
+            err = r["error"]
+            out.append({
+                "query": spec["q"],
+                "filters": filters,
+                "error": {
+                    "status": r.get("status"),
+                    "type": err.get("type") if isinstance(err, dict) else None,
+                    "reason": err.get("reason") if isinstance(err, dict) else str(err),
+                },
+            })
+        else:
+            out.append(_search_result(spec["q"], filters, r, spec.get("view", "full")))
+    return out
+
+def msearch(client: Elasticsearch, index: str, queries: List[SearchSpec]) -> List[Dict[str, Any]]:
+    """Run many searches in one _msearch round trip."""
+    if not queries:
+        return []
+    return _msearch_results(queries, client.msearch(searches=_msearch_body(index, queries)))
+
+async def async_msearch(client: AsyncElasticsearch, index: str, queries: List[SearchSpec]) -> List[Dict[str, Any]]:
+    if not queries:
+        return []
+    return _msearch_results(queries, await client.msearch(searches=_msearch_body(index, queries)))
+
+# --- Hybrid retrieval ---
+# BM25 and kNN over the "embedding" field run as one _msearch and are merged client-side
+# with reciprocal rank fusion, so no RRF retriever/license is needed on the cluster.
+
+def _knn_body(q: str, filters: Dict[str, Any], size: int, view: str = "full") -> Dict[str, Any]:
+    body: Dict[str, Any] = {
+        "knn": {
+            "field": "embedding",
+            "query_vector": embed(q),
+            "k": size,
+            "num_candidates": max(100, size * 2),
+            "filter": _filter_clauses(filters),
+        },
+        "size": size,
+        "_source": SEARCH_VIEWS[view],
+    }
+    if view != "ids":
+        body["highlight"] = {"fields": {"content": {"highlight_query": _text_query(q)}}}
+    return body
+
+def _hybrid_searches(index: str, q: str, filters: Dict[str, Any], size: int, view: str) -> List[Dict[str, Any]]:
+    candidates = max(size, HYBRID_CANDIDATES)
+    searches = [{"index": index}, _search_body(q, filters, candidates, view)]
+    if any(embed(q)):
+        searches += [{"index": index}, _knn_body(q, filters, candidates, view)]
+    return searches
+
+def _hybrid_result(q: str, filters: Dict[str, Any], resp: Any, size: int, view: str) -> Dict[str, Any]:
+    lexical, *dense = _response_body(resp).get("responses", [{}])
+    if "error" in lexical:
+        raise RuntimeError(f"Search failed: {lexical['error']}")
+    ranked = [lexical.get("hits", {}).get("hits", [])]
+    # No dense response when the query has no word features (no vector to search with)
+    for knn in dense:
+        if "error" in knn:
+            # e.g. index built without embeddings; degrade to BM25 only
+            logger.warning(f"kNN stage failed, using BM25 only: {knn['error']}")
+        else:
+            ranked.append(knn.get("hits", {}).get("hits", []))
+    return _search_result(q, filters, {"hits": {"hits": rrf_fuse(ranked, size)}}, view)
+
+def hybrid_search(client: Elasticsearch, index: str, q: str, filters: Optional[Dict[str, Any]] = None, size: int = 5, view: str = "full") -> Dict[str, Any]:
+    """search() with BM25 + kNN rank fusion; "score" is the fused RRF score."""
+    filters = filters or {}
+    resp = client.msearch(searches=_hybrid_searches(index, q, filters, size, view))
+    return _hybrid_result(q, filters, resp, size, view)
+
+async def async_hybrid_search(client: AsyncElasticsearch, index: str, q: str, filters: Optional[Dict[str, Any]] = None, size: int = 5, view: str = "full") -> Dict[str, Any]:
+    filters = filters or {}
+    resp = await client.msearch(searches=_hybrid_searches(index, q, filters, size, view))
+    return _hybrid_result(q, filters, resp, size, view)
+
+# --- Deep pagination / export ---
+# A point-in-time keeps a consistent snapshot while search_after walks it page by page,
+# so any number of hits can be streamed with one page in memory at a time.
+EXPORT_PAGE_SIZE = int(os.getenv("AURORA_EXPORT_PAGE_SIZE", "500"))
+EXPORT_KEEP_ALIVE = os.getenv("AURORA_EXPORT_KEEP_ALIVE", "1m")
+
+def _export_page(q: Optional[str], filters: Dict[str, Any], view: str, pit_id: str, page_size: int, keep_alive: str, after: Optional[List[Any]]) -> Dict[str, Any]:
+    # No query text = every chunk matching the filters (e.g. a control or jurisdiction)
+    must = [_text_query(q)] if q else [{"match_all": {}}]
+    page: Dict[str, Any] = {
+        "pit": {"id": pit_id, "keep_alive": keep_alive},
+        "query": {"bool": {"must": must, "filter": _filter_clauses(filters)}},
+        "size": page_size,
+        "sort": [{"_score": "desc"}, {"_shard_doc": "asc"}],
+        "source": SEARCH_VIEWS[view],
+        "track_total_hits": False,
+    }
+    if after is not None:
+        page["search_after"] = after
+    return page
+
+def iter_search(
+    client: Elasticsearch,
+    index: str,
+    q: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    view: str = "full",
+    page_size: int = EXPORT_PAGE_SIZE,
+    keep_alive: str = EXPORT_KEEP_ALIVE,
+) -> Iterator[Dict[str, Any]]:
+    """Yield every matching hit (search() hit shape, without highlights) in score order."""
+    filters = filters or {}
+    fields = SEARCH_VIEWS[view]
+    pit_id = _response_body(client.open_point_in_time(index=index, keep_alive=keep_alive))["id"]
+    try:
+        after = None
+        while True:
+            resp = _response_body(client.search(**_export_page(q, filters, view, pit_id, page_size, keep_alive, after)))
+            pit_id = resp.get("pit_id", pit_id)
+            hits = resp.get("hits", {}).get("hits", [])
+            for h in hits:
+                yield _hit({**h, "highlight": {}}, fields, view)
+            if len(hits) < page_size:
+                break
+            after = hits[-1]["sort"]
+    finally:
+        client.close_point_in_time(id=pit_id)
+
+async def aiter_search(
+    client: AsyncElasticsearch,
+    index: str,
+    q: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    view: str = "full",
+    page_size: int = EXPORT_PAGE_SIZE,
+    keep_alive: str = EXPORT_KEEP_ALIVE,
+) -> AsyncIterator[Dict[str, Any]]:
+    filters = filters or {}
+    fields = SEARCH_VIEWS[view]
+    pit_id = _response_body(await client.open_point_in_time(index=index, keep_alive=keep_alive))["id"]
+    try:
+        after = None
+        while True:
+            resp = _response_body(await client.search(**_export_page(q, filters, view, pit_id, page_size, keep_alive, after)))
+            pit_id = resp.get("pit_id", pit_id)
+            hits = resp.get("hits", {}).get("hits", [])
+            for h in hits:
+                yield _hit({**h, "highlight": {}}, fields, view)
+            if len(hits) < page_size:
+                break
+            after = hits[-1]["sort"]
+    finally:
+        await client.close_point_in_time(id=pit_id)
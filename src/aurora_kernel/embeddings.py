@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import math
+from operator import mul
+import os
+import re
+import zlib
+from typing import Any, Dict, List, Sequence
+
+# CPU-only embeddings for the optional dense retrieval stage: signed feature hashing of
+# words and character n-grams into a fixed-size, L2-normalized vector. No model download,
+# deterministic across processes, and tolerant of typos/inflections that BM25 misses.
+
+EMBED_DIM = int(os.getenv("AURORA_EMBED_DIM", "768"))
+# Compute and store embeddings at ingest
+EMBEDDINGS_ENABLED = os.getenv("AURORA_EMBEDDINGS", "false").lower() == "true"
+# Default for queries: fuse BM25 with kNN (needs an index built with embeddings)
+HYBRID_DEFAULT = os.getenv("AURORA_HYBRID", "false").lower() == "true"
+# Candidates taken from each retriever before fusion
+HYBRID_CANDIDATES = int(os.getenv("AURORA_HYBRID_CANDIDATES", "50"))
+RRF_K = int(os.getenv("AURORA_RRF_K", "60"))
+
+NGRAM_SIZES = (3, 4, 5)
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+def embedding_mapping(dim: int = EMBED_DIM) -> Dict[str, Any]:
+    return {"type": "dense_vector", "dims": dim, "index": True, "similarity": "cosine"}
+
+def _features(text: str) -> Dict[str, float]:
+    counts: Dict[str, float] = {}
+    for word in _WORD_RE.findall(text.lower()):
+        counts["w:" + word] = counts.get("w:" + word, 0.0) + 1.0
+        padded = f"<{word}>"
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                g = padded[i:i + n]
+                counts[g] = counts.get(g, 0.0) + 1.0
+    return counts
+
+def embed(text: str, dim: int = EMBED_DIM) -> List[float]:
+    """Hashed word + char n-gram vector with sublinear tf, unit length (all zeros for text without word features)."""
+    vec = [0.0] * dim
+    for feat, count in _features(text).items():
+        h = zlib.crc32(feat.encode("utf-8"))
+        weight = 1.0 + math.log(count)
+        vec[h % dim] += weight if (h >> 31) & 1 else -weight
+    norm = math.sqrt(sum(v * v for v in vec))
+    if norm == 0:
+        return vec
+    return [v / norm for v in vec]
+
+def cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    """Dot product; embed() vectors are already unit length."""
+    return sum(map(mul, a, b))
+
+def _hit_key(hit: Dict[str, Any]) -> str:
+    src = hit.get("_source") or {}
+    return src.get("chunk_id") or hit.get("_id") or ""
+
+def rrf_fuse(ranked_lists: List[List[Dict[str, Any]]], size: int, k: int = RRF_K) -> List[Dict[str, Any]]:
+    """Reciprocal rank fusion of raw ES-style hit lists; "_score" becomes the fused score.
+    The first list's copy of a hit (e.g. BM25, which carries highlights) is kept.
+    """
+    fused: Dict[str, float] = {}
+    first: Dict[str, Dict[str, Any]] = {}
+    for hits in ranked_lists:
+        for rank, hit in enumerate(hits, 1):
+            key = _hit_key(hit)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+            if key not in first:
+                first[key] = hit
+            elif not first[key].get("highlight") and hit.get("highlight"):
+                first[key] = {**first[key], "highlight": hit["highlight"]}
+    order = sorted(fused, key=lambda key: -fused[key])[:size]
+    return [{**first[key], "_score": fused[key]} for key in order]
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from aurora_kernel.corpus_loader import count_corpus_files, iter_corpus
+from aurora_kernel import elastic_store
+from aurora_kernel.elastic_store import IngestCancelled
+from aurora_kernel.manifest import CorpusManifest, manifest_lock, manifest_path_for
+
+logger = logging.getLogger("aurora_kernel")
+
+MAX_FINISHED_JOBS = 50
+# Job state is written here so any worker can report or cancel a job another one runs
+# (next to the manifests by default); empty = only the worker that accepted a job knows it
+JOBS_DIR = os.getenv("AURORA_JOBS_DIR", str(Path(os.getenv("AURORA_MANIFEST_DIR", ".aurora")) / "jobs"))
+# Progress is written at most this often
+JOB_SAVE_INTERVAL_S = 1.0
+_FINISHED = ("succeeded", "failed", "cancelled")
+
+@dataclass
+class IngestJob:
+    job_id: str
+    corpus: str
+    index: str
+    incremental: bool = False
+    mode: str = "index"  # index | rebuild
+    status: str = "queued"  # queued | running | succeeded | failed | cancelled
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    total_files: Optional[int] = None
+    docs_processed: int = 0
+    chunks_processed: int = 0
+    skipped_docs: int = 0
+    deleted_chunks: int = 0
+    errors: int = 0
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        files_done = self.docs_processed + self.skipped_docs
+        docs_per_s = files_done / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.status == "running" and self.total_files and docs_per_s > 0:
+            eta = max(0.0, (self.total_files - files_done) / docs_per_s)
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "corpus": self.corpus,
+            "index": self.index,
+            "incremental": self.incremental,
+            "mode": self.mode,
+            "created_at": self.created_at,
+            "total_files": self.total_files,
+            "docs_processed": self.docs_processed,
+            "chunks_processed": self.chunks_processed,
+            "skipped_docs": self.skipped_docs,
+            "deleted_chunks": self.deleted_chunks,
+            "errors": self.errors,
+            "error": self.error,
+            "elapsed_s": round(elapsed, 3),
+            "docs_per_s": round(docs_per_s, 2),
+            "chunks_per_s": round(self.chunks_processed / elapsed, 2) if elapsed > 0 else 0.0,
+            "eta_s": round(eta, 1) if eta is not None else None,
+            "result": self.result,
+        }
+
+class StoredJob:
+    """A job run by another worker, as last written to the jobs directory."""
+
+    def __init__(self, state: Dict[str, Any]):
+        self.state = state
+        self.job_id = state["job_id"]
+        self.status = state["status"]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self.state)
+
+class IngestJobManager:
+    """Runs ingest jobs one at a time on a background thread and keeps their progress.
+
+    Loading is parallelized by iter_corpus() and bulk requests by index_corpus(), so a
+    single worker thread keeps a reindex from competing with request handling. With an
+    async_client_factory, index jobs run async_index_corpus() on the worker's own event loop
+    instead, so concurrent bulk requests are tasks rather than threads. With a state_dir,
+    job snapshots and cancel requests go through files there, so every worker sharing it
+    can answer for every job.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        max_workers: int = 1,
+        backend: Any = None,
+        async_client_factory: Optional[Callable[[], Any]] = None,
+        state_dir: Optional[Path] = None,
+    ):
+        self._client_factory = client_factory
+        # Returns a new async client (or None to use the sync path); called on the job's loop
+        self._async_client_factory = async_client_factory
+        # Module providing index_corpus/rebuild_index for the client (elastic_store or local_store)
+        self._backend = backend or elastic_store
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aurora-ingest")
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._state_dir = state_dir
+        # job_id -> time its state was last written
+        self._saved_at: Dict[str, float] = {}
+        if state_dir is not None:
+            try:
+                state_dir.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"Ingest job state kept in process only ({state_dir}): {e}")
+                self._state_dir = None
+
+    def submit(self, corpus: Path, index: str, incremental: bool = False, rebuild: bool = False) -> IngestJob:
+        """Queue an ingest. rebuild=True loads a fresh versioned index behind the alias `index`."""
+        job = IngestJob(
+            job_id=str(uuid.uuid4()),
+            corpus=str(corpus),
+            index=index,
+            incremental=incremental and not rebuild,
+            mode="rebuild" if rebuild else "index",
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._save(job, force=True)
+        self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob | StoredJob]:
+        job = self._jobs.get(job_id)
+        return job if job is not None else self._load(job_id)
+
+    def list_jobs(self) -> List[IngestJob | StoredJob]:
+        jobs: Dict[str, Any] = {}
+        if self._state_dir is not None:
+            for path in self._state_dir.glob("*.json"):
+                stored = self._load(path.stem)
+                if stored is not None:
+                    jobs[stored.job_id] = stored
+        jobs.update(self._jobs)
+        return sorted(jobs.values(), key=lambda j: j.snapshot()["created_at"])
+
+    def cancel(self, job_id: str) -> Optional[IngestJob | StoredJob]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            stored = self._load(job_id)
+            if stored is not None and stored.status not in _FINISHED:
+                # The worker running it checks for this file between batches
+                self._path(job_id, ".cancel").touch()
+            return stored
+        job.cancel_event.set()
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            self._save(job, force=True)
+        return job
+
+    def shutdown(self) -> None:
+        for job in self._jobs.values():
+            job.cancel_event.set()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.status in _FINISHED]
+        for j in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            self._jobs.pop(j.job_id, None)
+            self._saved_at.pop(j.job_id, None)
+            if self._state_dir is not None:
+                for suffix in (".json", ".cancel"):
+                    self._path(j.job_id, suffix).unlink(missing_ok=True)
+
+    def _path(self, job_id: str, suffix: str) -> Path:
+        assert self._state_dir is not None
+        return self._state_dir / f"{job_id}{suffix}"
+
+    def _save(self, job: IngestJob, force: bool = False) -> None:
+        if self._state_dir is None:
+            return
+        now = time.time()
+        if not force and now - self._saved_at.get(job.job_id, 0.0) < JOB_SAVE_INTERVAL_S:
+            return
+        self._saved_at[job.job_id] = now
+        path = self._path(job.job_id, ".json")
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            tmp.write_text(json.dumps(job.snapshot(), default=str), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not save ingest job {job.job_id}: {e}")
+
+    def _load(self, job_id: str) -> Optional[StoredJob]:
+        if self._state_dir is None or not job_id.replace("-", "").isalnum():
+            return None
+        try:
+            return StoredJob(json.loads(self._path(job_id, ".json").read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            return None
+
+    def _cancel_requested(self, job: IngestJob) -> bool:
+        if not job.cancel_event.is_set() and self._state_dir is not None and self._path(job.job_id, ".cancel").exists():
+            job.cancel_event.set()
+        return job.cancel_event.is_set()
+
+    def _progress(self, job: IngestJob, counts: Dict[str, Any]) -> None:
+        job.docs_processed = counts["docs"]
+        job.chunks_processed = counts["chunks"]
+        job.skipped_docs = counts["skipped_docs"]
+        job.deleted_chunks = counts["deleted_chunks"]
+        job.errors = counts["errors"]
+        self._cancel_requested(job)
+        self._save(job)
+
+    def _index_corpus(self, client: Any, **kwargs: Any) -> Dict[str, Any]:
+        if self._async_client_factory is None:
+            return self._backend.index_corpus(client, **kwargs)
+
+        async def run() -> Optional[Dict[str, Any]]:
+            aclient = self._async_client_factory()
+            if aclient is None:
+                return None
+            try:
+                return await self._backend.async_index_corpus(aclient, **kwargs)
+            finally:
+                await aclient.close()
+
+        resp = asyncio.run(run())
+        return resp if resp is not None else self._backend.index_corpus(client, **kwargs)
+
+    def _run(self, job: IngestJob) -> None:
+        if self._cancel_requested(job):
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = time.time()
+                self._save(job, force=True)
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        self._save(job, force=True)
+        corpus = Path(job.corpus)
+        try:
+            job.total_files = count_corpus_files(corpus)
+            client = self._client_factory()
+            opts: Dict[str, Any] = {"progress": lambda c: self._progress(job, c), "cancel": job.cancel_event}
+            if job.mode == "rebuild":
+                path = manifest_path_for(job.index)
+                # Holding the lock also pauses watch-mode writes to the old index meanwhile
+                with manifest_lock(path):
+                    manifest = CorpusManifest(path)
+                    resp = self._backend.rebuild_index(client, job.index, iter_corpus(corpus, manifest=manifest), manifest=manifest, **opts)
+            elif job.incremental:
+                path = manifest_path_for(job.index)
+                with manifest_lock(path):
+                    manifest = CorpusManifest.load(path)
+                    resp = self._index_corpus(client, index=job.index, docs=iter_corpus(corpus, manifest=manifest), manifest=manifest, **opts)
+            else:
+                resp = self._index_corpus(client, index=job.index, docs=iter_corpus(corpus), **opts)
+            job.docs_processed = resp["indexed_docs"]
+            job.chunks_processed = resp["indexed_chunks"]
+            job.errors = resp["bulk"]["errors"]
+            job.result = resp
+            job.status = "succeeded"
+        except IngestCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            logger.error(f"Ingest job {job.job_id} failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            self._save(job, force=True)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import logging
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from aurora_kernel.kibana_http import KIBANA_KEEPALIVE_EXPIRY
+from aurora_kernel.resilience import AGENT_GUARD, UpstreamGuard
+
+logger = logging.getLogger("aurora_kernel")
+
+# Optional lifespan task that pings Agent Builder while the API is idle, so the pooled
+# Kibana connection (see kibana_http) and the model behind the agent stay warm and the
+# first request after a quiet spell is not the slow one. While traffic is recent it pings
+# often enough to keep the connection open; once idle it backs off to an occasional ping
+# that only keeps the model warm, and never stops.
+
+KEEPWARM_ENABLED = os.getenv("AURORA_KEEPWARM", "false").lower() == "true"
+# Ping interval; clamped below KIBANA_KEEPALIVE_EXPIRY (with room for jitter and a slow
+# ping) so the pooled connection never expires between pings
+KEEPWARM_INTERVAL_S = min(float(os.getenv("AURORA_KEEPWARM_INTERVAL_S", "90")), KIBANA_KEEPALIVE_EXPIRY * 0.8)
+# After this long without agent traffic the deployment counts as idle
+KEEPWARM_ACTIVE_WINDOW_S = float(os.getenv("AURORA_KEEPWARM_ACTIVE_WINDOW_S", "1800"))
+# Ping interval while idle: the connection may expire in between (a cheap reconnect), the
+# model should not. Never shorter than KEEPWARM_INTERVAL_S
+KEEPWARM_IDLE_INTERVAL_S = max(float(os.getenv("AURORA_KEEPWARM_IDLE_INTERVAL_S", "600")), KEEPWARM_INTERVAL_S)
+# Ping latencies kept for the rolling distribution
+KEEPWARM_SAMPLES = int(os.getenv("AURORA_KEEPWARM_SAMPLES", "100"))
+KEEPWARM_PROMPT = "System warm-up check. Respond with 'OK'."
+
+def _demo_mode() -> bool:
+    return os.getenv("DEMO_MODE", "false").lower() == "true"
+
+def _percentile(sorted_values: list, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+class KeepWarm:
+    """Sends a cheap converse ping whenever no real agent call happened for one interval.
+
+    The task wakes every KEEPWARM_INTERVAL_S. While there was agent traffic in the last
+    KEEPWARM_ACTIVE_WINDOW_S it pings on every wake, keeping the pooled connection open;
+    after that it pings once per KEEPWARM_IDLE_INTERVAL_S, keeping the model warm. Pings are
+    skipped while the circuit is open and in demo mode; once it is half-open a ping may be
+    the probe.
+    """
+
+    def __init__(self, guard: UpstreamGuard = AGENT_GUARD):
+        self.guard = guard
+        # Set by api: sends one ping through the shared Kibana client
+        self.ping: Optional[Callable[[], Awaitable[Any]]] = None
+        self.started_at = time.time()
+        self.last_traffic: Optional[float] = None
+        self.last_ping: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._latencies: Deque[float] = deque(maxlen=max(1, KEEPWARM_SAMPLES))
+        self.pings = 0
+        self.errors = 0
+        self.skipped: Dict[str, int] = {"traffic": 0, "idle": 0, "circuit_open": 0, "demo": 0, "busy": 0}
+        self.running = False
+
+    def note_traffic(self) -> None:
+        """A real agent request; it keeps things warm on its own."""
+        self.last_traffic = time.time()
+
+    def idle(self, now: Optional[float] = None) -> bool:
+        """No agent traffic for KEEPWARM_ACTIVE_WINDOW_S (counted from startup before any)."""
+        now = now or time.time()
+        return now - (self.last_traffic or self.started_at) >= KEEPWARM_ACTIVE_WINDOW_S
+
+    def _skip_reason(self, now: float) -> Optional[str]:
+        if _demo_mode():
+            return "demo"
+        if self.guard.is_open:
+            return "circuit_open"
+        if self.guard.limiter.active or self.guard.limiter.queued:
+            return "busy"
+        if self.last_traffic is not None and now - self.last_traffic < KEEPWARM_INTERVAL_S:
+            return "traffic"
+        if self.idle(now) and self.last_ping is not None and now - self.last_ping < self.interval(now) * 0.9:
+            # Idle: the wake-ups in between only check the schedule (0.9 absorbs their jitter)
+            return "idle"
+        return None
+
+    def interval(self, now: Optional[float] = None) -> float:
+        """Time between pings under the current schedule."""
+        return KEEPWARM_IDLE_INTERVAL_S if self.idle(now) else KEEPWARM_INTERVAL_S
+
+    async def tick(self) -> Optional[float]:
+        """Ping unless there is a reason not to; returns the ping latency in seconds."""
+        now = time.time()
+        reason = self._skip_reason(now)
+        if reason is not None or self.ping is None:
+            if reason is not None:
+                self.skipped[reason] += 1
+            return None
+        self.last_ping = now
+        started = time.perf_counter()
+        try:
+            await self.ping()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            logger.warning(f"Keep-warm ping failed: {e}")
+            return None
+        elapsed = time.perf_counter() - started
+        self.pings += 1
+        self._latencies.append(elapsed)
+        return elapsed
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        self.running = True
+        try:
+            while not stop_event.is_set():
+                # Jitter keeps several workers from pinging in lockstep
+                delay = KEEPWARM_INTERVAL_S * random.uniform(0.9, 1.1)
+                try:
+                    await asyncio.wait_for(stop_event.wait(), delay)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                await self.tick()
+        finally:
+            self.running = False
+
+    def stats(self) -> Dict[str, Any]:
+        lat = sorted(self._latencies)
+        out: Dict[str, Any] = {
+            "enabled": KEEPWARM_ENABLED,
+            "running": self.running,
+            "interval_s": round(KEEPWARM_INTERVAL_S, 1),
+            "idle_interval_s": round(KEEPWARM_IDLE_INTERVAL_S, 1),
+            "idle": self.idle(),
+            "pings": self.pings,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "skipped": dict(self.skipped),
+            "last_ping_age_s": round(time.time() - self.last_ping, 1) if self.last_ping else None,
+            "last_traffic_age_s": round(time.time() - self.last_traffic, 1) if self.last_traffic else None,
+        }
+        if lat:
+            out["latency_ms"] = {
+                "samples": len(lat),
+                "p50": round(_percentile(lat, 0.5) * 1000, 1),
+                "p90": round(_percentile(lat, 0.9) * 1000, 1),
+                "p99": round(_percentile(lat, 0.99) * 1000, 1),
+                "max": round(lat[-1] * 1000, 1),
+                "last": round(self._latencies[-1] * 1000, 1),
+            }
+        return out
+
+# Process-wide scheduler; api wires the ping and runs it in the lifespan when AURORA_KEEPWARM=true
+KEEPWARM = KeepWarm()
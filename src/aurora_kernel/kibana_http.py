@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import importlib.util
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger("aurora_kernel")
+
+# One long-lived async client for Kibana (Agent Builder), opened in the API lifespan and
+# shared by every agent call, so DNS/TCP/TLS setup is paid once per pooled connection
+# and /agent/warmup leaves a hot connection behind.
+
+# HTTP/2 multiplexes concurrent converse streams over one connection; needs the h2 package
+KIBANA_HTTP2 = os.getenv("KIBANA_HTTP2", "true").lower() == "true"
+KIBANA_MAX_CONNECTIONS = int(os.getenv("KIBANA_MAX_CONNECTIONS", "20"))
+KIBANA_MAX_KEEPALIVE = int(os.getenv("KIBANA_MAX_KEEPALIVE", "10"))
+# Idle pooled connections are closed after this long
+KIBANA_KEEPALIVE_EXPIRY = float(os.getenv("KIBANA_KEEPALIVE_EXPIRY", "120"))
+KIBANA_CONNECT_TIMEOUT = float(os.getenv("KIBANA_CONNECT_TIMEOUT", "5"))
+# Max gap between streamed bytes, not total time: long agent answers keep streaming
+KIBANA_READ_TIMEOUT = float(os.getenv("KIBANA_READ_TIMEOUT", "60"))
+KIBANA_WRITE_TIMEOUT = float(os.getenv("KIBANA_WRITE_TIMEOUT", "10"))
+# Wait for a free pooled connection
+KIBANA_POOL_TIMEOUT = float(os.getenv("KIBANA_POOL_TIMEOUT", "5"))
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+class KibanaHTTP:
+    """Lazily created shared httpx.AsyncClient plus connection-level counters.
+
+    New TCP connections and TLS handshakes are counted through httpcore trace events, so
+    stats() shows how many requests reused a pooled connection.
+    """
+
+    def __init__(self) -> None:
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+        self.http2 = False
+        self.requests = 0
+        self.errors = 0
+        self.connects = 0
+        self.tls_handshakes = 0
+        self.connect_s = 0.0
+        self.http_versions: Dict[str, int] = {}
+        self.created_at: Optional[float] = None
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._make_client()
+        return self._client
+
+    def _make_client(self) -> httpx.AsyncClient:
+        self.http2 = KIBANA_HTTP2 and http2_available()
+        if KIBANA_HTTP2 and not self.http2:
+            logger.warning("KIBANA_HTTP2 is on but the h2 package is missing; using HTTP/1.1 keep-alive")
+        self.created_at = time.time()
+        return httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=KIBANA_MAX_CONNECTIONS,
+                max_keepalive_connections=KIBANA_MAX_KEEPALIVE,
+                keepalive_expiry=KIBANA_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                connect=KIBANA_CONNECT_TIMEOUT,
+                read=KIBANA_READ_TIMEOUT,
+                write=KIBANA_WRITE_TIMEOUT,
+                pool=KIBANA_POOL_TIMEOUT,
+            ),
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+        )
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        started: Dict[str, float] = {}
+
+        async def trace(name: str, info: Dict[str, Any]) -> None:
+            if name == "connection.connect_tcp.started":
+                started["connect"] = time.perf_counter()
+            elif name == "connection.connect_tcp.complete":
+                self.connects += 1
+                self.connect_s += time.perf_counter() - started.pop("connect", time.perf_counter())
+            elif name == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+
+        request.extensions["trace"] = trace
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        self.http_versions[response.http_version] = self.http_versions.get(response.http_version, 0) + 1
+        if response.status_code >= 400:
+            self.errors += 1
+
+    def _pool_connections(self) -> Dict[str, int]:
+        # httpcore internals; best effort only
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        conns = list(getattr(pool, "connections", []) or [])
+        return {
+            "open": len(conns),
+            "idle": sum(1 for c in conns if c.is_idle()),
+        }
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "open": self._client is not None,
+            "http2": self.http2,
+            "requests": self.requests,
+            "errors": self.errors,
+            "connects": self.connects,
+            "tls_handshakes": self.tls_handshakes,
+            # Share of requests served on an already-open connection
+            "reuse_ratio": round(1 - self.connects / self.requests, 4) if self.requests else 0.0,
+            "avg_connect_ms": round(self.connect_s / self.connects * 1000, 2) if self.connects else None,
+            "http_versions": dict(self.http_versions),
+            "limits": {
+                "max_connections": KIBANA_MAX_CONNECTIONS,
+                "max_keepalive": KIBANA_MAX_KEEPALIVE,
+                "keepalive_expiry_s": KIBANA_KEEPALIVE_EXPIRY,
+            },
+            "timeouts": {"connect": KIBANA_CONNECT_TIMEOUT, "read": KIBANA_READ_TIMEOUT, "write": KIBANA_WRITE_TIMEOUT, "pool": KIBANA_POOL_TIMEOUT},
+        }
+        if self._client is not None:
+            try:
+                out["connections"] = self._pool_connections()
+            except Exception:
+                pass
+        return out
+
+# Process-wide client; api opens it in the lifespan and closes it on shutdown
+KIBANA_HTTP = KibanaHTTP()
@@ -0,0 +1,493 @@
+from __future__ import annotations
+
+from array import array
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from aurora_kernel.corpus_loader import CorpusDoc
+from aurora_kernel.embeddings import HYBRID_CANDIDATES, cosine, embed, rrf_fuse
+from aurora_kernel.elastic_store import (
+    SEARCH_VIEWS,
+    SearchSpec,
+    _hit,
+    _index_result,
+    _index_stats,
+    _ACTION_LISTENERS,
+    _iter_actions,
+    _new_summary,
+    _notify_action,
+    _notify_replace,
+    _notify_write,
+    _progress_hook,
+    _search_result,
+)
+from aurora_kernel.manifest import CorpusManifest
+
+# Embedded search backend with the elastic_store interface (ensure_index, index_corpus,
+# search, msearch, rebuild_index, rollback_alias) for deployments without a cluster.
+# The "client" argument is a LocalStore. Each index is one memory-mapped file; updates
+# rewrite the file and swap it in atomically, so readers never see a partial index.
+
+LOCAL_INDEX_DIR = os.getenv("AURORA_LOCAL_INDEX_DIR", ".aurora/local")
+
+# Fields scored like ES multi_match best_fields: a doc's score is its best field's BM25
+TEXT_FIELDS = ("content", "title", "doc_id")
+KEYWORD_FIELDS = ("doc_type", "stakeholder", "jurisdiction", "control_ids")
+# Keyword fields of index files written before the header listed them
+_LEGACY_KEYWORD_FIELDS = ("doc_type", "stakeholder", "jurisdiction")
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Highlight fragments, roughly matching ES defaults (fragment_size=100, number_of_fragments=5)
+FRAGMENT_SIZE = 100
+MAX_FRAGMENTS = 5
+# Progress callbacks fire every N applied actions
+PROGRESS_EVERY = 500
+
+_MAGIC = b"AURLIDX1"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+def _term_key(field: str, term: str) -> bytes:
+    return f"{field}\x1f{term}".encode("utf-8")
+
+def _keyword_values(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value if v is not None]
+    return [str(value)]
+
+# --- On-disk format ---
+# magic | u64 header length | JSON header | 8-byte aligned sections.
+# Sections: doc_offsets (Q) + docs (JSON blobs), len_<field> (I) per text field,
+# term_offsets (Q) + terms (sorted "field\x1fterm" keys), post_offsets (Q) + postings
+# (I pairs: doc, term frequency). Keyword fields are indexed as terms with tf=1.
+# If chunks carry an "embedding", it is moved out of the JSON into a vectors (f) section
+# of n_docs * dim floats for brute-force kNN.
+
+def _write_index(path: Path, sources: Dict[str, Dict[str, Any]]) -> None:
+    ids = sorted(sources)
+    postings: Dict[bytes, List[int]] = {}
+    lengths = {f: array("I") for f in TEXT_FIELDS}
+    doc_offsets = array("Q", [0])
+    blob = bytearray()
+    dim = next((len(v["embedding"]) for v in sources.values() if v.get("embedding")), 0)
+    vectors = array("f")
+    for n, cid in enumerate(ids):
+        src = sources[cid]
+        if dim:
+            vec = src.get("embedding") or [0.0] * dim
+            vectors.extend(vec)
+            src = {k: v for k, v in src.items() if k != "embedding"}
+        raw = json.dumps(src, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        blob += raw
+        doc_offsets.append(len(blob))
+        for f in TEXT_FIELDS:
+            tokens = tokenize(str(src.get(f) or ""))
+            lengths[f].append(len(tokens))
+            tf: Dict[str, int] = {}
+            for t in tokens:
+                tf[t] = tf.get(t, 0) + 1
+            for t, c in tf.items():
+                postings.setdefault(_term_key(f, t), []).extend((n, c))
+        for f in KEYWORD_FIELDS:
+            for v in set(_keyword_values(src.get(f))):
+                postings.setdefault(_term_key(f, v), []).extend((n, 1))
+
+    terms = sorted(postings)
+    term_offsets = array("Q", [0])
+    term_blob = bytearray()
+    post_offsets = array("Q", [0])
+    post = array("I")
+    for t in terms:
+        term_blob += t
+        term_offsets.append(len(term_blob))
+        post.extend(postings[t])
+        post_offsets.append(len(post) // 2)
+
+    sections: List[Tuple[str, bytes, str]] = [
+        ("doc_offsets", doc_offsets.tobytes(), "Q"),
+        ("docs", bytes(blob), "B"),
+        *((f"len_{f}", lengths[f].tobytes(), "I") for f in TEXT_FIELDS),
+        ("term_offsets", term_offsets.tobytes(), "Q"),
+        ("terms", bytes(term_blob), "B"),
+        ("post_offsets", post_offsets.tobytes(), "Q"),
+        ("postings", post.tobytes(), "I"),
+        ("vectors", vectors.tobytes(), "f"),
+    ]
+    avgdl = {f: (sum(lengths[f]) / len(ids) if ids else 0.0) for f in TEXT_FIELDS}
+    # Offsets are relative to the start of the data area, which begins 8-byte aligned
+    layout: Dict[str, List[Any]] = {}
+    pos = 0
+    for name, data, code in sections:
+        layout[name] = [pos, len(data), code]
+        pos += len(data) + (-len(data) % 8)
+    header = json.dumps({
+        "n_docs": len(ids), "n_terms": len(terms), "dim": dim, "avgdl": avgdl,
+        "keyword_fields": list(KEYWORD_FIELDS), "sections": layout,
+    }).encode("utf-8")
+    header += b" " * (-(len(_MAGIC) + 8 + len(header)) % 8)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(_MAGIC)
+        fh.write(struct.pack("<Q", len(header)))
+        fh.write(header)
+        for _name, data, _code in sections:
+            fh.write(data)
+            fh.write(b"\0" * (-len(data) % 8))
+    os.replace(tmp, path)
+
+class LocalIndex:
+    """Read-only view of one index file; opening it only maps the file and parses the header."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        st = path.stat()
+        # Identifies the file version, so a rewrite by another process is noticed
+        self.version = (st.st_ino, st.st_mtime_ns)
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(fh.fileno()).st_size else None
+        if self._mm is None or self._mm[:8] != _MAGIC:
+            raise ValueError(f"Not a local search index: {path}")
+        (hlen,) = struct.unpack_from("<Q", self._mm, 8)
+        header = json.loads(bytes(self._mm[16:16 + hlen]))
+        self.n_docs: int = header["n_docs"]
+        self.n_terms: int = header["n_terms"]
+        self.avgdl: Dict[str, float] = header["avgdl"]
+        self.dim: int = header.get("dim", 0)
+        self.keyword_fields: Tuple[str, ...] = tuple(header.get("keyword_fields", _LEGACY_KEYWORD_FIELDS))
+        base = 16 + hlen
+        view = memoryview(self._mm)
+        self._sec: Dict[str, Any] = {}
+        for name, (off, length, code) in header["sections"].items():
+            mv = view[base + off:base + off + length]
+            self._sec[name] = mv.cast(code) if code != "B" else mv
+
+    def _term(self, i: int) -> bytes:
+        offs = self._sec["term_offsets"]
+        return bytes(self._sec["terms"][offs[i]:offs[i + 1]])
+
+    def postings(self, field: str, term: str) -> memoryview:
+        """(doc, tf) pairs flattened, or an empty view."""
+        key = _term_key(field, term)
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        post = self._sec["postings"]
+        if lo < self.n_terms and self._term(lo) == key:
+            offs = self._sec["post_offsets"]
+            return post[offs[lo] * 2:offs[lo + 1] * 2]
+        return post[0:0]
+
+    def doc_len(self, field: str, doc: int) -> int:
+        return self._sec[f"len_{field}"][doc]
+
+    def source(self, doc: int) -> Dict[str, Any]:
+        offs = self._sec["doc_offsets"]
+        return json.loads(bytes(self._sec["docs"][offs[doc]:offs[doc + 1]]))
+
+    def vector(self, doc: int) -> memoryview:
+        return self._sec["vectors"][doc * self.dim:(doc + 1) * self.dim]
+
+    def all_sources(self) -> Dict[str, Dict[str, Any]]:
+        """Every chunk, embeddings included, for rewriting the index."""
+        out = {}
+        for n in range(self.n_docs):
+            src = self.source(n)
+            if self.dim:
+                src["embedding"] = self.vector(n).tolist()
+            out[src["chunk_id"]] = src
+        return out
+
+class LocalStore:
+    """Directory of local indices, the local counterpart of an Elasticsearch client."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or LOCAL_INDEX_DIR)
+        self._indices: Dict[str, LocalIndex] = {}
+        self._lock = threading.Lock()
+        self._write_locks: Dict[str, threading.Lock] = {}
+
+    def path(self, index: str) -> Path:
+        return self.root / f"{index}.aidx"
+
+    def open(self, index: str) -> Optional[LocalIndex]:
+        """The current version of index, re-mapped if the file was rewritten (e.g. by the CLI)."""
+        path = self.path(index)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        idx = self._indices.get(index)
+        if idx is not None and idx.version == (st.st_ino, st.st_mtime_ns):
+            return idx
+        with self._lock:
+            idx = self._indices[index] = LocalIndex(path)
+            return idx
+
+    def write_lock(self, index: str) -> threading.Lock:
+        with self._lock:
+            return self._write_locks.setdefault(index, threading.Lock())
+
+    def replace(self, index: str, sources: Dict[str, Dict[str, Any]]) -> None:
+        _write_index(self.path(index), sources)
+        with self._lock:
+            self._indices[index] = LocalIndex(self.path(index))
+
+    def close(self) -> None:
+        with self._lock:
+            self._indices.clear()
+
+def make_local_store(root: Optional[str] = None) -> LocalStore:
+    return LocalStore(root)
+
+def ensure_index(store: LocalStore, index: str) -> None:
+    if not store.path(index).exists():
+        store.replace(index, {})
+
+def _apply(store: LocalStore, index: str, sources: Dict[str, Dict[str, Any]], actions: Iterable[Any], progress_hook: Callable[[Dict[str, Any]], None], applied: Optional[List[Any]] = None) -> Dict[str, Any]:
+    """Apply actions to sources in memory; with applied, also collect them for the action
+    listeners, which are only told once the rewritten file is in place."""
+    summary = _new_summary()
+    summary["batches"] = 1
+    for n, (action, source) in enumerate(actions, 1):
+        op, meta = next(iter(action.items()))
+        if op == "delete":
+            sources.pop(meta["_id"], None)
+        else:
+            sources[meta["_id"]] = source
+        if applied is not None:
+            applied.append((action, source))
+        summary["ok"] += 1
+        if n % PROGRESS_EVERY == 0:
+            progress_hook(summary)
+    progress_hook(summary)
+    return summary
+
+def index_corpus(
+    store: LocalStore,
+    index: str,
+    docs: Iterable[CorpusDoc],
+    refresh: bool = True,
+    manifest: Optional[CorpusManifest] = None,
+    removed: Optional[Iterable[str]] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    save_manifest: bool = True,
+    **_bulk_opts: Any,
+) -> Dict[str, Any]:
+    """elastic_store.index_corpus() for a local index; same arguments and result.
+    Changes become visible all at once when the rewritten file is swapped in (refresh is
+    implied), and a cancelled run leaves the index untouched.
+    """
+    with store.write_lock(index):
+        current = store.open(index)
+        sources = current.all_sources() if current is not None else {}
+        stats = _index_stats()
+        actions = _iter_actions(index, docs, stats, manifest, removed, cancel)
+        applied: Optional[List[Any]] = [] if _ACTION_LISTENERS else None
+        summary = _apply(store, index, sources, actions, _progress_hook(stats, manifest, progress), applied)
+        if current is None or stats["chunks"] or stats["deleted_chunks"]:
+            store.replace(index, sources)
+    for action, source in applied or []:
+        _notify_action(index, action, source)
+    if stats["chunks"] or stats["deleted_chunks"]:
+        _notify_write(index)
+
+    saved = manifest is not None and save_manifest
+    if saved:
+        manifest.save()
+    return _index_result(stats, summary, manifest, saved)
+
+def rebuild_index(store: LocalStore, alias: str, docs: Iterable[CorpusDoc], manifest: Optional[CorpusManifest] = None, **index_opts: Any) -> Dict[str, Any]:
+    """Replace the index with exactly docs. The previous file is kept for rollback_alias()."""
+    path = store.path(alias)
+    with store.write_lock(alias):
+        stats = _index_stats()
+        sources: Dict[str, Dict[str, Any]] = {}
+        actions = _iter_actions(alias, docs, stats, manifest, None, index_opts.get("cancel"))
+        summary = _apply(store, alias, sources, actions, _progress_hook(stats, manifest, index_opts.get("progress")))
+        # Write the new version next to the live one, then rotate; searches keep using the
+        # current file until the final rename, and the path never goes missing
+        staged = path.with_suffix(".aidx.next")
+        _write_index(staged, sources)
+        previous = path.exists()
+        if previous:
+            prev = path.with_suffix(".aidx.prev")
+            prev.unlink(missing_ok=True)
+            try:
+                os.link(path, prev)
+            except OSError:
+                shutil.copyfile(path, prev)
+        os.replace(staged, path)
+        store.open(alias)
+    _notify_write(alias)
+    _notify_replace(alias)
+    if manifest is not None:
+        manifest.save()
+    return {"alias": alias, "index": alias, "previous": [alias] if previous else [], "deleted_indices": [], **_index_result(stats, summary, manifest, manifest is not None)}
+
+def rollback_alias(store: LocalStore, alias: str) -> Dict[str, Any]:
+    path = store.path(alias)
+    prev = path.with_suffix(".aidx.prev")
+    with store.write_lock(alias):
+        if not prev.exists():
+            raise ValueError(f"No previous index to roll back to for alias '{alias}'")
+        os.replace(prev, path)
+    _notify_write(alias)
+    _notify_replace(alias)
+    return {"alias": alias, "index": alias, "previous": [alias]}
+
+def _allowed_docs(idx: LocalIndex, filters: Dict[str, Any]) -> Optional[Set[int]]:
+    allowed: Optional[Set[int]] = None
+    for key, value in filters.items():
+        if value is None:
+            continue
+        wanted = _keyword_values(value)
+        docs: Set[int] = set()
+        if key in idx.keyword_fields:
+            for v in wanted:
+                docs.update(idx.postings(key, v)[0::2])
+        else:
+            # Not indexed in this file (another field, or a file from an older version): scan
+            # the sources, so the filter still matches what an Elasticsearch term filter would
+            candidates = range(idx.n_docs) if allowed is None else sorted(allowed)
+            docs.update(n for n in candidates if not set(wanted).isdisjoint(_keyword_values(idx.source(n).get(key))))
+        allowed = docs if allowed is None else allowed & docs
+    return allowed
+
+def _highlight(text: str, terms: Set[str]) -> List[str]:
+    fragments: List[str] = []
+    frag_end = -1
+    for m in _TOKEN_RE.finditer(text):
+        if m.group(0).lower() not in terms or m.start() < frag_end:
+            continue
+        if len(fragments) == MAX_FRAGMENTS:
+            break
+        start = max(0, m.start() - FRAGMENT_SIZE // 3)
+        frag_end = min(len(text), start + FRAGMENT_SIZE)
+        piece = text[start:frag_end]
+        if frag_end < len(text) and " " in piece[m.end() - start:]:
+            # Don't cut the last word in half
+            piece = piece[:piece.rindex(" ")]
+        fragments.append(_TOKEN_RE.sub(lambda t: f"<em>{t.group(0)}</em>" if t.group(0).lower() in terms else t.group(0), piece).strip())
+    return fragments
+
+def _search_raw(idx: Optional[LocalIndex], q: str, filters: Dict[str, Any], size: int, view: str) -> Dict[str, Any]:
+    """Search one index and return an ES-shaped response for elastic_store._search_result()."""
+    if idx is None or idx.n_docs == 0:
+        return {"hits": {"hits": []}}
+    terms = list(dict.fromkeys(tokenize(q)))
+    return _raw_hits(idx, _bm25_scores(idx, terms, _allowed_docs(idx, filters)), size, terms, view)
+
+def _bm25_scores(idx: LocalIndex, terms: List[str], allowed: Optional[Set[int]]) -> Dict[int, float]:
+    """Best per-field BM25 score of every matching doc (like a best_fields multi_match)."""
+    scores: Dict[int, float] = {}
+    for f in TEXT_FIELDS:
+        avgdl = idx.avgdl.get(f) or 1.0
+        field_scores: Dict[int, float] = {}
+        for t in terms:
+            post = idx.postings(f, t)
+            df = len(post) // 2
+            if not df:
+                continue
+            idf = math.log(1 + (idx.n_docs - df + 0.5) / (df + 0.5))
+            for i in range(0, len(post), 2):
+                doc, tf = post[i], post[i + 1]
+                if allowed is not None and doc not in allowed:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * idx.doc_len(f, doc) / avgdl)
+                field_scores[doc] = field_scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        for doc, s in field_scores.items():
+            if s > scores.get(doc, 0.0):
+                scores[doc] = s
+    return scores
+
+def _knn_raw(idx: Optional[LocalIndex], q: str, filters: Dict[str, Any], size: int, view: str) -> Dict[str, Any]:
+    """Brute-force cosine kNN over the stored embeddings, same response shape as _search_raw()."""
+    if idx is None or idx.n_docs == 0 or not idx.dim:
+        return {"hits": {"hits": []}}
+    qv = embed(q, idx.dim)
+    allowed = _allowed_docs(idx, filters)
+    docs = range(idx.n_docs) if allowed is None else sorted(allowed)
+    scores = {doc: cosine(qv, idx.vector(doc)) for doc in docs}
+    return _raw_hits(idx, scores, size, tokenize(q), view)
+
+def _raw_hits(idx: LocalIndex, scores: Dict[int, float], size: int, terms: List[str], view: str) -> Dict[str, Any]:
+    top = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:size]
+    term_set = set(terms)
+    hits = []
+    for doc, score in top:
+        src = idx.source(doc)
+        hit: Dict[str, Any] = {"_score": score, "_source": src}
+        if view != "ids":
+            frags = _highlight(src.get("content") or "", term_set)
+            hit["highlight"] = {"content": frags} if frags else {}
+        hits.append(hit)
+    return {"hits": {"hits": hits}}
+
+def search(store: LocalStore, index: str, q: str, filters: Optional[Dict[str, Any]] = None, size: int = 5, view: str = "full") -> Dict[str, Any]:
+    filters = filters or {}
+    return _search_result(q, filters, _search_raw(store.open(index), q, filters, size, view), view)
+
+def iter_search(store: LocalStore, index: str, q: Optional[str] = None, filters: Optional[Dict[str, Any]] = None, view: str = "full") -> Iterator[Dict[str, Any]]:
+    """Every matching hit in score order, like elastic_store.iter_search(); sources are read lazily."""
+    idx = store.open(index)
+    if idx is None or idx.n_docs == 0:
+        return
+    fields = SEARCH_VIEWS[view]
+    allowed = _allowed_docs(idx, filters or {})
+    if q:
+        scores = _bm25_scores(idx, list(dict.fromkeys(tokenize(q))), allowed)
+    else:
+        scores = dict.fromkeys(range(idx.n_docs) if allowed is None else allowed, 1.0)
+    for doc, score in sorted(scores.items(), key=lambda kv: (-kv[1], kv[0])):
+        yield _hit({"_score": score, "_source": idx.source(doc), "highlight": {}}, fields, view)
+
+def hybrid_search(store: LocalStore, index: str, q: str, filters: Optional[Dict[str, Any]] = None, size: int = 5, view: str = "full") -> Dict[str, Any]:
+    """BM25 + kNN with reciprocal rank fusion, like elastic_store.hybrid_search()."""
+    filters = filters or {}
+    idx = store.open(index)
+    candidates = max(size, HYBRID_CANDIDATES)
+    ranked = [_search_raw(idx, q, filters, candidates, view)["hits"]["hits"], _knn_raw(idx, q, filters, candidates, view)["hits"]["hits"]]
+    return _search_result(q, filters, {"hits": {"hits": rrf_fuse(ranked, size)}}, view)
+
+def msearch(store: LocalStore, index: str, queries: List[SearchSpec]) -> List[Dict[str, Any]]:
+    out = []
+    for spec in queries:
+        target = spec.get("index") or index
+        if store.open(target) is None:
+            out.append({
+                "query": spec["q"],
+                "filters": spec.get("filters") or {},
+                "error": {"status": 404, "type": "index_not_found_exception", "reason": f"no such index [{target}]"},
+            })
+            continue
+        out.append(search(store, target, spec["q"], spec.get("filters"), spec.get("size", 5), spec.get("view", "full")))
+    return out
+
+async def async_search(store: LocalStore, index: str, q: str, filters: Optional[Dict[str, Any]] = None, size: int = 5, view: str = "full") -> Dict[str, Any]:
+    # In-process and typically sub-millisecond; not worth a thread hop
+    return search(store, index, q, filters, size, view)
+
+async def async_msearch(store: LocalStore, index: str, queries: List[SearchSpec]) -> List[Dict[str, Any]]:
+    return msearch(store, index, queries)
+
+async def async_hybrid_search(store: LocalStore, index: str, q: str, filters: Optional[Dict[str, Any]] = None, size: int = 5, view: str = "full") -> Dict[str, Any]:
+    return hybrid_search(store, index, q, filters, size, view)
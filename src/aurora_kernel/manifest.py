@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+import json
+import os
+from pathlib import Path
+import threading
+from typing import IO, Dict, List, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks below are process-local only
+    fcntl = None
+
+MANIFEST_SCHEMA_VERSION = "0.1.0"
+
+@dataclass
+class FileEntry:
+    path: str
+    mtime: float
+    size: int
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+def lock_file(path: Path, blocking: bool = True) -> Optional[IO[str]]:
+    """Exclusive advisory lock on path, held until unlock_file(). Returns None if
+    blocking=False and another process holds it. Without fcntl (Windows) the handle
+    carries no lock and only the process-local locks apply."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fh = open(path, "a+", encoding="utf-8")
+    if fcntl is None:
+        return fh
+    try:
+        fcntl.flock(fh, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        fh.close()
+        return None
+    except BaseException:
+        fh.close()
+        raise
+    return fh
+
+def unlock_file(fh: IO[str]) -> None:
+    if fcntl is not None:
+        fcntl.flock(fh, fcntl.LOCK_UN)
+    fh.close()
+
+class ManifestLock:
+    """Thread lock plus a file lock next to the manifest, so load -> ingest -> save cycles
+    are serialized across threads and across processes (API workers, the CLI).
+    """
+
+    def __init__(self, path: Path):
+        self.lock_path = path.with_name(path.name + ".lock")
+        self._thread_lock = threading.Lock()
+        self._fh: Optional[IO[str]] = None
+
+    def __enter__(self) -> "ManifestLock":
+        self._thread_lock.acquire()
+        try:
+            self._fh = lock_file(self.lock_path)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        fh, self._fh = self._fh, None
+        try:
+            if fh is not None:
+                unlock_file(fh)
+        finally:
+            self._thread_lock.release()
+
+_LOCKS: Dict[str, ManifestLock] = {}
+_LOCKS_GUARD = threading.Lock()
+
+def manifest_path_for(index: str) -> Path:
+    """Default on-disk location of the manifest for an index."""
+    root = Path(os.getenv("AURORA_MANIFEST_DIR", ".aurora"))
+    return root / f"manifest-{index}.json"
+
+def manifest_lock(path: Path) -> ManifestLock:
+    """Lock serializing load -> ingest -> save cycles on one manifest file."""
+    key = str(path.resolve())
+    with _LOCKS_GUARD:
+        return _LOCKS.setdefault(key, ManifestLock(path))
+
+class CorpusManifest:
+    """Per-file fingerprints (mtime, size, sha256) plus the chunk ids each file emitted.
+
+    Used by iter_corpus() to skip unchanged files and by index_corpus() to delete
+    chunks that a changed or removed file no longer produces.
+    """
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, FileEntry]] = None):
+        self.path = path
+        self.entries: Dict[str, FileEntry] = entries or {}
+        self.skipped = 0
+        self._seen: Set[str] = set()
+
+    @classmethod
+    def load(cls, path: Path) -> "CorpusManifest":
+        if not path.exists():
+            return cls(path)
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            # A corrupt manifest only costs a full re-ingest
+            return cls(path)
+        entries = {e["path"]: FileEntry(**e) for e in raw.get("files", [])}
+        return cls(path, entries)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "schema_version": MANIFEST_SCHEMA_VERSION,
+            "files": [asdict(e) for e in self.entries.values()],
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def mark_seen(self, path: str) -> None:
+        self._seen.add(path)
+
+    def is_unchanged(self, path: str, mtime: float, size: int) -> bool:
+        """Cheap stat-only check; no file read needed when this is True."""
+        e = self.entries.get(path)
+        return e is not None and e.mtime == mtime and e.size == size
+
+    def same_content(self, path: str, sha256: str, mtime: float, size: int) -> bool:
+        """Content check for files whose stat changed (e.g. touched or re-checked out)."""
+        e = self.entries.get(path)
+        if e is None or e.sha256 != sha256:
+            return False
+        e.mtime, e.size = mtime, size
+        return True
+
+    def record(self, path: str, mtime: float, size: int, sha256: str, chunk_ids: List[str]) -> List[str]:
+        """Store the new fingerprint for path and return chunk ids it no longer emits."""
+        old = self.entries.get(path)
+        self.entries[path] = FileEntry(path=path, mtime=mtime, size=size, sha256=sha256, chunk_ids=list(chunk_ids))
+        if old is None:
+            return []
+        keep = set(chunk_ids)
+        return [cid for cid in old.chunk_ids if cid not in keep]
+
+    def forget(self, path: str) -> List[str]:
+        """Drop path from the manifest and return the chunk ids it had emitted."""
+        old = self.entries.pop(path, None)
+        return list(old.chunk_ids) if old else []
+
+    def unseen(self) -> List[str]:
+        """Paths in the manifest that the last full scan did not visit (i.e. removed files)."""
+        return [p for p in self.entries if p not in self._seen]
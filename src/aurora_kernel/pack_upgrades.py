@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("aurora_kernel")
+
+# Agent runs that outlived their request deadline. The request already returned the
+# deterministic pack under a pack_id; the agent keeps running here and, when it finishes,
+# the stored pack is replaced by the agent-mode one (see api.agent_evidence_pack).
+
+# Default deadline for /agent/evidence_pack when the request does not set one (unset = wait)
+AGENT_DEADLINE_MS = int(os.getenv("AURORA_AGENT_DEADLINE_MS", "0")) or None
+# Finished entries kept for status polls
+MAX_FINISHED_UPGRADES = int(os.getenv("AURORA_MAX_FINISHED_UPGRADES", "500"))
+
+@dataclass
+class PackUpgrade:
+    pack_id: str
+    deadline_ms: int
+    status: str = "pending"  # pending | upgraded | failed | cancelled
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Future] = field(default=None, repr=False)
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "pack_id": self.pack_id,
+            "status": self.status,
+            "deadline_ms": self.deadline_ms,
+            "elapsed_s": round(end - self.created_at, 3),
+            "error": self.error,
+        }
+
+class PackUpgrades:
+    """pack_id -> PackUpgrade for agent runs still going (or recently finished) after
+    their request returned. Only used from the event loop.
+    """
+
+    def __init__(self, max_finished: int = MAX_FINISHED_UPGRADES):
+        self.max_finished = max_finished
+        self._entries: "OrderedDict[str, PackUpgrade]" = OrderedDict()
+        self.upgraded = 0
+        self.failed = 0
+
+    def track(self, pack_id: str, task: asyncio.Future, deadline_ms: int, on_result: Callable[[Any], None]) -> PackUpgrade:
+        """Follow task; on success on_result(task.result()) upgrades the stored pack."""
+        entry = PackUpgrade(pack_id=pack_id, deadline_ms=deadline_ms, task=task)
+        self._entries[pack_id] = entry
+
+        def finished(t: asyncio.Future) -> None:
+            if t.cancelled():
+                self._finish(entry, "cancelled", "Agent run cancelled")
+                return
+            error = t.exception()
+            if error is None:
+                try:
+                    on_result(t.result())
+                except Exception as e:
+                    error = e
+            if error is None:
+                self.upgraded += 1
+                self._finish(entry, "upgraded")
+            else:
+                logger.warning(f"Agent run for pack {pack_id} failed after its deadline: {error}")
+                self.failed += 1
+                self._finish(entry, "failed", str(error))
+
+        task.add_done_callback(finished)
+        return entry
+
+    def _finish(self, entry: PackUpgrade, status: str, error: Optional[str] = None) -> None:
+        entry.status = status
+        entry.error = error
+        entry.finished_at = time.time()
+        entry.task = None
+        entry.done.set()
+        finished = [k for k, e in self._entries.items() if e.status != "pending"]
+        for key in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._entries[key]
+
+    def get(self, pack_id: str) -> Optional[PackUpgrade]:
+        return self._entries.get(pack_id)
+
+    async def wait(self, pack_id: str, timeout_s: float) -> Optional[PackUpgrade]:
+        """Long-poll: the entry once it is no longer pending, or as it is after timeout_s."""
+        entry = self._entries.get(pack_id)
+        if entry is not None and entry.status == "pending" and timeout_s > 0:
+            try:
+                await asyncio.wait_for(entry.done.wait(), timeout_s)
+            except asyncio.TimeoutError:
+                pass
+        return entry
+
+    async def aclose(self) -> None:
+        """Shutdown: cancel agent runs still pending."""
+        tasks = [e.task for e in self._entries.values() if e.task is not None]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": sum(1 for e in self._entries.values() if e.status == "pending"),
+            "upgraded": self.upgraded,
+            "failed": self.failed,
+            "default_deadline_ms": AGENT_DEADLINE_MS,
+        }
+
+# Process-wide registry; api tracks runs here and cancels the pending ones on shutdown
+PACK_UPGRADES = PackUpgrades()
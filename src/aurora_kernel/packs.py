@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional
+
+# Evidence pack pipeline: retrieve -> map controls -> assemble.
+# Retrieval happens once per request (see api._retrieve_pack_hits()); every later stage
+# works on those prefetched hits, so the agent context, the deterministic pack and the
+# fallback pack are all built from the same search response.
+
+PACK_SCHEMA_VERSION = "0.1.0"
+# Hits kept as evidence in the deterministic pack
+DETERMINISTIC_PACK_SIZE = 8
+# P1: packs only cite actual sources, never expected outputs
+SOURCE_FILTER: Dict[str, Any] = {"doc_type": "source"}
+
+# Response views (see pack_view); "full" is the original Studio format
+PACK_VIEWS = ("full", "compact", "ids")
+# Per-chunk fields kept once in the compact view's "chunks" table
+CHUNK_FIELDS = ("doc_id", "doc_type", "title", "section", "source_path", "control_ids", "content")
+
+def retrieval_size(top_k: Optional[int]) -> int:
+    """One search must serve both the agent context (top_k) and the deterministic pack."""
+    return max(top_k or 0, DETERMINISTIC_PACK_SIZE)
+
+def take_hits(results: Dict[str, Any], n: int) -> Dict[str, Any]:
+    """The search response restricted to its top n hits."""
+    return {**results, "hits": results.get("hits", [])[:n]}
+
+def map_controls(hits: List[Dict[str, Any]]) -> List[str]:
+    controls = set()
+    for h in hits:
+        for cid in (h.get("control_ids") or []):
+            controls.add(cid)
+    return sorted(controls)
+
+def evidence_items(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "chunk_id": h.get("chunk_id"),
+            "doc_id": h.get("doc_id"),
+            "doc_type": h.get("doc_type"),
+            "source_path": h.get("source_path"),
+            "chunk": h.get("content") or h.get("chunk_id"),
+            "content": h.get("content"),
+            "score": h.get("score"),
+        }
+        for h in hits
+    ]
+
+def agent_attachments(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Context blocks sent to Agent Builder."""
+    return [
+        {
+            "title": h.get("title", "Untitled"),
+            "doc_id": h.get("doc_id", "unknown"),
+            "content": h.get("content", "") or h.get("chunk_id", ""),
+            "score": h.get("score"),
+        }
+        for h in hits
+    ]
+
+def assemble_deterministic_pack(
+    question: str,
+    scenario_id: Optional[str],
+    preset_id: Optional[str],
+    results: Dict[str, Any],
+    coverage: Optional[Callable[[List[str]], Optional[Dict[str, Any]]]] = None,
+) -> Dict[str, Any]:
+    """Deterministic (no LLM) evidence pack from an already-run search.
+    coverage(control_ids), if given, returns every chunk/doc backing each mapped control
+    (see controls_index); the pack omits control_coverage when it returns None.
+    """
+    results = take_hits(results, DETERMINISTIC_PACK_SIZE)
+    hits = results["hits"]
+    controls = map_controls(hits)
+    pack = {
+        "schema_version": PACK_SCHEMA_VERSION,
+        "scenario_id": scenario_id,
+        "preset_id": preset_id,
+        "summary": "This is a deterministic placeholder summary. Use Agent Mode for AI summary.",
+        "findings": ["Finding 1: Evidence found.", "Finding 2: Review controls."],
+        "claim": question,
+        "controls_mapped": controls,
+        "evidence": evidence_items(hits),
+        "gaps": ["No Agent Analysis performed."],
+        "fix_plan": ["Enable Agent Mode to generate fix plan."],
+        "raw_search": results,
+    }
+    control_coverage = coverage(controls) if coverage is not None else None
+    if control_coverage is not None:
+        pack["control_coverage"] = control_coverage
+    return pack
+
+def merge_agent_result(deterministic: Dict[str, Any], agent_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Overlay Agent Builder output on the deterministic pack."""
+    final_pack = deterministic.copy()
+    final_pack["mode"] = "agent_builder"
+    final_pack["agent_raw"] = agent_result
+    final_pack["schema_version"] = PACK_SCHEMA_VERSION
+
+    if agent_result.get("summary"):
+        final_pack["summary"] = agent_result["summary"]
+    if agent_result.get("findings"):
+        final_pack["findings"] = agent_result["findings"]
+    if agent_result.get("citations"):
+        # Map citations to evidence format if possible, or append
+        final_pack["citations_ai"] = agent_result["citations"]
+    return final_pack
+
+def _chunk_ref(h: Dict[str, Any]) -> str:
+    return h.get("chunk_id") or h.get("doc_id") or ""
+
+def pack_view(pack: Dict[str, Any], view: str = "full", context_hits: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Project a pack for the response.
+
+    full: unchanged. compact: normalized, every chunk body appears once in "chunks"
+    (keyed by chunk_id) and evidence/retrieval refer to it by chunk_id; raw_search and
+    the agent_raw copy are dropped. ids: like compact but without the chunks table.
+    context_hits are the chunks sent to the agent, if any.
+    """
+    if view == "full":
+        return pack
+    raw = pack.get("raw_search") or {}
+    hits = raw.get("hits", [])
+    out = {k: v for k, v in pack.items() if k not in ("raw_search", "evidence", "agent_raw")}
+    out["evidence"] = [{"chunk_id": _chunk_ref(h), "doc_id": h.get("doc_id"), "score": h.get("score")} for h in hits]
+    retrieval: Dict[str, Any] = {"query": raw.get("query"), "filters": raw.get("filters")}
+    if context_hits is not None:
+        retrieval["chunk_ids"] = [_chunk_ref(h) for h in context_hits]
+    out["retrieval"] = retrieval
+    if view == "compact":
+        chunks: Dict[str, Dict[str, Any]] = {}
+        for h in hits + list(context_hits or []):
+            ref = _chunk_ref(h)
+            if ref not in chunks:
+                chunks[ref] = {f: h.get(f) for f in CHUNK_FIELDS}
+        out["chunks"] = chunks
+    return out
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger("aurora_kernel")
+
+# Guard around Agent Builder calls: at most AURORA_AGENT_MAX_CONCURRENCY calls in flight
+# and a bounded wait queue behind them, plus a circuit breaker that fails calls at once
+# (callers fall back to the deterministic pack) while Kibana is erroring or slow.
+
+AGENT_MAX_CONCURRENCY = int(os.getenv("AURORA_AGENT_MAX_CONCURRENCY", "8"))
+AGENT_MAX_QUEUE = int(os.getenv("AURORA_AGENT_MAX_QUEUE", "16"))
+# Longest wait for a free slot before giving up
+AGENT_QUEUE_TIMEOUT_S = float(os.getenv("AURORA_AGENT_QUEUE_TIMEOUT_S", "5"))
+
+# Outcomes considered: the last BREAKER_WINDOW calls within BREAKER_WINDOW_S
+BREAKER_WINDOW = int(os.getenv("AURORA_BREAKER_WINDOW", "20"))
+BREAKER_WINDOW_S = float(os.getenv("AURORA_BREAKER_WINDOW_S", "120"))
+# No tripping before this many calls in the window
+BREAKER_MIN_CALLS = int(os.getenv("AURORA_BREAKER_MIN_CALLS", "5"))
+BREAKER_ERROR_RATE = float(os.getenv("AURORA_BREAKER_ERROR_RATE", "0.5"))
+# A call is slow when its first response byte takes longer than this
+BREAKER_SLOW_S = float(os.getenv("AURORA_BREAKER_SLOW_S", "15"))
+BREAKER_SLOW_RATE = float(os.getenv("AURORA_BREAKER_SLOW_RATE", "0.5"))
+# Open time after a trip; doubles on each failed probe up to BREAKER_MAX_OPEN_S
+BREAKER_OPEN_S = float(os.getenv("AURORA_BREAKER_OPEN_S", "30"))
+BREAKER_MAX_OPEN_S = float(os.getenv("AURORA_BREAKER_MAX_OPEN_S", "300"))
+# Calls let through while half-open; all must succeed to close the circuit
+BREAKER_PROBES = int(os.getenv("AURORA_BREAKER_PROBES", "1"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+class AgentUnavailable(Exception):
+    """The guard refused the call; nothing was sent upstream."""
+
+class CircuitOpen(AgentUnavailable):
+    pass
+
+class AgentOverloaded(AgentUnavailable):
+    pass
+
+class CircuitBreaker:
+    """closed -> open when the recent error rate or slow-call rate crosses its threshold;
+    open -> half_open after the open time; half_open -> closed once the probes succeed,
+    or back to open (for twice as long) on a failed probe.
+    """
+
+    def __init__(
+        self,
+        window: int = BREAKER_WINDOW,
+        window_s: float = BREAKER_WINDOW_S,
+        min_calls: int = BREAKER_MIN_CALLS,
+        error_rate: float = BREAKER_ERROR_RATE,
+        slow_s: float = BREAKER_SLOW_S,
+        slow_rate: float = BREAKER_SLOW_RATE,
+        open_s: float = BREAKER_OPEN_S,
+        max_open_s: float = BREAKER_MAX_OPEN_S,
+        probes: int = BREAKER_PROBES,
+    ):
+        self.window_s = window_s
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_s = slow_s
+        self.slow_rate = slow_rate
+        self.base_open_s = open_s
+        self.max_open_s = max_open_s
+        self.probes = probes
+        self.state = CLOSED
+        self.open_s = open_s
+        self.opened_at: Optional[float] = None
+        self.last_trip: Optional[str] = None
+        # (finished at, ok, slow)
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque(maxlen=max(1, window))
+        self._probing = 0
+        self._probe_ok = 0
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Admit a call (True) or refuse it (False); a True from half_open is a probe."""
+        if self.state == OPEN:
+            if time.monotonic() - (self.opened_at or 0.0) < self.open_s:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._probing = 0
+            self._probe_ok = 0
+            logger.info("Agent circuit half-open: probing Agent Builder")
+        if self.state == HALF_OPEN:
+            if self._probing >= self.probes:
+                self.rejected += 1
+                return False
+            self._probing += 1
+        return True
+
+    def record(self, ok: bool, latency_s: Optional[float]) -> None:
+        """latency_s None: the call's responsiveness is unknown (see UpstreamCall.buffered)."""
+        now = time.monotonic()
+        slow = latency_s is not None and latency_s > self.slow_s
+        if self.state == HALF_OPEN:
+            self._probing = max(0, self._probing - 1)
+            if ok and not slow:
+                self._probe_ok += 1
+                if self._probe_ok >= self.probes:
+                    self._close()
+            else:
+                self._trip("probe failed" if not ok else f"probe slow ({latency_s:.1f}s)", backoff=True)
+            return
+        if self.state == OPEN:
+            return  # a call admitted before the trip
+        self._outcomes.append((now, ok, slow))
+        calls, errors, slows = self._window(now)
+        if calls < self.min_calls:
+            return
+        if errors / calls >= self.error_rate:
+            self._trip(f"error rate {errors}/{calls}")
+        elif slows / calls >= self.slow_rate:
+            self._trip(f"slow calls {slows}/{calls} over {self.slow_s:g}s")
+
+    def release(self) -> None:
+        """A call that ended without an outcome (cancelled by its caller)."""
+        if self.state == HALF_OPEN:
+            self._probing = max(0, self._probing - 1)
+
+    def _window(self, now: float) -> Tuple[int, int, int]:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_s:
+            self._outcomes.popleft()
+        calls = len(self._outcomes)
+        errors = sum(1 for _t, ok, _s in self._outcomes if not ok)
+        slows = sum(1 for _t, ok, slow in self._outcomes if ok and slow)
+        return calls, errors, slows
+
+    def _trip(self, reason: str, backoff: bool = False) -> None:
+        self.open_s = min(self.max_open_s, self.open_s * 2) if backoff else self.base_open_s
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.last_trip = reason
+        self.trips += 1
+        self._outcomes.clear()
+        logger.warning(f"Agent circuit open for {self.open_s:g}s: {reason}")
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self.open_s = self.base_open_s
+        self.opened_at = None
+        self._outcomes.clear()
+        logger.info("Agent circuit closed: Agent Builder recovered")
+
+    def retry_in(self) -> Optional[float]:
+        if self.state != OPEN:
+            return None
+        return max(0.0, self.open_s - (time.monotonic() - (self.opened_at or 0.0)))
+
+    def stats(self) -> Dict[str, Any]:
+        calls, errors, slows = self._window(time.monotonic())
+        retry_in = self.retry_in()
+        return {
+            "state": self.state,
+            "retry_in_s": round(retry_in, 1) if retry_in is not None else None,
+            "last_trip": self.last_trip,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "window": {
+                "calls": calls,
+                "error_rate": round(errors / calls, 4) if calls else 0.0,
+                "slow_rate": round(slows / calls, 4) if calls else 0.0,
+            },
+            "thresholds": {
+                "min_calls": self.min_calls,
+                "error_rate": self.error_rate,
+                "slow_s": self.slow_s,
+                "slow_rate": self.slow_rate,
+                "open_s": self.open_s,
+            },
+        }
+
+class ConcurrencyLimiter:
+    """At most max_concurrency holders; up to max_queue callers wait (FIFO) for a slot,
+    anyone beyond that, or waiting longer than queue_timeout_s, is refused. Waiters are
+    plain futures of the running loop, so the limiter itself is not tied to one event loop.
+    """
+
+    def __init__(self, max_concurrency: int = AGENT_MAX_CONCURRENCY, max_queue: int = AGENT_MAX_QUEUE, queue_timeout_s: float = AGENT_QUEUE_TIMEOUT_S):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_s = queue_timeout_s
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.rejected = 0
+        self.timeouts = 0
+        self.peak_queue = 0
+        self.wait_s = 0.0
+        self.waited = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise AgentOverloaded(f"Agent Builder busy: {self.active} calls running, {len(self._waiters)} queued")
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self.peak_queue = max(self.peak_queue, len(self._waiters))
+        started = time.perf_counter()
+        try:
+            # release() hands its slot over by resolving the future
+            await asyncio.wait_for(asyncio.shield(fut), self.queue_timeout_s)
+        except BaseException as e:
+            if fut.done():
+                # Handed a slot just as we gave up: pass it on
+                self.release()
+            else:
+                fut.cancel()
+                self._waiters.remove(fut)
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+                raise AgentOverloaded(f"Agent Builder busy: no free slot within {self.queue_timeout_s:g}s") from None
+            raise
+        finally:
+            self.waited += 1
+            self.wait_s += time.perf_counter() - started
+
+    def release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                # The slot passes straight to the next waiter; active stays the same
+                fut.set_result(True)
+                return
+        self.active = max(0, self.active - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_s": self.queue_timeout_s,
+            "peak_queue": self.peak_queue,
+            "avg_wait_ms": round(self.wait_s / self.waited * 1000, 2) if self.waited else 0.0,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+class UpstreamCall:
+    """Handed to the body of UpstreamGuard.call(); first_byte() marks when the upstream
+    started answering (the first streamed event), which is the latency the breaker judges.
+    Streamed answers take as long as the model keeps writing, so the total is not judged.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.first_byte_s: Optional[float] = None
+        self.is_buffered = False
+
+    def first_byte(self) -> None:
+        if self.first_byte_s is None:
+            self.first_byte_s = time.perf_counter() - self.started
+
+    def buffered(self) -> None:
+        """The upstream sent the whole answer as one body (JSON mode): its headers only
+        arrive once the answer is written, so the wait says nothing about its health."""
+        self.is_buffered = True
+
+    @property
+    def latency_s(self) -> Optional[float]:
+        if self.is_buffered:
+            return None
+        return self.first_byte_s if self.first_byte_s is not None else time.perf_counter() - self.started
+
+class UpstreamGuard:
+    """Breaker + limiter for one upstream. Use as `async with guard.call() as c:`; raises
+    CircuitOpen / AgentOverloaded without calling the upstream when it must refuse.
+    """
+
+    def __init__(self, name: str, breaker: Optional[CircuitBreaker] = None, limiter: Optional[ConcurrencyLimiter] = None):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter or ConcurrencyLimiter()
+
+    @property
+    def is_open(self) -> bool:
+        return self.breaker.state == OPEN and (self.breaker.retry_in() or 0.0) > 0
+
+    @asynccontextmanager
+    async def call(self) -> AsyncIterator[UpstreamCall]:
+        if not self.breaker.allow():
+            raise CircuitOpen(f"{self.name} circuit open ({self.breaker.last_trip}); retry in {self.breaker.retry_in() or 0:.0f}s")
+        try:
+            await self.limiter.acquire()
+        except BaseException:
+            self.breaker.release()
+            raise
+        call = UpstreamCall()
+        try:
+            yield call
+        except (asyncio.CancelledError, GeneratorExit):
+            # The caller went away; says nothing about the upstream
+            self.breaker.release()
+            raise
+        except BaseException:
+            self.breaker.record(False, call.latency_s)
+            raise
+        else:
+            self.breaker.record(True, call.latency_s)
+        finally:
+            self.limiter.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"circuit": self.breaker.stats(), "concurrency": self.limiter.stats()}
+
+# Process-wide guard for Agent Builder converse calls (see api._converse_stream)
+AGENT_GUARD = UpstreamGuard("Agent Builder")
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from aurora_kernel.elastic_store import on_index_write
+
+logger = logging.getLogger("aurora_kernel")
+
+SEARCH_CACHE_SIZE = int(os.getenv("AURORA_SEARCH_CACHE_SIZE", "512"))
+SEARCH_CACHE_TTL_S = float(os.getenv("AURORA_SEARCH_CACHE_TTL_S", "300"))
+# sqlite file shared by all workers on a host (e.g. gunicorn), next to the manifests by
+# default. Its per-index generations are how an ingest in one process invalidates every
+# other's cache; set it to "" for an in-process cache only (single worker, no CLI ingests).
+SEARCH_CACHE_DB = os.getenv("AURORA_SEARCH_CACHE_DB", str(Path(os.getenv("AURORA_MANIFEST_DIR", ".aurora")) / "search-cache.sqlite"))
+# How long a worker trusts the shared generation it last read before reading it again, i.e.
+# how late it may notice another process's write
+SEARCH_CACHE_GEN_TTL_S = float(os.getenv("AURORA_SEARCH_CACHE_GEN_TTL_S", "1.0"))
+# Expired rows in the shared store are purged every N writes
+_PURGE_EVERY = 200
+
+def normalize_query(q: str) -> str:
+    return " ".join(q.split())
+
+def cache_key(index: str, q: str, filters: Optional[Dict[str, Any]], size: int, view: str = "full", hybrid: bool = False) -> str:
+    """Stable key: whitespace-normalized query, filters without None values and in sorted order."""
+    norm_filters = {}
+    for k, v in sorted((filters or {}).items()):
+        if v is None:
+            continue
+        norm_filters[k] = sorted(v, key=str) if isinstance(v, list) else v
+    raw = json.dumps([index, normalize_query(q), norm_filters, size, view, hybrid], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class _SharedStore:
+    """sqlite-backed entries plus per-index generations, shared between processes.
+
+    Bumping an index's generation invalidates every worker's entries for it, including
+    their in-memory copies (checked on each get).
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=1.0, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, idx TEXT, gen INTEGER, expires REAL, value TEXT)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS generations (idx TEXT PRIMARY KEY, gen INTEGER)")
+
+    def generation(self, index: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT gen FROM generations WHERE idx = ?", (index,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, index: str) -> int:
+        """Advance index's generation; returns the new one."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO generations (idx, gen) VALUES (?, 1) ON CONFLICT(idx) DO UPDATE SET gen = gen + 1", (index,)
+            )
+            self._conn.execute("DELETE FROM entries WHERE idx = ?", (index,))
+            return self._conn.execute("SELECT gen FROM generations WHERE idx = ?", (index,)).fetchone()[0]
+
+    def get(self, key: str, gen: int) -> Optional[Tuple[float, str]]:
+        with self._lock:
+            row = self._conn.execute("SELECT expires, value FROM entries WHERE key = ? AND gen = ?", (key, gen)).fetchone()
+        if row is None or row[0] < time.time():
+            return None
+        return row[0], row[1]
+
+    def put(self, key: str, index: str, gen: int, expires: float, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, idx, gen, expires, value) VALUES (?, ?, ?, ?, ?)",
+                (key, index, gen, expires, value),
+            )
+            self._writes += 1
+            if self._writes % _PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class SearchCache:
+    """LRU + TTL cache of search responses keyed by (index, query, filters, size, view, hybrid).
+
+    Values are stored as JSON so callers always get a private copy. Entries for an index
+    are dropped whenever elastic_store reports a write to it (see on_index_write).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = SEARCH_CACHE_SIZE,
+        ttl_s: float = SEARCH_CACHE_TTL_S,
+        shared_path: Optional[str] = None,
+        generation_ttl_s: float = SEARCH_CACHE_GEN_TTL_S,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.generation_ttl_s = generation_ttl_s
+        # key -> (index, generation, expires, json)
+        self._entries: "OrderedDict[str, Tuple[str, int, float, str]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        # index -> (shared generation, monotonic time it was read)
+        self._shared_generations: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._shared: Optional[_SharedStore] = None
+        if shared_path:
+            try:
+                self._shared = _SharedStore(Path(shared_path))
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Shared search cache disabled ({shared_path}): {e}")
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_s > 0
+
+    def generation(self, index: str) -> int:
+        """Current generation of index. Read it before searching and pass it to put(), so a
+        result fetched before a concurrent write is never cached as current.
+        """
+        if self._shared is not None:
+            now = time.monotonic()
+            with self._lock:
+                cached = self._shared_generations.get(index)
+            if cached is not None and now - cached[1] < self.generation_ttl_s:
+                return cached[0]
+            try:
+                gen = self._shared.generation(index)
+            except sqlite3.Error as e:
+                logger.warning(f"Shared search cache read failed: {e}")
+            else:
+                return self._remember_generation(index, gen, now)
+        return self._generations.get(index, 0)
+
+    def _remember_generation(self, index: str, gen: int, read_at: float) -> int:
+        # Generations only grow: a read that raced a bump must not put the older one back
+        with self._lock:
+            cached = self._shared_generations.get(index)
+            if cached is not None and cached[0] > gen:
+                return cached[0]
+            self._shared_generations[index] = (gen, read_at)
+        return gen
+
+    def get(self, index: str, q: str, filters: Optional[Dict[str, Any]], size: int, view: str = "full", hybrid: bool = False) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        key = cache_key(index, q, filters, size, view, hybrid)
+        gen = self.generation(index)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] == gen and entry[2] >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(entry[3])
+                del self._entries[key]
+                if entry[2] < now:
+                    self.expirations += 1
+        if self._shared is not None:
+            try:
+                row = self._shared.get(key, gen)
+            except sqlite3.Error as e:
+                logger.warning(f"Shared search cache read failed: {e}")
+                row = None
+            if row is not None:
+                with self._lock:
+                    self._store(key, (index, gen, row[0], row[1]))
+                    self.hits += 1
+                    self.shared_hits += 1
+                return json.loads(row[1])
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, index: str, q: str, filters: Optional[Dict[str, Any]], size: int, value: Dict[str, Any], generation: Optional[int] = None, view: str = "full", hybrid: bool = False) -> None:
+        if not self.enabled:
+            return
+        key = cache_key(index, q, filters, size, view, hybrid)
+        gen = self.generation(index)
+        if generation is not None and generation != gen:
+            return  # index written while this search ran
+        expires = time.time() + self.ttl_s
+        data = json.dumps(value, default=str)
+        with self._lock:
+            self._store(key, (index, gen, expires, data))
+        if self._shared is not None:
+            try:
+                self._shared.put(key, index, gen, expires, data)
+            except sqlite3.Error as e:
+                logger.warning(f"Shared search cache write failed: {e}")
+
+    def _store(self, key: str, entry: Tuple[str, int, float, str]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, index: str) -> None:
+        """Forget every cached result for index (an index name or alias)."""
+        with self._lock:
+            self._generations[index] = self._generations.get(index, 0) + 1
+            for key in [k for k, e in self._entries.items() if e[0] == index]:
+                del self._entries[key]
+            self.invalidations += 1
+        if self._shared is not None:
+            try:
+                gen = self._shared.bump(index)
+            except sqlite3.Error as e:
+                logger.warning(f"Shared search cache invalidation failed: {e}")
+            else:
+                # This process sees its own write at once, not after generation_ttl_s
+                self._remember_generation(index, gen, time.monotonic())
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "shared": self._shared is not None,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+# Process-wide cache; importing this module subscribes it to index writes, so any process
+# that indexes (API jobs, watch mode, the CLI) also invalidates the shared store.
+SEARCH_CACHE = SearchCache(shared_path=SEARCH_CACHE_DB or None)
+on_index_write(SEARCH_CACHE.invalidate)
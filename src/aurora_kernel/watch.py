@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import contextmanager
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from watchfiles import Change, awatch, watch
+
+from aurora_kernel.corpus_loader import iter_corpus
+from aurora_kernel.elastic_store import index_corpus
+from aurora_kernel.manifest import CorpusManifest, lock_file, manifest_lock, manifest_path_for, unlock_file
+
+logger = logging.getLogger("aurora_kernel")
+
+# watchfiles groups changes that arrive within this window into one batch
+WATCH_DEBOUNCE_MS = int(os.getenv("AURORA_WATCH_DEBOUNCE_MS", "1000"))
+
+def _split_changes(changes: Iterable[Tuple[Change, str]]) -> Tuple[List[Path], List[str]]:
+    """Return (paths to re-load, paths that no longer exist)."""
+    touched: Set[str] = set()
+    for _change, path in changes:
+        touched.add(Path(path).as_posix())
+    present = [Path(p) for p in sorted(touched) if Path(p).is_file()]
+    gone = [p for p in sorted(touched) if not Path(p).exists()]
+    return present, gone
+
+# index_fn: elastic_store.index_corpus or local_store.index_corpus, matching client
+IndexFn = Callable[..., Dict[str, Any]]
+
+def sync_paths(client: Any, index: str, corpus_root: Path, present: List[Path], gone: List[str], manifest_path: Optional[Path] = None, index_fn: IndexFn = index_corpus) -> Dict[str, Any]:
+    """Upsert the given files and delete chunks of removed files/directories.
+
+    Runs an incremental index_corpus() restricted to these paths, so unchanged content
+    (e.g. an editor saving without edits) is still skipped by hash.
+    """
+    manifest_path = manifest_path or manifest_path_for(index)
+    with manifest_lock(manifest_path):
+        manifest = CorpusManifest.load(manifest_path)
+        removed: List[str] = []
+        for g in gone:
+            # A removed directory shows up as a single event for the directory itself
+            prefix = g.rstrip("/") + "/"
+            removed.extend(p for p in manifest.entries if p == g or p.startswith(prefix))
+        docs = iter_corpus(corpus_root, manifest=manifest, paths=present, workers=1)
+        return index_fn(client, index=index, docs=docs, manifest=manifest, removed=removed)
+
+def initial_sync(client: Any, index: str, corpus_root: Path, manifest_path: Optional[Path] = None, index_fn: IndexFn = index_corpus) -> Dict[str, Any]:
+    """Full incremental scan so the index and manifest agree before watching starts."""
+    manifest_path = manifest_path or manifest_path_for(index)
+    with manifest_lock(manifest_path):
+        manifest = CorpusManifest.load(manifest_path)
+        return index_fn(client, index=index, docs=iter_corpus(corpus_root, manifest=manifest), manifest=manifest)
+
+@contextmanager
+def single_watcher(index: str, manifest_path: Optional[Path] = None) -> Iterator[bool]:
+    """Yields whether this process may watch the index. Every API worker runs the
+    lifespan; without this each of them would re-index every edit."""
+    path = manifest_path or manifest_path_for(index)
+    path = path.with_name(path.name + ".watch.lock")
+    fh = lock_file(path, blocking=False)
+    try:
+        yield fh is not None
+    finally:
+        if fh is not None:
+            unlock_file(fh)
+
+def _log_batch(present: List[Path], gone: List[str], resp: Dict[str, Any]) -> None:
+    logger.info(
+        f"Corpus watch: {len(present)} changed, {len(gone)} removed -> "
+        f"indexed_docs={resp['indexed_docs']} deleted_chunks={resp.get('deleted_chunks', 0)} errors={resp['bulk']['errors']}"
+    )
+
+def watch_corpus(
+    client: Any,
+    index: str,
+    corpus_root: Path,
+    debounce_ms: int = WATCH_DEBOUNCE_MS,
+    stop_event: Any = None,
+    on_batch: Optional[Callable[[Dict[str, Any]], None]] = None,
+    manifest_path: Optional[Path] = None,
+    index_fn: IndexFn = index_corpus,
+) -> None:
+    """Blocking watch loop for the CLI. Each debounced batch of edits is re-chunked and upserted."""
+    corpus_root = corpus_root.resolve()
+    with single_watcher(index, manifest_path) as acquired:
+        if not acquired:
+            raise RuntimeError(f"Another process is already watching the corpus for index {index}")
+        initial_sync(client, index, corpus_root, manifest_path, index_fn)
+        for changes in watch(corpus_root, debounce=debounce_ms, stop_event=stop_event):
+            present, gone = _split_changes(changes)
+            try:
+                resp = sync_paths(client, index, corpus_root, present, gone, manifest_path, index_fn)
+            except Exception as e:
+                logger.error(f"Corpus watch sync failed: {e}")
+                continue
+            _log_batch(present, gone, resp)
+            if on_batch:
+                on_batch(resp)
+
+async def awatch_corpus(
+    client: Any,
+    index: str,
+    corpus_root: Path,
+    debounce_ms: int = WATCH_DEBOUNCE_MS,
+    stop_event: Optional[asyncio.Event] = None,
+    index_fn: IndexFn = index_corpus,
+) -> None:
+    """Async variant for the API lifespan. Syncing runs in a thread so the event loop stays free."""
+    corpus_root = corpus_root.resolve()
+    with single_watcher(index) as acquired:
+        if not acquired:
+            logger.info(f"Corpus watch for {index} is running in another process; not watching here")
+            return
+        try:
+            await asyncio.to_thread(initial_sync, client, index, corpus_root, None, index_fn)
+        except Exception as e:
+            # Keep watching; the next edit batch will retry against the same manifest
+            logger.error(f"Corpus watch initial sync failed: {e}")
+        async for changes in awatch(corpus_root, debounce=debounce_ms, stop_event=stop_event):
+            present, gone = _split_changes(changes)
+            try:
+                resp = await asyncio.to_thread(sync_paths, client, index, corpus_root, present, gone, None, index_fn)
+            except Exception as e:
+                logger.error(f"Corpus watch sync failed: {e}")
+                continue
+            _log_batch(present, gone, resp)
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from aurora_kernel.agent_cache import AgentCache, agent_cache_key
+
+ANSWER = {"text": '{"summary": "ok"}', "conversationId": "c1"}
+
+def test_key_is_query_role_and_ordered_chunk_ids():
+    key = agent_cache_key("agent", "auditor: access reviews", "auditor", ["A#0", "B#0"])
+    assert key == agent_cache_key("agent", "auditor: access reviews", "auditor", ["A#0", "B#0"])
+    assert key != agent_cache_key("agent", "auditor: access reviews", "auditor", ["B#0", "A#0"])
+    assert key != agent_cache_key("agent", "auditor: access reviews", "ciso", ["A#0", "B#0"])
+    assert key != agent_cache_key("agent", "auditor: backups", "auditor", ["A#0", "B#0"])
+
+def test_identical_concurrent_requests_make_one_upstream_call():
+    async def run():
+        cache = AgentCache()
+        calls = []
+        release = asyncio.Event()
+
+        async def call():
+            calls.append(1)
+            await release.wait()
+            return dict(ANSWER)
+
+        first = asyncio.ensure_future(cache.get_or_call("k", "kb", call))
+        second = asyncio.ensure_future(cache.get_or_call("k", "kb", call))
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(first, second)
+        assert calls == [1]
+        assert sorted(status for _r, status in results) == ["coalesced", "miss"]
+        assert all(r == ANSWER for r, _s in results)
+        # Later requests hit the cache
+        assert await cache.get_or_call("k", "kb", call) == (ANSWER, "hit")
+        assert calls == [1] and cache.stats()["inflight"] == 0
+    asyncio.run(run())
+
+def test_failing_leader_releases_its_followers():
+    async def run():
+        cache = AgentCache()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            raise RuntimeError("upstream 502")
+
+        leader = asyncio.ensure_future(cache.get_or_call("k", "kb", call))
+        follower = asyncio.ensure_future(cache.get_or_call("k", "kb", call))
+        await asyncio.sleep(0)
+        release.set()
+        for fut in (leader, follower):
+            with pytest.raises(RuntimeError, match="upstream 502"):
+                await fut
+        # Nothing cached, nothing left in flight: the next request calls again
+        assert cache.get("k") is None and cache.inflight("k") is None
+        assert cache.stats()["errors"] == 1
+    asyncio.run(run())
+
+def test_streaming_leader_resolves_or_releases_followers():
+    async def run():
+        cache = AgentCache()
+        # The streaming endpoint registers its own call; a JSON request joins it
+        cache.begin_upstream("k")
+        follower = asyncio.ensure_future(cache.join(cache.inflight("k")))
+        await asyncio.sleep(0)
+        cache.record_upstream("k", "kb", dict(ANSWER), 1.0)
+        assert await follower == ANSWER
+        assert cache.get("k") == ANSWER and cache.inflight("k") is None
+
+        # The streaming client disconnects mid-answer
+        cache.begin_upstream("s")
+        follower = asyncio.ensure_future(cache.join(cache.inflight("s")))
+        await asyncio.sleep(0)
+        cache.abort_upstream("s", RuntimeError("Streaming request ended before the agent finished"))
+        with pytest.raises(RuntimeError, match="ended before"):
+            await follower
+        assert cache.get("s") is None and cache.inflight("s") is None
+        # Ending another key leaves this registration waiting
+        cache.begin_upstream("s")
+        pending = cache.inflight("s")
+        cache.abort_upstream("other", RuntimeError("x"))
+        assert not pending.done()
+        cache.record_upstream("s", "kb", dict(ANSWER), 1.0)
+        assert pending.done()
+    asyncio.run(run())
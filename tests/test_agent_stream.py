@@ -0,0 +1,84 @@
+import json
+import random
+
+import pytest
+
+from aurora_kernel.agent_stream import ConverseStreamDecoder, JSONFieldScanner
+
+ANSWER = {
+    "summary": "Access {reviews} run \"quarterly\", see: AC-2",
+    "claims": [{"text": "logs kept [90] days", "doc_ids": ["A", "B"]}, {"text": "tab\there"}],
+    "confidence": 0.75,
+    "escalate": False,
+    "owner": None,
+    "kéy \"q\"": "ünicode \\ backslash",
+}
+TEXT = "Here is the answer:\n```json\n" + json.dumps(ANSWER, indent=2) + "\n```\ntrailing {not: json}"
+
+def _feed(text, cuts):
+    scanner = JSONFieldScanner()
+    done = []
+    prev = 0
+    for cut in list(cuts) + [len(text)]:
+        done.extend(scanner.feed(text[prev:cut]))
+        prev = cut
+    return scanner, done
+
+def test_whole_text():
+    scanner, done = _feed(TEXT, [])
+    assert scanner.complete and not scanner.failed
+    assert scanner.fields == ANSWER
+    assert done == list(ANSWER)
+
+def test_one_char_at_a_time():
+    scanner, done = _feed(TEXT, range(1, len(TEXT)))
+    assert scanner.fields == ANSWER
+    assert done == list(ANSWER)
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_chunking(seed):
+    rng = random.Random(seed)
+    cuts = sorted(rng.sample(range(1, len(TEXT)), rng.randint(1, 40)))
+    scanner, done = _feed(TEXT, cuts)
+    assert scanner.complete
+    assert scanner.fields == ANSWER
+    assert done == list(ANSWER)
+
+def test_fields_complete_as_soon_as_their_value_closes():
+    scanner = JSONFieldScanner()
+    assert scanner.feed('{"summary": "a, b", "claims": [1, ') == ["summary"]
+    assert scanner.fields == {"summary": "a, b"}
+    assert scanner.feed("2]") == []
+    assert scanner.feed(', "n": 3}') == ["claims", "n"]
+    assert scanner.complete
+    # Nothing after the object is scanned
+    assert scanner.feed('{"other": 1}') == []
+    assert scanner.fields == {"summary": "a, b", "claims": [1, 2], "n": 3}
+
+def test_non_strict_json_marks_failed():
+    scanner = JSONFieldScanner()
+    assert scanner.feed('{"summary": "ok", "claims": [1, 2,], "n": 1}') == ["summary"]
+    assert scanner.failed and not scanner.complete
+    assert scanner.feed('{"n": 2}') == []
+    assert scanner.fields == {"summary": "ok"}
+
+def test_decoder_sse_stream():
+    decoder = ConverseStreamDecoder()
+    lines = ["event: conversation_id_set", 'data: {"data": {"conversation_id": "c1"}}', ""]
+    for piece in ('{"summary": "hi"', ', "claims": []}'):
+        lines += ["event: message_chunk", "data: " + json.dumps({"data": {"text_chunk": piece}}), ""]
+    lines += ["event: reasoning", 'data: {"data": {"reasoning": "thinking"}}', ""]
+    lines += ["event: message_complete", 'data: {"data": {"message_content": "ignored"}}', ""]
+    events = [e for line in lines for e in decoder.feed_line(line)] + decoder.finish()
+    assert events[0] == {"type": "conversation", "conversation_id": "c1"}
+    assert [e["text"] for e in events if e["type"] == "delta"] == ['{"summary": "hi"', ', "claims": []}']
+    assert [(e["name"], e["value"]) for e in events if e["type"] == "field"] == [("summary", "hi"), ("claims", [])]
+    assert decoder.conversation_id == "c1"
+    assert decoder.text == '{"summary": "hi", "claims": []}'
+    assert decoder.fields == {"summary": "hi", "claims": []}
+
+def test_decoder_buffered_json_body():
+    decoder = ConverseStreamDecoder()
+    events = decoder.feed_json({"conversation_id": "c2", "response": {"message": '{"summary": "x"}'}})
+    assert [e["type"] for e in events] == ["conversation", "delta", "field"]
+    assert decoder.fields == {"summary": "x"}
@@ -0,0 +1,75 @@
+import random
+from typing import List, Tuple
+
+import pytest
+
+from aurora_kernel.chunker import chunk_text, iter_chunks
+
+def legacy_chunks(text: str, max_chars: int) -> List[Tuple[str, str]]:
+    """The original string-concatenating chunk_text, as (text, section) pairs."""
+    out: List[Tuple[str, str]] = []
+    section, buf = "", ""
+    for line in text.splitlines():
+        if line.startswith("# ") or line.startswith("## "):
+            if buf.strip():
+                out.append((buf.strip(), section))
+            buf = ""
+            section = line[2:].strip() if line.startswith("# ") else line[3:].strip()
+        if len(buf) + len(line) + 1 <= max_chars:
+            buf = (buf + "\n" + line).strip()
+        else:
+            if buf.strip():
+                out.append((buf.strip(), section))
+            buf = line
+    if buf.strip():
+        out.append((buf.strip(), section))
+    return out
+
+PIECES = ["", " ", "\t", "# Head", "## Sub", "### Deep", "#nospace", "word", "a longer line of text",
+          "  indented", "trailing   ", "  both  ", "x" * 150, "y" * 1300]
+
+@pytest.mark.parametrize("seed", range(200))
+def test_matches_legacy_chunker(seed):
+    rng = random.Random(seed)
+    lines = [rng.choice(PIECES) + rng.choice(["", " ", "  "]) for _ in range(rng.randint(0, 120))]
+    text = rng.choice(["\n", "\r\n"]).join(lines)
+    max_chars = rng.choice([20, 60, 200, 1200])
+    assert [(c.text, c.section) for c in chunk_text("d", text, max_chars, overlap=0, heading_level=2)] == legacy_chunks(text, max_chars)
+
+def test_offsets_span_chunk_text():
+    text = "# Title\n\n  first line  \nsecond line\n\n## Part\nthird   \n"
+    chunks = chunk_text("d", text, max_chars=1200)
+    assert [c.section for c in chunks] == ["Title", "Part"]
+    for c in chunks:
+        assert text[c.start:c.end].split() == c.text.split()
+        assert text[c.start] == c.text[0] and text[c.end - 1] == c.text[-1]
+
+def test_chunk_ids_and_size_limit():
+    text = "\n".join(f"line number {i}" for i in range(100))
+    chunks = list(iter_chunks("doc", text.splitlines(keepends=True), max_chars=100))
+    assert [c.chunk_id for c in chunks] == [f"doc::chunk::{i}" for i in range(len(chunks))]
+    assert all(len(c.text) <= 100 for c in chunks)
+    assert "\n".join(c.text for c in chunks) == text
+
+def test_overlap_repeats_tail_lines_but_not_across_headings():
+    text = "# A\n" + "\n".join(f"line {i} of text" for i in range(20)) + "\n# B\nlast line"
+    chunks = chunk_text("d", text, max_chars=60, overlap=20)
+    a = [c for c in chunks if c.section == "A"]
+    for prev, nxt in zip(a, a[1:]):
+        assert nxt.text.splitlines()[0] == prev.text.splitlines()[-1]
+    assert chunks[-1].text == "# B\nlast line"
+    for c in chunks:
+        assert text[c.start:c.end] == c.text
+
+def test_deeper_heading_level_splits_sections():
+    text = "# A\nintro\n### Detail\nbody"
+    assert [c.section for c in chunk_text("d", text, heading_level=3)] == ["A", "Detail"]
+    assert [c.section for c in chunk_text("d", text, heading_level=2)] == ["A"]
+
+def test_overlap_seed_line_is_left_stripped():
+    text = "\n".join(f"    indented line {i}" for i in range(20))
+    chunks = chunk_text("d", text, max_chars=80, overlap=30)
+    assert len(chunks) > 2
+    for c in chunks:
+        assert c.text == c.text.lstrip()
+        assert text[c.start:c.end] == c.text
@@ -0,0 +1,78 @@
+from aurora_kernel.context_packer import (
+    CHARS_PER_TOKEN,
+    ELLIPSIS,
+    estimate_tokens,
+    pack_context,
+    trim_content,
+)
+
+def _hit(cid, content, score=1.0, doc_id=None, span=None, highlights=()):
+    h = {"chunk_id": cid, "doc_id": doc_id or cid.split("#")[0], "content": content, "score": score}
+    if span:
+        h["char_start"], h["char_end"] = span
+    if highlights:
+        h["highlights"] = {"content": list(highlights)}
+    return h
+
+ACCESS = "Access reviews are run every quarter by the system owner and the results are logged in the register."
+BACKUP = "Backups are encrypted at rest with managed keys and restore tests run twice a year per policy."
+INCIDENT = "Incident response starts with triage by the on-call engineer who opens a ticket within an hour."
+
+def _ids(packed):
+    return [h["chunk_id"] for h in packed]
+
+def test_near_duplicates_and_overlapping_spans_are_dropped():
+    hits = [
+        _hit("A#0", ACCESS, 3.0, span=(0, 100)),
+        # Same text re-ingested under another doc: near-duplicate by shingles
+        _hit("Z#0", ACCESS + " ", 2.9),
+        # Same doc, mostly the same char range
+        _hit("A#1", BACKUP, 2.8, doc_id="A", span=(20, 110)),
+        _hit("B#0", BACKUP, 2.0, span=(0, 100)),
+    ]
+    packed, stats = pack_context(hits, budget_tokens=1000)
+    assert _ids(packed) == ["A#0", "B#0"]
+    assert stats["duplicates"] == 2 and stats["candidates"] == 4 and stats["selected"] == 2
+
+def test_mmr_prefers_a_diverse_chunk_over_a_similar_one():
+    similar = "Access reviews are run every quarter by the system owner and results go to the audit team."
+    hits = [_hit("A#0", ACCESS, 3.0), _hit("A#1", similar, 2.9), _hit("C#0", INCIDENT, 2.5)]
+    packed, _stats = pack_context(hits, budget_tokens=1000, max_items=2, mmr_lambda=0.5)
+    assert _ids(packed) == ["A#0", "C#0"]
+    # Pure relevance keeps score order
+    packed, _stats = pack_context(hits, budget_tokens=1000, max_items=2, mmr_lambda=1.0)
+    assert _ids(packed) == ["A#0", "A#1"]
+
+def test_trim_keeps_the_text_around_highlights():
+    filler = " ".join(f"word{i}" for i in range(200))
+    content = f"{filler} the encryption keys rotate yearly {filler} restore tests pass {filler}"
+    h = _hit("B#0", content, highlights=["the <em>encryption</em> keys rotate yearly", "<em>restore</em> tests pass"])
+    text = trim_content(h, 400)
+    assert len(text) <= 400
+    assert "encryption keys rotate yearly" in text and "restore tests pass" in text
+    assert ELLIPSIS in text
+    # No highlights: the head of the chunk, cut at a word boundary
+    text = trim_content(_hit("B#0", content), 100)
+    assert content.startswith(text) and len(text) <= 100 and not text.endswith("word")
+    assert trim_content(_hit("B#0", "short"), 100) == "short"
+
+def test_pack_stays_within_the_budget():
+    long = " ".join([ACCESS, BACKUP, INCIDENT] * 20)
+    hits = [_hit(f"D{i}#0", f"{i} " + long.replace("quarter", f"q{i}"), 3.0 - i / 10) for i in range(4)]
+    packed, stats = pack_context(hits, budget_tokens=200, mmr_lambda=1.0)
+    assert stats["chars_out"] <= 200 * CHARS_PER_TOKEN
+    assert stats["est_tokens"] == estimate_tokens("".join(h["content"] for h in packed))
+    # The budget is shared out, not spent on the first chunk
+    assert len(packed) >= 2
+    assert pack_context(hits, budget_tokens=0)[0] == []
+
+def test_agent_gets_packed_text_and_the_response_keeps_full_hits():
+    from aurora_kernel import api
+
+    long = " ".join([ACCESS, BACKUP, INCIDENT] * 20)
+    hits = [_hit("A#0", long, 3.0, highlights=["<em>Backups</em> are encrypted at rest"]), _hit("C#0", INCIDENT, 2.0)]
+    req = api.AgentEvidencePackRequest(role="auditor", scenario="backups", context_budget_tokens=100)
+    selected, attachments, context = api._agent_context(req, {"hits": hits})
+    assert context["packed"] and [h["chunk_id"] for h in selected] == ["A#0", "C#0"]
+    assert selected[0]["content"] == long
+    assert len(attachments[0]["content"]) < len(long) and "Backups are encrypted at rest" in attachments[0]["content"]
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from aurora_kernel.controls_index import ControlsIndex
+
+def _hit(chunk_id, control_ids):
+    return {"chunk_id": chunk_id, "doc_id": chunk_id.split("#")[0], "doc_type": "source", "control_ids": control_ids}
+
+def _index(action_chunk_id, control_ids):
+    action = {"index": {"_id": action_chunk_id}}
+    return action, _hit(action_chunk_id, control_ids)
+
+def _wait(cond, timeout=5.0):
+    deadline = time.time() + timeout
+    while not cond() and time.time() < deadline:
+        time.sleep(0.005)
+    assert cond()
+
+def test_actions_during_a_background_load_are_kept(monkeypatch):
+    from aurora_kernel import controls_index
+
+    started, release = threading.Event(), threading.Event()
+    threads = []
+
+    class DeferredThread(threading.Thread):
+        def start(self):
+            threads.append(self)
+
+    def loader(index):
+        started.set()
+        release.wait(5)
+        yield _hit("A#0", ["AC-1"])
+        yield _hit("B#0", ["AC-1"])
+
+    ci = ControlsIndex(loader)
+    monkeypatch.setattr(controls_index.threading, "Thread", DeferredThread)
+    ci.load_in_background("kb")
+    monkeypatch.undo()
+    # Claimed but the scan has not started yet
+    ci.on_action("kb", *_index("C#0", ["AC-2"]))
+    threading.Thread.start(threads[0])
+    started.wait(5)
+    # During the scan: newer than the scanned copy of B#0
+    ci.on_action("kb", *_index("B#0", ["AC-3"]))
+    release.set()
+    _wait(lambda: ci.stats()["loads"] == 1)
+    assert ci.coverage("kb", ["AC-1", "AC-2", "AC-3"]) == {
+        "AC-1": {"chunks": 1, "docs": 1, "doc_ids": ["A"], "chunk_ids": ["A#0"]},
+        "AC-2": {"chunks": 1, "docs": 1, "doc_ids": ["C"], "chunk_ids": ["C#0"]},
+        "AC-3": {"chunks": 1, "docs": 1, "doc_ids": ["B"], "chunk_ids": ["B#0"]},
+    }
+
+def test_stale_copy_is_served_while_it_reloads():
+    corpus = [_hit("A#0", ["AC-1"])]
+    ci = ControlsIndex(lambda index: list(corpus), max_age_s=60)
+    assert ci.lookup("kb", ["AC-1"])["AC-1"]["chunks"] == 1
+    # Another process ingests B#0; this copy never sees the action
+    corpus.append(_hit("B#0", ["AC-1"]))
+    assert ci.coverage("kb", ["AC-1"])["AC-1"]["chunks"] == 1
+    assert ci.stats()["loads"] == 1
+    ci._entries["kb"].loaded_at -= 61
+    assert ci.coverage("kb", ["AC-1"])["AC-1"]["chunks"] == 1
+    _wait(lambda: ci.stats()["loads"] == 2)
+    assert ci.coverage("kb", ["AC-1"])["AC-1"]["chunk_ids"] == ["A#0", "B#0"]
+
+    ci = ControlsIndex(lambda index: list(corpus), max_age_s=0)
+    ci.ensure("kb")
+    ci._entries["kb"].loaded_at -= 10**6
+    ci.ensure("kb")
+    assert ci.stats()["loading"] == [] and ci.stats()["loads"] == 1
@@ -0,0 +1,406 @@
+import asyncio
+import time
+from types import SimpleNamespace as NS
+
+import pytest
+
+from aurora_kernel import elastic_store
+from aurora_kernel.jobs import IngestJobManager
+
+def _bulk_items(operations, status=lambda n, op: 201):
+    items = []
+    i = 0
+    while i < len(operations):
+        op = next(iter(operations[i]))
+        meta = operations[i][op]
+        st = status(len(items), op)
+        info = {"_id": meta["_id"], "status": st}
+        if st >= 300:
+            info["error"] = {"type": "es_rejected_execution_exception" if st == 429 else "mapper_parsing_exception", "reason": "x"}
+        items.append({op: info})
+        i += 1 if op == "delete" else 2
+    return {"errors": any(next(iter(it.values()))["status"] >= 300 for it in items), "items": items}
+
+class FakeIndices:
+    def __init__(self, exists=True):
+        self._exists = exists
+        self.calls = []
+
+    def exists(self, index):
+        return self._exists
+
+    def create(self, index, mappings):
+        self.calls.append(("create", index))
+
+    def put_mapping(self, index, properties):
+        self.calls.append(("put_mapping", index, sorted(properties)))
+
+    def refresh(self, index):
+        self.calls.append(("refresh", index))
+
+class FakeES:
+    def __init__(self, exists=True):
+        self.indices = FakeIndices(exists)
+        self.bulk_calls = []
+
+    def bulk(self, operations):
+        self.bulk_calls.append(operations)
+        return _bulk_items(operations)
+
+class FakeAsyncIndices(FakeIndices):
+    async def exists(self, index):
+        return self._exists
+
+    async def create(self, index, mappings):
+        FakeIndices.create(self, index, mappings)
+
+    async def put_mapping(self, index, properties):
+        FakeIndices.put_mapping(self, index, properties)
+
+    async def refresh(self, index):
+        FakeIndices.refresh(self, index)
+
+class FakeAsyncES:
+    def __init__(self, exists=True):
+        self.indices = FakeAsyncIndices(exists)
+        self.bulk_calls = []
+        self.closed = False
+
+    async def bulk(self, operations):
+        self.bulk_calls.append(operations)
+        await asyncio.sleep(0)
+        return _bulk_items(operations)
+
+    async def close(self):
+        self.closed = True
+
+def _write_corpus(root, n=3):
+    for i in range(n):
+        (root / f"doc{i}.md").write_text(f"---\ndoc_id: DOC-{i}\n---\n# Doc {i}\n\nBody of document {i}.\n", encoding="utf-8")
+
+def test_async_index_corpus_applies_the_mapping_update(tmp_path, monkeypatch):
+    from aurora_kernel.corpus_loader import iter_corpus
+
+    monkeypatch.setattr(elastic_store, "EMBEDDINGS_ENABLED", True)
+    _write_corpus(tmp_path)
+    client = FakeAsyncES(exists=True)
+    resp = asyncio.run(elastic_store.async_index_corpus(client, "kb", iter_corpus(tmp_path)))
+    assert ("put_mapping", "kb", ["embedding"]) in client.indices.calls
+    assert resp["indexed_docs"] == 3 and resp["bulk"]["ok"] == resp["indexed_chunks"]
+    assert all("embedding" in op for ops in client.bulk_calls for op in ops[1::2])
+
+    client = FakeAsyncES(exists=False)
+    asyncio.run(elastic_store.async_index_corpus(client, "kb", iter_corpus(tmp_path)))
+    assert client.indices.calls[0] == ("create", "kb")
+
+def test_ingest_job_runs_async_index_corpus(tmp_path):
+    _write_corpus(tmp_path)
+    sync_client = FakeES()
+    async_clients = []
+
+    def factory():
+        async_clients.append(FakeAsyncES())
+        return async_clients[-1]
+
+    jobs = IngestJobManager(lambda: sync_client, backend=elastic_store, async_client_factory=factory)
+    job = jobs.submit(tmp_path, "kb")
+    deadline = time.time() + 10
+    while job.status in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.status == "succeeded", job.error
+    assert job.result["indexed_docs"] == 3
+    assert len(async_clients) == 1 and async_clients[0].closed
+    assert async_clients[0].bulk_calls and not sync_client.bulk_calls
+
+    # No async client available: the sync path runs instead
+    jobs = IngestJobManager(lambda: sync_client, backend=elastic_store, async_client_factory=lambda: None)
+    job = jobs.submit(tmp_path, "kb")
+    while job.status in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.status == "succeeded" and sync_client.bulk_calls
+
+def _reject_zero_vectors(operations):
+    # Like a cosine dense_vector field: zero-magnitude vectors are a mapper error
+    sources = {}
+    for i, op in enumerate(operations):
+        if "index" in op:
+            sources[len(sources)] = operations[i + 1]
+    def status(n, op):
+        vec = sources.get(n, {}).get("embedding")
+        return 400 if vec is not None and not any(vec) else 201
+    return status
+
+def test_punctuation_only_chunk_is_indexed_without_a_vector(tmp_path, monkeypatch):
+    from aurora_kernel.corpus_loader import iter_corpus
+    from aurora_kernel.manifest import CorpusManifest
+
+    monkeypatch.setattr(elastic_store, "EMBEDDINGS_ENABLED", True)
+    _write_corpus(tmp_path, n=1)
+    (tmp_path / "rules.md").write_text("---\ndoc_id: RULES\n---\n| --- | --- |\n|---|---|\n", encoding="utf-8")
+
+    class StrictES(FakeES):
+        def bulk(self, operations):
+            self.bulk_calls.append(operations)
+            return _bulk_items(operations, _reject_zero_vectors(operations))
+
+    client = StrictES()
+    manifest = CorpusManifest(tmp_path / "manifest.json")
+    resp = elastic_store.index_corpus(client, "kb", iter_corpus(tmp_path, manifest=manifest), manifest=manifest)
+    assert resp["bulk"]["errors"] == 0
+    assert resp["manifest_saved"]
+    sources = {op["chunk_id"]: op for ops in client.bulk_calls for op in ops[1::2]}
+    rules = [s for s in sources.values() if s["doc_id"] == "RULES"]
+    assert rules and all("embedding" not in s for s in rules)
+    assert all("embedding" in s for s in sources.values() if s["doc_id"] != "RULES")
+
+def test_featureless_query_skips_the_knn_stage():
+    assert len(elastic_store._hybrid_searches("kb", "access reviews", {}, 5, "full")) == 4
+    searches = elastic_store._hybrid_searches("kb", "?!", {}, 5, "full")
+    assert len(searches) == 2 and "knn" not in searches[1]
+    resp = {"responses": [{"hits": {"hits": [{"_id": "A#0", "_score": 1.0, "_source": {"chunk_id": "A#0"}}]}}]}
+    result = elastic_store._hybrid_result("?!", {}, resp, 5, "ids")
+    assert [h["chunk_id"] for h in result["hits"]] == ["A#0"]
+
+def test_pool_stats_tolerates_missing_transport_internals():
+    import queue
+    conns = NS(queue=[object(), None, object()], maxsize=10)
+    node = NS(base_url="https://es:9200", pool=NS(pool=conns, num_connections=3, num_requests=42))
+    dead = queue.Queue()
+    node_pool = NS(all=lambda: [node], _alive_nodes={"n": node}, _dead_nodes=dead)
+    stats = elastic_store.pool_stats(NS(transport=NS(node_pool=node_pool)))
+    assert stats == {
+        "nodes": 1,
+        "alive_nodes": 1,
+        "dead_nodes": 0,
+        "node_stats": [{"node": "https://es:9200", "max_connections": 10, "idle_connections": 2, "connections_opened": 3, "requests": 42}],
+    }
+    # A transport without these internals degrades to None instead of raising
+    stats = elastic_store.pool_stats(NS(transport=NS(node_pool=NS(all=lambda: [NS(base_url="https://es:9200", pool=NS())]))))
+    assert stats["alive_nodes"] is None and stats["dead_nodes"] is None
+    assert stats["node_stats"] == [{"node": "https://es:9200", "max_connections": None, "idle_connections": None, "connections_opened": None, "requests": None}]
+    assert elastic_store.pool_stats(NS())["nodes"] == 0
+
+def _actions(n):
+    return [({"index": {"_index": "kb", "_id": f"D#{i}"}}, {"chunk_id": f"D#{i}"}) for i in range(n)]
+
+class RejectingES(FakeES):
+    """Answers the first `rejections` bulk requests with 429 for the odd-numbered docs."""
+
+    def __init__(self, rejections):
+        super().__init__()
+        self.rejections = rejections
+
+    def bulk(self, operations):
+        self.bulk_calls.append(operations)
+        ids = [int(op["index"]["_id"].split("#")[1]) for op in operations[::2]]
+        reject = len(self.bulk_calls) <= self.rejections
+        return _bulk_items(operations, lambda n, op: 429 if reject and ids[n] % 2 else 201)
+
+def test_send_batch_retries_429_items_with_backoff(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(elastic_store.time, "sleep", sleeps.append)
+    client = RejectingES(rejections=2)
+    result = elastic_store._send_batch(client, _actions(4), max_retries=5, initial_backoff=0.5)
+    assert result == {"ok": 4, "retries": 4, "failed": []}
+    assert sleeps == [0.5, 1.0]
+    # Only the rejected items are sent again
+    assert [[op["index"]["_id"] for op in ops[::2]] for ops in client.bulk_calls] == [
+        ["D#0", "D#1", "D#2", "D#3"], ["D#1", "D#3"], ["D#1", "D#3"],
+    ]
+
+def test_send_batch_gives_up_after_max_retries(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(elastic_store.time, "sleep", sleeps.append)
+    result = elastic_store._send_batch(RejectingES(rejections=10), _actions(4), max_retries=2, initial_backoff=1.0)
+    assert result["ok"] == 2 and result["retries"] == 4
+    assert [(f["_id"], f["status"], f["type"]) for f in result["failed"]] == [
+        ("D#1", 429, "es_rejected_execution_exception"), ("D#3", 429, "es_rejected_execution_exception"),
+    ]
+    assert sleeps == [1.0, 2.0]
+
+    # A whole-request 429 is retried too; backoff is capped at BULK_MAX_BACKOFF
+    class Busy(FakeES):
+        def bulk(self, operations):
+            self.bulk_calls.append(operations)
+            if len(self.bulk_calls) < 3:
+                raise elastic_store.ApiError("busy", meta=NS(status=429), body={})
+            return _bulk_items(operations)
+
+    sleeps.clear()
+    result = elastic_store._send_batch(Busy(), _actions(2), max_retries=5, initial_backoff=20.0)
+    assert result == {"ok": 2, "retries": 2, "failed": []}
+    assert sleeps == [20.0, elastic_store.BULK_MAX_BACKOFF]
+
+def test_bulk_stream_sums_retries_and_errors(monkeypatch):
+    monkeypatch.setattr(elastic_store.time, "sleep", lambda s: None)
+    summary = elastic_store.bulk_stream(RejectingES(rejections=1), _actions(10), chunk_size=4, thread_count=1, max_retries=0)
+    # With no retries allowed the rejected items are reported, grouped by type
+    assert summary["ok"] == 8 and summary["errors"] == 2 and summary["batches"] == 3
+    assert summary["error_types"] == {"es_rejected_execution_exception": 2}
+
+class ClusterIndices:
+    """Just enough of the indices API for rebuild_index/rollback_alias."""
+
+    def __init__(self, indices=(), aliases=None):
+        self.indices = {name: {} for name in indices}
+        self.aliases = dict(aliases or {})  # alias -> set of indices
+        self.blocked = set()
+
+    def exists(self, index):
+        return index in self.indices or index in self.aliases
+
+    def exists_alias(self, name):
+        return name in self.aliases
+
+    def get_alias(self, name):
+        return {i: {"aliases": {name: {}}} for i in self.aliases[name]}
+
+    def get(self, index, **kw):
+        prefix = index.rstrip("*")
+        return {i: {} for i in self.indices if i.startswith(prefix)}
+
+    def create(self, index, mappings=None, settings=None):
+        assert index not in self.indices and index not in self.aliases
+        self.indices[index] = {}
+
+    def delete(self, index, ignore_unavailable=False):
+        self.indices.pop(index, None)
+
+    def put_settings(self, index, settings):
+        if settings.get("index.blocks.write"):
+            self.blocked.add(index)
+        elif "index.blocks.write" in settings:
+            self.blocked.discard(index)
+
+    def get_settings(self, index, name):
+        return {index: {"settings": {"index": {"number_of_replicas": "1"}}}}
+
+    def clone(self, index, target, settings=None, **kw):
+        assert index in self.blocked, "clone needs a write-blocked source"
+        self.indices[target] = dict(self.indices[index])
+
+    def refresh(self, index):
+        pass
+
+    def put_mapping(self, index, properties):
+        pass
+
+    def update_aliases(self, actions):
+        for a in actions:
+            op, args = next(iter(a.items()))
+            if op == "remove_index":
+                del self.indices[args["index"]]
+            elif op == "remove":
+                self.aliases[args["alias"]].discard(args["index"])
+            else:
+                assert args["alias"] not in self.indices
+                self.aliases.setdefault(args["alias"], set()).add(args["index"])
+
+class Cluster(FakeES):
+    def __init__(self, indices=(), aliases=None):
+        super().__init__()
+        self.indices = ClusterIndices(indices, aliases)
+        self.cluster = NS(health=lambda **kw: {})
+
+    def search(self, **kw):
+        return {"hits": {"hits": []}}
+
+def _rebuild(client, tmp_path, alias="kb"):
+    from aurora_kernel.corpus_loader import iter_corpus
+
+    return elastic_store.rebuild_index(client, alias, iter_corpus(tmp_path), thread_count=1)
+
+def test_version_names_are_unique_and_sort_by_age():
+    names = [elastic_store._version_name("kb", t) for t in (1_700_000_000.0, 1_700_000_000.5, 1_700_000_000.5, 1_700_000_001.0)]
+    assert len(set(names)) == 4
+    assert names[0] < names[1] and names[2] < names[3]
+    assert elastic_store._version_name("kb", 0).startswith("kb-19700101000000000-")
+    # Older second-resolution names still sort before
+    assert "kb-20231114221320" < names[0]
+
+def test_first_rebuild_keeps_the_legacy_index_for_rollback(tmp_path):
+    _write_corpus(tmp_path)
+    client = Cluster(indices=["kb"])
+    client.indices.indices["kb"] = {"legacy": True}
+    resp = _rebuild(client, tmp_path)
+    kept = resp["kept_concrete_index_as"]
+    assert resp["replaced_concrete_index"] and kept.startswith("kb-1970")
+    assert client.indices.indices[kept] == {"legacy": True} and kept not in client.indices.blocked
+    assert "kb" not in client.indices.indices
+    assert elastic_store.alias_targets(client, "kb") == [resp["index"]]
+
+    back = elastic_store.rollback_alias(client, "kb")
+    assert back["index"] == kept and back["previous"] == [resp["index"]]
+    assert elastic_store.alias_targets(client, "kb") == [kept]
+
+def test_rebuilds_swap_and_roll_back_in_order(tmp_path):
+    _write_corpus(tmp_path)
+    client = Cluster()
+    first = _rebuild(client, tmp_path)
+    second = _rebuild(client, tmp_path)
+    assert first["index"] != second["index"]
+    assert second["previous"] == [first["index"]] and not second["replaced_concrete_index"]
+    assert elastic_store.alias_targets(client, "kb") == [second["index"]]
+    assert elastic_store.rollback_alias(client, "kb")["index"] == first["index"]
+    with pytest.raises(ValueError):
+        elastic_store.rollback_alias(client, "kb")
+
+class ExportES:
+    """Point-in-time export over 3 pages of 2 hits; records where the PIT is closed."""
+
+    def __init__(self):
+        self.closed_in = None
+
+    def _page(self, kw):
+        start = kw.get("search_after", [-1])[0] + 1
+        hits = [{"_id": f"D#{i}", "_score": 1.0, "sort": [i], "_source": {"chunk_id": f"D#{i}"}} for i in range(start, min(start + 2, 6))]
+        return {"pit_id": "pit", "hits": {"hits": hits}}
+
+    def open_point_in_time(self, index, keep_alive):
+        return {"id": "pit"}
+
+    def search(self, **kw):
+        return self._page(kw)
+
+    def close_point_in_time(self, id):
+        import threading
+
+        self.closed_in = threading.current_thread().name
+
+class AsyncExportES(ExportES):
+    async def open_point_in_time(self, index, keep_alive):
+        return {"id": "pit"}
+
+    async def search(self, **kw):
+        return self._page(kw)
+
+    async def close_point_in_time(self, id):
+        ExportES.close_point_in_time(self, id)
+
+def _export_first_hit(monkeypatch, sync_client, async_client):
+    from aurora_kernel import api
+
+    monkeypatch.setattr(api, "_use_local", lambda: False)
+    monkeypatch.setattr(api, "_client", lambda: sync_client)
+    monkeypatch.setattr(api, "_async_client", lambda: async_client)
+
+    async def run():
+        hits = api._export_hits("kb", None, {}, "ids")
+        first = await hits.__anext__()
+        # The client disconnects after one line; the PIT is closed by then, not at loop shutdown
+        await hits.aclose()
+        return first, (async_client or sync_client).closed_in
+
+    return asyncio.run(run())
+
+def test_export_closes_the_point_in_time_when_the_client_leaves(monkeypatch):
+    import threading
+
+    first, closed_in = _export_first_hit(monkeypatch, None, AsyncExportES())
+    assert first["chunk_id"] == "D#0"
+    assert closed_in == threading.current_thread().name
+
+    # Sync fallback: closed as well, and in a worker thread rather than on the loop
+    first, closed_in = _export_first_hit(monkeypatch, ExportES(), None)
+    assert first["chunk_id"] == "D#0"
+    assert closed_in not in (None, threading.current_thread().name)
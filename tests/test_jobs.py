@@ -0,0 +1,51 @@
+import time
+from types import SimpleNamespace as NS
+
+from aurora_kernel import jobs as jobs_mod
+from aurora_kernel.elastic_store import IngestCancelled
+from aurora_kernel.jobs import IngestJobManager, StoredJob
+
+def _wait(cond, timeout=5.0):
+    deadline = time.time() + timeout
+    while not cond() and time.time() < deadline:
+        time.sleep(0.01)
+    assert cond()
+
+def _slow_backend():
+    def index_corpus(client, index, docs, progress=None, cancel=None, **kwargs):
+        for n in range(1, 500):
+            if cancel.is_set():
+                raise IngestCancelled()
+            progress({"docs": n, "chunks": 2 * n, "skipped_docs": 0, "deleted_chunks": 0, "errors": 0})
+            time.sleep(0.01)
+        return {"indexed_docs": n, "indexed_chunks": 2 * n, "bulk": {"errors": 0}}
+    return NS(index_corpus=index_corpus)
+
+def test_other_workers_report_and_cancel_a_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs_mod, "JOB_SAVE_INTERVAL_S", 0.0)
+    state = tmp_path / "jobs"
+    owner = IngestJobManager(lambda: None, backend=_slow_backend(), state_dir=state)
+    other = IngestJobManager(lambda: None, backend=_slow_backend(), state_dir=state)
+    job = owner.submit(tmp_path, "kb")
+    _wait(lambda: job.docs_processed > 2)
+
+    seen = other.get(job.job_id)
+    assert isinstance(seen, StoredJob)
+    assert seen.snapshot()["status"] == "running" and seen.snapshot()["docs_processed"] > 0
+    assert [j.job_id for j in other.list_jobs()] == [job.job_id]
+    assert other.get("missing") is None and other.get("../jobs") is None
+
+    assert other.cancel(job.job_id) is not None
+    _wait(lambda: job.status == "cancelled")
+    _wait(lambda: other.get(job.job_id).status == "cancelled")
+    owner.shutdown()
+    other.shutdown()
+
+def test_without_a_state_dir_jobs_stay_in_process(tmp_path):
+    owner = IngestJobManager(lambda: None, backend=_slow_backend())
+    other = IngestJobManager(lambda: None, backend=_slow_backend())
+    job = owner.submit(tmp_path, "kb")
+    assert other.get(job.job_id) is None and other.cancel(job.job_id) is None
+    owner.cancel(job.job_id)
+    _wait(lambda: job.status == "cancelled")
+    owner.shutdown()
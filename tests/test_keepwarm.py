@@ -0,0 +1,61 @@
+import asyncio
+
+from aurora_kernel import keepwarm
+from aurora_kernel.keepwarm import KEEPWARM_ACTIVE_WINDOW_S, KEEPWARM_IDLE_INTERVAL_S, KEEPWARM_INTERVAL_S, KeepWarm
+from aurora_kernel.resilience import CircuitBreaker, ConcurrencyLimiter, UpstreamGuard
+
+def _keepwarm():
+    breaker = CircuitBreaker(window=10, window_s=60, min_calls=2, error_rate=0.5, slow_s=15, slow_rate=0.5, open_s=10, max_open_s=40, probes=1)
+    kw = KeepWarm(UpstreamGuard("test", breaker=breaker, limiter=ConcurrencyLimiter(2, 2, 1)))
+    pings = []
+
+    async def ping():
+        pings.append(1)
+
+    kw.ping = ping
+    return kw, pings
+
+def test_recent_traffic_pings_every_interval():
+    kw, _pings = _keepwarm()
+    now = kw.started_at + 10
+    kw.last_traffic = now
+    assert kw._skip_reason(now + 1) == "traffic"
+    assert kw._skip_reason(now + KEEPWARM_INTERVAL_S) is None
+    kw.last_ping = now + KEEPWARM_INTERVAL_S
+    assert kw._skip_reason(now + 2 * KEEPWARM_INTERVAL_S) is None
+    assert kw.interval(now) == KEEPWARM_INTERVAL_S
+    assert KEEPWARM_INTERVAL_S <= keepwarm.KIBANA_KEEPALIVE_EXPIRY * 0.8
+
+def test_idle_backs_off_but_never_stops():
+    kw, _pings = _keepwarm()
+    now = kw.started_at + KEEPWARM_ACTIVE_WINDOW_S + 1
+    assert kw.idle(now) and kw.interval(now) == KEEPWARM_IDLE_INTERVAL_S
+    # Idle and never pinged: due at once
+    assert kw._skip_reason(now) is None
+    kw.last_ping = now
+    assert kw._skip_reason(now + KEEPWARM_INTERVAL_S) == "idle"
+    assert kw._skip_reason(now + KEEPWARM_IDLE_INTERVAL_S) is None
+    # Hours later it is still pinging
+    kw.last_ping = now + 10 * 3600
+    assert kw._skip_reason(now + 10 * 3600 + KEEPWARM_IDLE_INTERVAL_S) is None
+    # New traffic brings back the short interval
+    kw.note_traffic()
+    assert not kw.idle()
+
+def test_skips_while_the_circuit_is_open_and_in_demo_mode(monkeypatch):
+    kw, pings = _keepwarm()
+    kw.last_traffic = kw.started_at - KEEPWARM_INTERVAL_S
+    for _ in range(2):
+        kw.guard.breaker.record(False, 0.1)
+    assert kw.guard.is_open
+    assert asyncio.run(kw.tick()) is None
+    assert kw.skipped["circuit_open"] == 1 and not pings
+
+    kw, pings = _keepwarm()
+    kw.last_traffic = kw.started_at - KEEPWARM_INTERVAL_S
+    monkeypatch.setenv("DEMO_MODE", "true")
+    assert asyncio.run(kw.tick()) is None
+    assert kw.skipped["demo"] == 1 and not pings
+    monkeypatch.setenv("DEMO_MODE", "false")
+    assert asyncio.run(kw.tick()) is not None
+    assert pings == [1] and kw.pings == 1
@@ -0,0 +1,71 @@
+from aurora_kernel import local_store
+
+def _chunk(cid, content, doc_type="source", stakeholder="ops", jurisdiction="EU", control_ids=()):
+    return {
+        "chunk_id": cid,
+        "doc_id": cid.split("#")[0],
+        "title": cid,
+        "content": content,
+        "doc_type": doc_type,
+        "stakeholder": stakeholder,
+        "jurisdiction": jurisdiction,
+        "control_ids": list(control_ids),
+    }
+
+SOURCES = [
+    _chunk("A#0", "access reviews run every quarter", control_ids=["AC-1", "AC-2"]),
+    _chunk("A#1", "quarterly access reviews are logged", control_ids=["AC-2"]),
+    _chunk("B#0", "backups are encrypted at rest", jurisdiction="US", control_ids=["SC-28"]),
+    _chunk("C#0", "access reviews expected output", doc_type="expected_output", control_ids=["AC-1"]),
+    _chunk("D#0", "incident response plan", stakeholder="security"),
+]
+
+def _store(tmp_path):
+    store = local_store.make_local_store(str(tmp_path))
+    store.replace("kb", {s["chunk_id"]: s for s in SOURCES})
+    return store
+
+def _ids(hits):
+    return sorted(h["chunk_id"] for h in hits)
+
+def test_keyword_filters(tmp_path):
+    store = _store(tmp_path)
+    hits = local_store.search(store, "kb", "access reviews", {"doc_type": "source"}, size=10)["hits"]
+    assert _ids(hits) == ["A#0", "A#1"]
+    hits = local_store.search(store, "kb", "access reviews", {"doc_type": "expected_output"}, size=10)["hits"]
+    assert _ids(hits) == ["C#0"]
+    # None values are ignored, several filters intersect
+    hits = list(local_store.iter_search(store, "kb", None, {"doc_type": "source", "stakeholder": None, "jurisdiction": "US"}))
+    assert _ids(hits) == ["B#0"]
+    assert list(local_store.iter_search(store, "kb", None, {"stakeholder": "nobody"})) == []
+
+def test_control_ids_filter_matches_any_listed_control(tmp_path):
+    store = _store(tmp_path)
+    assert "control_ids" in store.open("kb").keyword_fields
+    hits = list(local_store.iter_search(store, "kb", None, {"doc_type": "source", "control_ids": ["AC-1"]}))
+    assert _ids(hits) == ["A#0"]
+    hits = list(local_store.iter_search(store, "kb", None, {"doc_type": "source", "control_ids": ["AC-2", "SC-28"]}))
+    assert _ids(hits) == ["A#0", "A#1", "B#0"]
+    hits = local_store.search(store, "kb", "quarterly", {"control_ids": "AC-2"}, size=10)["hits"]
+    assert _ids(hits) == ["A#1"]
+
+def test_fields_missing_from_an_older_index_file_are_scanned(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_store, "KEYWORD_FIELDS", local_store._LEGACY_KEYWORD_FIELDS)
+    store = _store(tmp_path)
+    monkeypatch.undo()
+    idx = store.open("kb")
+    assert "control_ids" not in idx.keyword_fields
+    assert len(idx.postings("control_ids", "AC-2")) == 0
+    hits = list(local_store.iter_search(store, "kb", None, {"doc_type": "source", "control_ids": ["AC-2"]}))
+    assert _ids(hits) == ["A#0", "A#1"]
+    # Fields that are never indexed behave like an Elasticsearch term filter too
+    hits = list(local_store.iter_search(store, "kb", None, {"doc_id": "B"}))
+    assert _ids(hits) == ["B#0"]
+
+def test_iter_search_orders_by_score_and_applies_view(tmp_path):
+    store = _store(tmp_path)
+    hits = list(local_store.iter_search(store, "kb", "access reviews quarter", {"doc_type": "source"}, view="ids"))
+    assert [h["chunk_id"] for h in hits][0] == "A#0"
+    assert all(hits[i]["score"] >= hits[i + 1]["score"] for i in range(len(hits) - 1))
+    assert all("content" not in h and "highlights" not in h for h in hits)
+    assert list(local_store.iter_search(store, "missing", "access")) == []
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+from aurora_kernel.corpus_loader import iter_corpus
+from aurora_kernel.manifest import CorpusManifest
+
+def _write(root: Path, name: str, body: str) -> Path:
+    p = root / name
+    p.write_text(f"---\ndoc_id: {p.stem.upper()}\n---\n# {p.stem}\n\n{body}\n", encoding="utf-8")
+    return p
+
+def test_record_returns_chunks_no_longer_emitted(tmp_path):
+    m = CorpusManifest(tmp_path / "m.json")
+    assert m.record("a.md", 1.0, 10, "h1", ["a#0", "a#1", "a#2"]) == []
+    assert m.record("a.md", 2.0, 8, "h2", ["a#0", "a#1"]) == ["a#2"]
+    assert m.forget("a.md") == ["a#0", "a#1"]
+    assert m.forget("a.md") == []
+
+def test_unchanged_checks(tmp_path):
+    m = CorpusManifest(tmp_path / "m.json")
+    m.record("a.md", 1.0, 10, "h1", ["a#0"])
+    assert m.is_unchanged("a.md", 1.0, 10)
+    assert not m.is_unchanged("a.md", 2.0, 10)
+    # Touched but same bytes: the fingerprint follows the new stat
+    assert m.same_content("a.md", "h1", 2.0, 10)
+    assert m.is_unchanged("a.md", 2.0, 10)
+    assert not m.same_content("a.md", "other", 3.0, 10)
+
+def test_save_load_roundtrip_and_corrupt_file(tmp_path):
+    path = tmp_path / "sub" / "m.json"
+    m = CorpusManifest(path)
+    m.record("a.md", 1.5, 10, "h1", ["a#0"])
+    m.save()
+    loaded = CorpusManifest.load(path)
+    assert loaded.entries["a.md"].chunk_ids == ["a#0"]
+    assert loaded.entries["a.md"].sha256 == "h1"
+    path.write_text("{not json", encoding="utf-8")
+    assert CorpusManifest.load(path).entries == {}
+
+def test_unseen_lists_removed_files(tmp_path):
+    m = CorpusManifest(tmp_path / "m.json")
+    m.record("a.md", 1.0, 1, "x", [])
+    m.record("b.md", 1.0, 1, "y", [])
+    m.mark_seen("a.md")
+    assert m.unseen() == ["b.md"]
+
+def test_iter_corpus_skips_unchanged_files(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    a = _write(corpus, "a.md", "alpha text")
+    _write(corpus, "b.md", "beta text")
+    m = CorpusManifest(tmp_path / "m.json")
+    first = list(iter_corpus(corpus, manifest=m, workers=1))
+    for d in first:
+        m.record(d.source_path, d.mtime, d.size, d.sha256, [d.doc_id])
+    assert sorted(d.doc_id for d in first) == ["A", "B"]
+
+    _write(corpus, "a.md", "alpha text changed")
+    second = list(iter_corpus(corpus, manifest=m, workers=1))
+    assert [d.source_path for d in second] == [a.as_posix()]
+    assert m.skipped == 1
+
+def test_lock_files_keep_the_full_manifest_name(tmp_path, monkeypatch):
+    from aurora_kernel.manifest import ManifestLock, manifest_path_for
+    from aurora_kernel.watch import single_watcher
+
+    monkeypatch.setenv("AURORA_MANIFEST_DIR", str(tmp_path))
+    assert ManifestLock(manifest_path_for("kb.v1")).lock_path.name == "manifest-kb.v1.json.lock"
+    # Dotted index names get their own watcher lock
+    with single_watcher("kb.v1") as first, single_watcher("kb.v2") as second, single_watcher("kb.v1") as again:
+        assert first and second and not again
+    assert sorted(p.name for p in tmp_path.glob("*.watch.lock")) == ["manifest-kb.v1.json.watch.lock", "manifest-kb.v2.json.watch.lock"]
@@ -0,0 +1,222 @@
+import asyncio
+from collections import deque
+
+import pytest
+
+from aurora_kernel.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    AgentOverloaded,
+    CircuitBreaker,
+    CircuitOpen,
+    ConcurrencyLimiter,
+    UpstreamGuard,
+)
+
+def _breaker(**kw):
+    opts = dict(window=10, window_s=60, min_calls=4, error_rate=0.5, slow_s=1.0, slow_rate=0.5, open_s=10, max_open_s=40, probes=1)
+    opts.update(kw)
+    return CircuitBreaker(**opts)
+
+def _expire(b):
+    # Pretend the open time has passed
+    b.opened_at -= b.open_s + 1
+
+def test_stays_closed_below_min_calls():
+    b = _breaker()
+    for _ in range(3):
+        assert b.allow()
+        b.record(False, 0.1)
+    assert b.state == CLOSED
+
+def test_trips_on_error_rate():
+    b = _breaker()
+    for ok in (True, False, True, False):
+        assert b.allow()
+        b.record(ok, 0.1)
+    assert b.state == OPEN
+    assert b.last_trip == "error rate 2/4"
+    assert not b.allow()
+    assert b.rejected == 1
+    assert 0 < b.retry_in() <= 10
+
+def test_trips_on_slow_rate_but_not_on_fast_successes():
+    b = _breaker()
+    for latency in (0.1, 0.2, 0.3, 0.4, 0.5, 0.6):
+        b.record(True, latency)
+    assert b.state == CLOSED
+    b = _breaker()
+    for latency in (2.0, 0.1, 3.0, 0.1):
+        b.record(True, latency)
+    assert b.state == OPEN
+    assert b.last_trip.startswith("slow calls 2/4")
+
+def test_outcomes_outside_the_window_are_ignored():
+    b = _breaker()
+    for _ in range(3):
+        b.record(False, 0.1)
+    # Age the failures past window_s
+    b._outcomes = deque([(t - 61, ok, slow) for t, ok, slow in b._outcomes], maxlen=10)
+    for ok in (True, True, True, False):
+        b.record(ok, 0.1)
+    assert b.state == CLOSED
+    assert b.stats()["window"] == {"calls": 4, "error_rate": 0.25, "slow_rate": 0.0}
+
+def test_half_open_probe_success_closes():
+    b = _breaker()
+    for _ in range(4):
+        b.record(False, 0.1)
+    _expire(b)
+    assert b.allow()
+    assert b.state == HALF_OPEN
+    # Only one probe at a time
+    assert not b.allow()
+    b.record(True, 0.1)
+    assert b.state == CLOSED
+    assert b.open_s == 10
+    assert b.allow()
+
+def test_failed_or_slow_probe_reopens_with_backoff():
+    b = _breaker()
+    for _ in range(4):
+        b.record(False, 0.1)
+    _expire(b)
+    assert b.allow()
+    b.record(False, 0.1)
+    assert b.state == OPEN and b.open_s == 20
+    _expire(b)
+    assert b.allow()
+    b.record(True, 5.0)
+    assert b.state == OPEN and b.open_s == 40
+    assert b.last_trip.startswith("probe slow")
+    _expire(b)
+    assert b.allow()
+    b.record(False, 0.1)
+    # Capped at max_open_s
+    assert b.open_s == 40
+    assert b.trips == 4
+
+def test_release_frees_the_probe_slot():
+    b = _breaker()
+    for _ in range(4):
+        b.record(False, 0.1)
+    _expire(b)
+    assert b.allow()
+    assert not b.allow()
+    b.release()
+    assert b.state == HALF_OPEN
+    assert b.allow()
+
+def test_limiter_queues_then_rejects():
+    async def run():
+        lim = ConcurrencyLimiter(max_concurrency=1, max_queue=1, queue_timeout_s=5)
+        await lim.acquire()
+        waiter = asyncio.ensure_future(lim.acquire())
+        await asyncio.sleep(0)
+        assert lim.queued == 1
+        with pytest.raises(AgentOverloaded):
+            await lim.acquire()
+        lim.release()
+        await waiter
+        assert lim.active == 1 and lim.queued == 0
+        lim.release()
+        assert lim.active == 0
+        assert lim.rejected == 1
+    asyncio.run(run())
+
+def test_limiter_queue_timeout():
+    async def run():
+        lim = ConcurrencyLimiter(max_concurrency=1, max_queue=4, queue_timeout_s=0.01)
+        await lim.acquire()
+        with pytest.raises(AgentOverloaded):
+            await lim.acquire()
+        assert lim.timeouts == 1 and lim.queued == 0
+        lim.release()
+        assert lim.active == 0
+    asyncio.run(run())
+
+def test_guard_records_outcomes_and_refuses_when_open():
+    async def run():
+        guard = UpstreamGuard("test", breaker=_breaker(min_calls=2), limiter=ConcurrencyLimiter(2, 2, 1))
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                async with guard.call():
+                    raise RuntimeError("upstream 500")
+        assert guard.is_open
+        with pytest.raises(CircuitOpen):
+            async with guard.call():
+                pass
+        assert guard.limiter.active == 0
+    asyncio.run(run())
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def perf_counter(self):
+        return self.now
+
+    monotonic = perf_counter
+
+def _converse(monkeypatch, handler, calls=6):
+    """Run calls converse requests through api._converse_stream against handler(clock)."""
+    import httpx
+
+    from aurora_kernel import api, resilience
+    from aurora_kernel.agent_stream import ConverseStreamDecoder
+    from aurora_kernel.kibana_http import KIBANA_HTTP
+
+    clock = _Clock()
+    monkeypatch.setattr(resilience, "time", clock)
+    guard = UpstreamGuard("test", breaker=_breaker(min_calls=2, slow_s=15.0))
+    monkeypatch.setattr(api, "AGENT_GUARD", guard)
+    cfg = api.AgentBuilderConfig(kibana_url="http://kibana", api_key="k", connector_id="c", agent_id="a")
+
+    async def run():
+        monkeypatch.setattr(KIBANA_HTTP, "_client", httpx.AsyncClient(transport=httpx.MockTransport(lambda req: handler(clock))))
+        texts = []
+        for _ in range(calls):
+            decoder = ConverseStreamDecoder()
+            async for _ev in api._converse_stream(cfg, "q", [], decoder):
+                pass
+            texts.append(decoder.text)
+        await KIBANA_HTTP._client.aclose()
+        return texts
+
+    return guard, asyncio.run(run())
+
+ANSWER = '{"summary": "ok"}'
+
+def test_json_mode_answer_time_is_not_slow(monkeypatch):
+    import httpx
+
+    def handler(clock):
+        # A healthy buffered answer: headers only once the 30 s answer is written
+        clock.now += 30
+        return httpx.Response(200, json={"conversation_id": "c1", "response": {"message": ANSWER}})
+
+    guard, texts = _converse(monkeypatch, handler)
+    assert texts == [ANSWER] * 6
+    assert guard.breaker.state == CLOSED
+    assert guard.breaker.stats()["window"]["slow_rate"] == 0.0
+
+def test_sse_latency_is_time_to_first_event(monkeypatch):
+    import httpx
+
+    def stream(clock, first_event_s):
+        async def body():
+            clock.now += first_event_s
+            yield b'event: message_chunk\ndata: {"data": {"text_chunk": "{\\"summary\\""}}\n\n'
+            # The rest of the answer takes long; that is the model writing, not slowness
+            clock.now += 30
+            yield b'event: message_chunk\ndata: {"data": {"text_chunk": ": \\"ok\\"}"}}\n\n'
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body())
+
+    guard, texts = _converse(monkeypatch, lambda clock: stream(clock, 1))
+    assert texts == [ANSWER] * 6
+    assert guard.breaker.state == CLOSED
+
+    guard, _texts = _converse(monkeypatch, lambda clock: stream(clock, 20), calls=2)
+    assert guard.breaker.state == OPEN
+    assert guard.breaker.last_trip.startswith("slow calls 2/2")
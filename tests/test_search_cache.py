@@ -0,0 +1,66 @@
+import threading
+
+from aurora_kernel.search_cache import SearchCache
+
+RESULT = {"hits": [{"chunk_id": "A#0"}]}
+
+def _pair(tmp_path, generation_ttl_s=60.0):
+    # Two workers sharing one sqlite store
+    path = str(tmp_path / "cache.sqlite")
+    return SearchCache(shared_path=path, generation_ttl_s=generation_ttl_s), SearchCache(shared_path=path, generation_ttl_s=generation_ttl_s)
+
+def test_generation_is_read_from_sqlite_once_per_interval(tmp_path, monkeypatch):
+    a, b = _pair(tmp_path)
+    reads = []
+    real = a._shared.generation
+    monkeypatch.setattr(a._shared, "generation", lambda index: reads.append(index) or real(index))
+    a.put("kb", "q", None, 5, RESULT)
+    for _ in range(5):
+        assert a.get("kb", "q", None, 5) == RESULT
+    assert reads == ["kb"]
+    # Another worker's write is noticed once the interval has passed
+    b.invalidate("kb")
+    assert a.get("kb", "q", None, 5) == RESULT
+    a.generation_ttl_s = 0
+    assert a.get("kb", "q", None, 5) is None
+
+def test_own_invalidation_is_seen_at_once(tmp_path):
+    a, b = _pair(tmp_path)
+    gen = a.generation("kb")
+    a.invalidate("kb")
+    # A search that started before the write must not be cached as current
+    a.put("kb", "q", None, 5, RESULT, generation=gen)
+    assert a.get("kb", "q", None, 5) is None
+    b.generation_ttl_s = 0
+    assert b.get("kb", "q", None, 5) is None
+
+def test_stale_generation_read_does_not_undo_a_concurrent_bump(tmp_path, monkeypatch):
+    a, _b = _pair(tmp_path, generation_ttl_s=0)
+    a.put("kb", "q", None, 5, RESULT)
+    old = a.generation("kb")
+    a.generation_ttl_s = 60.0
+    read, bumped = threading.Event(), threading.Event()
+    real = a._shared.generation
+
+    def slow_read(index):
+        # Reads the generation, then loses the CPU until the bump has landed
+        gen = real(index)
+        read.set()
+        bumped.wait(5)
+        return gen
+
+    monkeypatch.setattr(a._shared, "generation", slow_read)
+    a._shared_generations.clear()
+    seen = []
+    reader = threading.Thread(target=lambda: seen.append(a.generation("kb")))
+    reader.start()
+    read.wait(5)
+    a.invalidate("kb")
+    bumped.set()
+    reader.join(5)
+    # The bump wins, even for the read that started before it
+    assert seen == [old + 1]
+    assert a.generation("kb") == old + 1
+    assert a.get("kb", "q", None, 5) is None
+    a.put("kb", "q", None, 5, RESULT, generation=old)
+    assert a.get("kb", "q", None, 5) is None